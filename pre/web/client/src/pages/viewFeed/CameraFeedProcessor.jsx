@@ -1,9 +1,12 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { io } from 'socket.io-client';
+import drawOverlay from './drawOverlay';
 
 const CameraFeedProcessor = () => {
   const socketRef = useRef(null);
+  const canvasRef = useRef(null);
   const [processedFrame, setProcessedFrame] = useState(null);
+  const [overlays, setOverlays] = useState(null); // metadata_only 피드의 그리기 명령 (감지기 이름 -> Overlay)
   const [prediction, setPrediction] = useState('');
   const [abandonedDetectionResults, setAbandonedDetectionResults] = useState(null);
   const [damageDetectionResults, setDamageDetectionResults] = useState(null);
@@ -29,6 +32,7 @@ const CameraFeedProcessor = () => {
     }
 
     setProcessedFrame(null);
+    setOverlays(null);
     setPrediction('');
     setAbandonedDetectionResults(null);
     setDamageDetectionResults(null);
@@ -55,6 +59,7 @@ const CameraFeedProcessor = () => {
 
     newSocket.on('response', (data) => {
       setProcessedFrame(data.image);
+      setOverlays(data.overlays || null);
       if (detectionMode === 'smoking') {
         setPrediction(data.prediction);
       } else if (detectionMode === 'abandoned') {
@@ -70,6 +75,17 @@ const CameraFeedProcessor = () => {
       }
     });
 
+    // 서버의 피드 파이프라인이 끝나면 (소스 오류 등) 잠시 후 다시 연결해 새 파이프라인을 시작합니다.
+    newSocket.on('feed_ended', (data) => {
+      console.warn(`Feed ended for ${detectionMode}: ${data && data.message}`);
+      setIsConnected(false);
+      setTimeout(() => {
+        if (socketRef.current === newSocket) {
+          newSocket.disconnect().connect();
+        }
+      }, 3000);
+    });
+
     newSocket.on('connect_error', (error) => {
       console.error(`Socket.IO connection error for ${detectionMode}:`, error);
       setIsConnected(false);
@@ -80,6 +96,30 @@ const CameraFeedProcessor = () => {
     };
   }, [detectionMode]);
 
+  // metadata_only 피드는 주석 없는 프레임 위에 그리기 명령을 캔버스로 그립니다.
+  useEffect(() => {
+    if (!overlays || !processedFrame) return undefined;
+    let current = true;
+    const image = new Image();
+    image.onload = () => {
+      if (current && canvasRef.current) {
+        drawOverlay(canvasRef.current, image, overlays);
+      }
+    };
+    image.src = processedFrame;
+    return () => {
+      current = false;
+    };
+  }, [processedFrame, overlays]);
+
+  // 알림에 저장할 이미지 (캔버스에 그린 경우 주석이 포함된 캔버스 이미지)
+  const annotatedFrame = () => {
+    if (overlays && canvasRef.current && canvasRef.current.width > 0) {
+      return canvasRef.current.toDataURL('image/jpeg');
+    }
+    return processedFrame;
+  };
+
   useEffect(() => {
     if (isDetected() && processedFrame) {
       const status = getStatusText();
@@ -104,7 +144,7 @@ const CameraFeedProcessor = () => {
         detectionMode: detectionMode,
         status: status,
         timestamp: new Date().toLocaleString('ko-KR'),
-        image: processedFrame
+        image: annotatedFrame()
       };
       setAlertHistory(prev => [newAlert, ...prev]);
     }
@@ -408,7 +448,12 @@ const CameraFeedProcessor = () => {
           borderRadius: '0 0 20px 20px',
           overflow: 'hidden'
         }}>
-          {processedFrame ? (
+          {processedFrame && overlays ? (
+            <canvas
+              ref={canvasRef}
+              style={{ width: "100%", display: "block" }}
+            />
+          ) : processedFrame ? (
             <img
               src={processedFrame}
               alt="Processed Feed"
@@ -0,0 +1,112 @@
+// 서버 감지기의 그리기 명령(Overlay.to_dict(), server/ai/overlay.py 참고)을 캔버스에 그립니다.
+// metadata_only 피드는 주석 없는 프레임과 'overlays'(감지기 이름 -> 그리기 명령)를 함께 보냅니다.
+
+const LABEL_SIZE = 13; // 서버 상자 라벨(Hershey scale 0.6)과 비슷한 글자 크기(px)
+
+const decodeBits = (base64) => {
+  const binary = atob(base64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i += 1) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+};
+
+// np.packbits로 묶인 격자(gh행 x gw열, 행 우선, 상위 비트부터)를 cell px 사각형으로 칠합니다.
+const drawMask = (ctx, item) => {
+  const [gw, gh] = item.grid;
+  const bytes = decodeBits(item.bits);
+  ctx.globalAlpha = item.a;
+  ctx.fillStyle = item.c;
+  for (let row = 0; row < gh; row += 1) {
+    for (let col = 0; col < gw; col += 1) {
+      const index = row * gw + col;
+      if (bytes[index >> 3] & (0x80 >> (index & 7))) {
+        ctx.fillRect(col * item.cell, row * item.cell, item.cell, item.cell);
+      }
+    }
+  }
+};
+
+const drawItem = (ctx, item) => {
+  ctx.globalAlpha = 1;
+  ctx.strokeStyle = item.c;
+  ctx.fillStyle = item.c;
+  ctx.lineWidth = item.w > 0 ? item.w : 1;
+  switch (item.t) {
+    case 'box': {
+      const [x1, y1, x2, y2] = item.xyxy;
+      ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+      if (item.label) {
+        ctx.font = `${LABEL_SIZE}px sans-serif`;
+        ctx.textBaseline = 'alphabetic';
+        ctx.fillText(item.label, x1, y1 - 10);
+      }
+      break;
+    }
+    case 'rect': {
+      const [x1, y1, x2, y2] = item.xyxy;
+      ctx.globalAlpha = item.a;
+      if (item.fill) {
+        ctx.fillRect(x1, y1, x2 - x1, y2 - y1);
+      } else {
+        ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+      }
+      break;
+    }
+    case 'line': {
+      if (!item.pts.length) break;
+      ctx.globalAlpha = item.a;
+      ctx.beginPath();
+      item.pts.forEach(([x, y], i) => (i === 0 ? ctx.moveTo(x, y) : ctx.lineTo(x, y)));
+      if (item.closed) ctx.closePath();
+      if (item.fill) {
+        ctx.fill();
+      } else {
+        ctx.stroke();
+      }
+      break;
+    }
+    case 'circle': {
+      const [x, y] = item.xy;
+      ctx.beginPath();
+      ctx.arc(x, y, item.r, 0, 2 * Math.PI);
+      if (item.w < 0) {
+        ctx.fill();
+      } else {
+        ctx.stroke();
+      }
+      break;
+    }
+    case 'text': {
+      const [x, y] = item.xy;
+      ctx.font = `${item.size}px sans-serif`;
+      ctx.textBaseline = item.anchor === 'top' ? 'top' : 'alphabetic';
+      ctx.fillText(item.text, x, y);
+      break;
+    }
+    case 'mask':
+      drawMask(ctx, item);
+      break;
+    default:
+      break;
+  }
+};
+
+// image(로드된 HTMLImageElement)를 캔버스에 그리고 그 위에 overlays의 명령을 순서대로 그립니다.
+const drawOverlay = (canvas, image, overlays) => {
+  canvas.width = image.naturalWidth;
+  canvas.height = image.naturalHeight;
+  const ctx = canvas.getContext('2d');
+  ctx.drawImage(image, 0, 0);
+  Object.values(overlays || {}).forEach((overlay) => {
+    const [width, height] = overlay.size;
+    ctx.save();
+    // 명령 좌표는 감지기의 프레임 크기 기준이므로 전송된 프레임 크기에 맞춰 늘립니다.
+    ctx.scale(canvas.width / width, canvas.height / height);
+    overlay.items.forEach((item) => drawItem(ctx, item));
+    ctx.restore();
+  });
+};
+
+export default drawOverlay;
@@ -3,9 +3,21 @@ import cv2
 import numpy as np
 import time
 
+from ai.background import make_background
+from ai.frame_analysis import StreamAnalysis
+from ai.overlay import Overlay, apply_overlay
+from ai.tiling import tile_regions, tiled_detections
+
 # 비디오 스트림에서 방치된 물건을 탐지하는 클래스입니다.
 class AbandonedItemDetector:
-    def __init__(self, yolo_model, fps=10, bg_learning_duration_sec=3):
+    accepts_analysis = True # 파이프라인의 공유 FrameAnalysis(YOLO 탐지)를 받을 수 있습니다.
+    draw = True # False이면 프레임에 그리지 않고 결과의 'overlay'로 그리기 명령을 돌려줍니다.
+    # 방치 판정은 처리한 프레임 수로 시간을 재고, 방치된 물체는 바로 정적인 장면에 있으므로
+    # 움직임 게이트가 프레임을 건너뛰면 판정이 늦어지거나 멈춥니다. 매 프레임 실행합니다.
+    motion_gated = False
+
+    def __init__(self, yolo_model, fps=10, bg_learning_duration_sec=3, tiled=False, global_imgsz=320, tile_size=320,
+                 max_tiles=4, background=None):
         """
         AbandonedItemDetector를 초기화합니다.
 
@@ -13,6 +25,12 @@ class AbandonedItemDetector:
             yolo_model: 미리 로드된 YOLO 모델 객체입니다.
             fps (int): 비디오 스트림의 초당 프레임 수입니다.
             bg_learning_duration_sec (int): 배경 학습을 위한 시간(초)입니다.
+            tiled (bool): True이면 배경 학습 후 전체 프레임은 global_imgsz로 한 번만 보고, 배경 차이
+                          영역만 원본 해상도 타일(tile_size)로 다시 추론해 NMS로 합칩니다. (작은 물체 검출용)
+            global_imgsz (int): 타일 모드의 전체 프레임 YOLO 입력 크기입니다.
+            tile_size (int): 타일 크기(원본 픽셀)이자 타일 추론 입력 크기입니다.
+            max_tiles (int): 프레임당 최대 타일 수입니다.
+            background (BackgroundEngine): 배경 모델입니다. (ai.background 참고, 기본값은 절반 해상도 이동 평균)
         """
         self.model = yolo_model # 미리 로드된 YOLO 모델을 사용합니다.
         self.fps = fps # 초당 프레임 수를 설정합니다.
@@ -21,27 +39,36 @@ class AbandonedItemDetector:
 
         self.persons_present = True # 사람 존재 여부를 나타내는 플래그입니다.
         self.last_seen_person_frame = 0 # 마지막으로 사람이 감지된 프레임 번호입니다.
-        self.background_frame = None # 배경 모델을 저장할 변수입니다.
+        self.background = background if background is not None else make_background() # 배경 모델입니다.
         self.abandoned_items = [] # 확정된 방치 물체의 경계 상자를 저장합니다.
         self.abandoned_candidates = {} # 잠재적인 방치 물체와 그 지속 시간을 저장합니다.
+        self.analysis = StreamAnalysis() # 공유 분석 없이 단독 실행할 때 사용합니다.
+
+        self.tiled = tiled
+        self.global_imgsz = global_imgsz
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tiles_run = 0 # 타일 모드에서 추론한 누적 타일 수
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, analysis=None):
         """
         방치된 물건을 탐지하기 위해 단일 비디오 프레임을 처리합니다.
 
         Args:
             frame (numpy.ndarray): 현재 비디오 프레임 (BGR 형식).
+            analysis (FrameAnalysis): 다른 감지기와 공유하는 프레임 분석 캐시입니다. (선택)
 
         Returns:
             tuple: (processed_frame, detection_results)
-                processed_frame (numpy.ndarray): 탐지 결과가 그려진 프레임.
+                processed_frame (numpy.ndarray): 탐지 결과가 그려진 프레임. (draw=False이면 입력 프레임)
                 detection_results (dict): 다음을 포함하는 딕셔너리:
                     - 'abandoned_items': 확정된 방치 물체의 경계 상자 목록.
                     - 'persons_present': 현재 사람이 있는지 여부를 나타내는 불리언 값.
                     - 'status_message': 현재 상태를 나타내는 메시지 (예: "Background Learning").
+                    - 'overlay': draw=False일 때 그리기 명령 (ai.overlay.Overlay).
         """
         self.frame_count += 1
-        current_frame_display = frame.copy() # 시각화를 위해 프레임을 복사합니다.
+        overlay = Overlay(frame.shape[1], frame.shape[0]) # 시각화 명령을 모읍니다.
         detection_results = {
             'abandoned_items': [],
             'persons_present': self.persons_present,
@@ -49,8 +76,21 @@ class AbandonedItemDetector:
         }
 
         # --- YOLO 객체 탐지 ---
-        results = self.model(current_frame_display, conf=0.1, verbose=False) # YOLO 모델로 객체를 탐지합니다.
-        detections = results[0].boxes.data.cpu().numpy()
+        if analysis is None:
+            analysis = self.analysis.frame(frame)
+        foreground = None
+        if self.frame_count > self.bg_frames:
+            # 배경 차이는 프레임당 한 번만 계산하고, 이때 배경도 조금씩 갱신됩니다.
+            foreground = self.background.apply(frame)
+        if self.tiled and foreground is not None:
+            # 저해상도 전체 패스 + 배경 차이 영역의 원본 해상도 타일
+            tiles = tile_regions(foreground, self.tile_size, self.max_tiles)
+            self.tiles_run += len(tiles)
+            detections = tiled_detections(self.model, frame, tiles,
+                                          analysis.detections(self.model, conf=0.1, imgsz=self.global_imgsz),
+                                          conf=0.1, imgsz=self.tile_size)
+        else:
+            detections = analysis.detections(self.model, conf=0.1) # YOLO 모델로 객체를 탐지합니다. (공유 패스)
 
         persons = [] # 사람 객체를 저장할 리스트입니다.
         items = [] # 사람 이외의 객체를 저장할 리스트입니다.
@@ -58,19 +98,15 @@ class AbandonedItemDetector:
             x1, y1, x2, y2, score, cls = det
             cls = int(cls)
             if cls == 0:  # COCO 데이터셋에서 클래스 0은 일반적으로 '사람'입니다.
-                persons.append((x1, y1, x2, y2))
+                persons.append((x1, y1, x2, y2, score))
             else:
                 items.append((x1, y1, x2, y2, cls))
 
         # --- 배경 학습 ---
         if self.frame_count <= self.bg_frames:
             # 초기 몇 초 동안 배경을 학습합니다.
-            if self.background_frame is None:
-                self.background_frame = frame.copy().astype("float")
-            else:
-                cv2.accumulateWeighted(frame, self.background_frame, 0.05) # 가중 평균을 사용하여 배경을 업데이트합니다.
-            cv2.putText(current_frame_display, "Background Learning...", (30, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 255), 2)
+            self.background.learn(frame, 0.05) # 가중 평균을 사용하여 배경을 업데이트합니다.
+            overlay.text("Background Learning...", 30, 50, (0, 200, 255), scale=1)
             detection_results['status_message'] = "Background Learning..."
 
         else:
@@ -90,10 +126,7 @@ class AbandonedItemDetector:
             # --- 방치된 물건 탐지 ---
             if not self.persons_present:
                 # 현재 프레임과 배경의 차이를 계산합니다.
-                diff = cv2.absdiff(frame, cv2.convertScaleAbs(self.background_frame))
-                gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-                blur = cv2.GaussianBlur(gray, (5, 5), 0)
-                _, thresh = cv2.threshold(blur, 40, 255, cv2.THRESH_BINARY)
+                thresh = foreground
                 contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
                 current_frame_abandoned_items = []
@@ -130,27 +163,21 @@ class AbandonedItemDetector:
 
         # --- 시각화 ---
         # 사람을 초록색 사각형으로 표시합니다.
-        for (x1, y1, x2, y2) in persons:
-            cv2.rectangle(current_frame_display, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-            cv2.putText(current_frame_display, "Person", (int(x1), int(y1) - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        for (x1, y1, x2, y2, score) in persons:
+            overlay.box(x1, y1, x2, y2, (0, 255, 0), 2, label="Person", conf=score, label_scale=0.8)
 
         # 물건을 하늘색 사각형으로 표시합니다.
         for (x1, y1, x2, y2, cls) in items:
-            cv2.rectangle(current_frame_display, (int(x1), int(y1)), (int(x2), int(y2)), (255, 255, 0), 1)
-            # 선택적으로 물건 클래스 이름을 추가할 수 있습니다.
-            # cv2.putText(current_frame_display, self.model.names[cls], (int(x1), int(y1) - 5),
-            #             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            overlay.box(x1, y1, x2, y2, (255, 255, 0), 1)
 
         # 방치된 물건을 빨간색 사각형으로 표시합니다.
         for (x1, y1, x2, y2) in self.abandoned_items:
-            cv2.rectangle(current_frame_display, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 3)
-            cv2.putText(current_frame_display, "Abandoned", (int(x1), int(y1) - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            overlay.box(x1, y1, x2, y2, (0, 0, 255), 3, label="Abandoned", label_scale=1)
             detection_results['status_message'] = "Abandoned Item Detected!"
 
-
-        return current_frame_display, detection_results
+        display = frame.copy() if self.draw else frame
+        display = apply_overlay(display, overlay, detection_results, self.draw)
+        return display, detection_results
 
     def _bbox_overlap(self, bbox1, bbox2):
         """
@@ -8,11 +8,16 @@ import torch.nn.functional as F
 import cv2
 import numpy as np
 from pathlib import Path
-from collections import deque
+from collections import namedtuple
 import time
 import random
 from PIL import Image, ImageDraw, ImageFont
 import shutil
+import json
+
+from ai.clip_buffer import ClipBuffer
+from ai.overlay import Overlay
+from ai.text_sprites import blend_sprite, sprite_from_rgba, text_sprites
 
 # ============================================
 # 샘플 폴더 관리
@@ -119,38 +124,183 @@ class Optimized3DCNN(nn.Module):
         x = self.classifier(x)
         return x
 
+# ============================================
+# 모델 로드
+# ============================================
+LoadedAnomalyModel = namedtuple('LoadedAnomalyModel', ['model', 'label_map', 'best_val_acc'])
+
+def load_anomaly_model(model_path, device='cpu'):
+    """체크포인트(.pth)에서 추론용(eval) Optimized3DCNN과 라벨 맵을 로드합니다."""
+    checkpoint = torch.load(model_path, map_location=device, weights_only=False)
+    
+    if 'label_map' in checkpoint:
+        label_map = checkpoint['label_map']
+    else:
+        label_map = {
+            '전도': 0, '파손': 1, '방화': 2, '흡연': 3,
+            '유기': 4, '절도': 5, '폭행': 6, '교통약자': 7
+        }
+    
+    model = Optimized3DCNN(num_classes=len(label_map)).to(device)
+    model.load_state_dict(checkpoint['model'])
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    
+    print(f"[OK] 모델 로드 완료! 클래스: {len(label_map)}")
+    if 'best_val_acc' in checkpoint:
+        print(f"  검증 정확도: {checkpoint['best_val_acc']:.1f}%")
+    
+    return LoadedAnomalyModel(model, label_map, checkpoint.get('best_val_acc'))
+
+def anomaly_artifact_paths(model_path):
+    """체크포인트(.pth)에 대응하는 최적화 아티팩트 경로 (ai/anomaly_export.py가 생성)"""
+    stem = Path(model_path).with_suffix('')
+    return {
+        'onnx': f"{stem}.onnx",
+        'torchscript': f"{stem}.ts.pt",
+        'int8': f"{stem}.int8.ts.pt",
+        'labels': f"{stem}.labels.json",
+    }
+
+class OnnxAnomalyModel:
+    """ONNX Runtime 세션을 Optimized3DCNN처럼 호출할 수 있게 감쌉니다. (torch 텐서 입출력)"""
+    
+    def __init__(self, onnx_path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+    
+    def __call__(self, x):
+        logits = self.session.run(None, {self.input_name: x.detach().cpu().numpy()})[0]
+        return torch.from_numpy(logits)
+
+def load_anomaly_runtime(model_path, device='cpu', runtime='auto', num_threads=None):
+    """
+    추론 런타임을 골라 LoadedAnomalyModel을 반환합니다.
+
+    runtime:
+        'auto'        ONNX(CPU + onnxruntime 설치 시) -> TorchScript -> eager 순으로 있는 아티팩트를 사용
+        'onnx'        BatchNorm이 접힌 ONNX 모델 (ONNX Runtime, CPU)
+        'torchscript' BatchNorm이 접힌 frozen TorchScript 모델
+        'eager'       .pth 체크포인트의 nn.Module (load_anomaly_model)
+        'int8'        ai/anomaly_quantize.py로 만든 INT8 TorchScript 모델 (x86 CPU, 'auto'에서는 선택하지 않음)
+    num_threads: ONNX Runtime/torch intra-op 스레드 수 (None이면 기본값)
+    """
+    paths = anomaly_artifact_paths(model_path)
+    has_labels = Path(paths['labels']).exists()
+    
+    if runtime == 'auto':
+        runtime = 'eager'
+        if has_labels and Path(paths['torchscript']).exists():
+            runtime = 'torchscript'
+        if has_labels and device == 'cpu' and Path(paths['onnx']).exists():
+            try:
+                import onnxruntime  # noqa: F401
+                runtime = 'onnx'
+            except ImportError:
+                pass
+    
+    if runtime == 'eager':
+        return load_anomaly_model(model_path, device)
+    
+    with open(paths['labels'], encoding='utf-8') as f:
+        meta = json.load(f)
+    
+    if runtime == 'onnx':
+        model = OnnxAnomalyModel(paths['onnx'], num_threads)
+    elif runtime in ('torchscript', 'int8'):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        if runtime == 'int8':
+            torch.backends.quantized.engine = 'fbgemm'
+        model = torch.jit.load(paths[runtime], map_location=device)
+        model.eval()
+    else:
+        raise ValueError(f"알 수 없는 런타임: {runtime}")
+    
+    print(f"[OK] 모델 로드 완료! ({runtime}) 클래스: {len(meta['label_map'])}")
+    return LoadedAnomalyModel(model, meta['label_map'], meta.get('best_val_acc'))
+
+# ============================================
+# 클립 배치 추론
+# ============================================
+class AnomalyClipPredictor:
+    """
+    축소된 uint8 클립 여러 개를 한 번의 Optimized3DCNN forward로 추론합니다.
+    여러 스트림이 공유할 수 있도록 스트림별 상태를 갖지 않습니다.
+    """
+    
+    def __init__(self, loaded_model, device='cpu'):
+        self.model = loaded_model.model
+        self.device = device
+        self.id_to_label = {v: k for k, v in loaded_model.label_map.items()}
+        
+        self.mean = torch.tensor([0.45, 0.45, 0.45]).view(1, 3, 1, 1, 1).to(device)
+        self.std = torch.tensor([0.225, 0.225, 0.225]).view(1, 3, 1, 1, 1).to(device)
+        # (x / 255 - mean) / std == x * norm_scale + norm_bias (uint8 -> float 변환과 함께 한 번에 계산)
+        self.norm_scale = 1.0 / (255.0 * self.std)
+        self.norm_bias = -self.mean / self.std
+    
+    def normalize_clips(self, clips):
+        """uint8 클립 목록 [(T, H, W, C), ...]을 정규화된 모델 입력 (N, C, T, H, W)로 변환합니다."""
+        batch = clips[0][np.newaxis] if len(clips) == 1 else np.stack(clips)
+        batch_tensor = torch.from_numpy(batch).to(self.device).permute(0, 4, 1, 2, 3)
+        return torch.addcmul(self.norm_bias, batch_tensor.float(), self.norm_scale)
+    
+    @torch.no_grad()
+    def predict_batch(self, clips):
+        """클립 목록을 한 번에 추론하고 클립별 결과 dict 목록을 같은 순서로 반환합니다."""
+        start_time = time.time()
+        outputs = self.model(self.normalize_clips(clips))
+        probabilities = F.softmax(outputs, dim=1)
+        confidences, predicted_classes = probabilities.max(1)
+        probabilities = probabilities.cpu().numpy()
+        inference_time = time.time() - start_time
+        
+        results = []
+        for i, (confidence, predicted_class) in enumerate(zip(confidences.tolist(), predicted_classes.tolist())):
+            results.append({
+                'class_id': predicted_class,
+                'class_name_kr': self.id_to_label[predicted_class],
+                'confidence': confidence,
+                'probabilities': probabilities[i],
+                'inference_time': inference_time
+            })
+        return results
+
 # ============================================
 # 비디오 추론 클래스
 # ============================================
 class AbnormalBehaviorDetector:
-    def __init__(self, model_path, device='cuda', confidence_threshold=0.6):
+    def __init__(self, model_path, device='cuda', confidence_threshold=0.6, loaded_model=None, batcher=None,
+                 runtime='auto', num_threads=None):
+        """
+        loaded_model: ModelRegistry 등에서 미리 로드한 LoadedAnomalyModel. 주어지면
+                      model_path를 다시 읽지 않고 모델을 공유합니다. (읽기 전용)
+        batcher: 여러 스트림의 클립을 모아 한 번에 추론하는 BatchedClipPredictor. (선택)
+        runtime: loaded_model이 없을 때 사용할 런타임 ('auto', 'onnx', 'torchscript', 'eager')
+                 자세한 내용은 load_anomaly_runtime 참고
+        """
         self.device = device
         self.confidence_threshold = confidence_threshold
         
-        checkpoint = torch.load(model_path, map_location=device, weights_only=False)
-        
-        if 'label_map' in checkpoint:
-            self.label_map = checkpoint['label_map']
-        else:
-            self.label_map = {
-                '전도': 0, '파손': 1, '방화': 2, '흡연': 3,
-                '유기': 4, '절도': 5, '폭행': 6, '교통약자': 7
-            }
+        if loaded_model is None:
+            loaded_model = load_anomaly_runtime(model_path, device, runtime, num_threads)
         
+        self.label_map = loaded_model.label_map
         self.id_to_label = {v: k for k, v in self.label_map.items()}
         self.num_classes = len(self.label_map)
+        self.model = loaded_model.model
+        self.predictor = AnomalyClipPredictor(loaded_model, device)
+        self.batcher = batcher
         
-        self.model = Optimized3DCNN(num_classes=self.num_classes).to(device)
-        self.model.load_state_dict(checkpoint['model'])
-        self.model.eval()
-        
-        print(f"[OK] 모델 로드 완료! 클래스: {self.num_classes}")
-        if 'best_val_acc' in checkpoint:
-            print(f"  검증 정확도: {checkpoint['best_val_acc']:.1f}%")
-        
-        self.mean = torch.tensor([0.45, 0.45, 0.45]).view(1, 3, 1, 1, 1).to(device)
-        self.std = torch.tensor([0.225, 0.225, 0.225]).view(1, 3, 1, 1, 1).to(device)
         self.target_size = 224
+        self.clip_len = 16
         
         # 한글 폰트 - 1.5배 크기
         try:
@@ -180,76 +330,127 @@ class AbnormalBehaviorDetector:
             4: (255, 200, 100), 5: (100, 200, 255), 6: (0, 0, 255), 7: (255, 255, 100),
         }
         
+        # 오버레이 스프라이트 캐시
+        self._panel = None
+        self._panel_result = None
+        
         self.stats = {
             'total_frames': 0,
             'inference_times': [],
             'detections': {label: 0 for label in self.label_map.keys()}
         }
     
+    def resize_frame_into(self, frame, out):
+        """BGR 프레임을 target_size로 축소하고 RGB로 바꿔 out (H, W, C uint8)에 씁니다."""
+        cv2.resize(frame, (self.target_size, self.target_size), dst=out)
+        cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+    
+    def resize_frames(self, frames):
+        clip = np.empty((len(frames), self.target_size, self.target_size, 3), dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            self.resize_frame_into(frame, clip[i])
+        return clip
+    
     def preprocess_frames(self, frames):
-        processed = []
-        for frame in frames:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.resize(frame, (self.target_size, self.target_size))
-            processed.append(frame)
-        
-        frames_array = np.array(processed, dtype=np.float32) / 255.0
-        frames_tensor = torch.from_numpy(frames_array).permute(0, 3, 1, 2)
-        frames_tensor = frames_tensor.unsqueeze(0).permute(0, 2, 1, 3, 4)
-        frames_tensor = frames_tensor.to(self.device)
-        frames_tensor = (frames_tensor - self.mean) / self.std
-        return frames_tensor
+        return self.predictor.normalize_clips([self.resize_frames(frames)])
+    
+    def new_clip_buffer(self, window=None, stride=8):
+        """축소된 uint8 프레임을 저장하는 ClipBuffer를 만듭니다. (window 기본값: clip_len)"""
+        return ClipBuffer(window or self.clip_len, stride, (self.target_size, self.target_size, 3))
+    
+    def push_frame(self, clip_buffer, frame):
+        """스트림 프레임을 클립 버퍼에 추가합니다. 프레임당 축소는 이때 한 번만 수행됩니다."""
+        clip_buffer.append(lambda out: self.resize_frame_into(frame, out))
+    
+    def predict_clip(self, clip):
+        """
+        축소된 uint8 클립 (T, H, W, C), 예: ClipBuffer.clip() 뷰로 추론합니다.
+        batcher가 있으면 다른 스트림의 클립과 함께 배치로 추론합니다.
+        """
+        if self.batcher is not None:
+            result = self.batcher(clip)
+        else:
+            result = self.predictor.predict_batch([clip])[0]
+        self.stats['inference_times'].append(result['inference_time'])
+        return result
     
-    @torch.no_grad()
     def predict(self, frames):
-        start_time = time.time()
-        
-        input_tensor = self.preprocess_frames(frames)
-        outputs = self.model(input_tensor)
-        probabilities = F.softmax(outputs, dim=1)[0]
-        
-        confidence, predicted_class = probabilities.max(0)
-        confidence = confidence.item()
-        predicted_class = predicted_class.item()
+        return self.predict_clip(self.resize_frames(frames))
+    
+    def draw_results(self, frame, result, frame_buffer_size, fps=None, inplace=False):
+        """
+        결과 그리기 - 우하단 배치
+
+        패널(반투명 배경, 상태/클래스/신뢰도 텍스트, 신뢰도 바, 상위 3개)은 결과가 바뀔 때만
+        BGRA 스프라이트로 다시 그리고, 매 프레임에는 패널 영역만 알파 블렌딩합니다.
+        inplace=True이면 frame에 직접 그립니다. (기본값은 복사본에 그려 반환)
+        """
+        h, w = frame.shape[:2]
+        if not inplace:
+            frame = frame.copy()
         
-        inference_time = time.time() - start_time
-        self.stats['inference_times'].append(inference_time)
+        # 우하단 반투명 배경 (1.5배)
+        bg_width = 450  # 300 * 1.5
+        bg_height = 300  # 200 * 1.5
+        margin = 20
+        bg_x = w - bg_width - margin
+        bg_y = h - bg_height - margin
         
-        class_name_kr = self.id_to_label[predicted_class]
+        if self._panel_result is not result:
+            self._panel = self._render_panel(result, bg_width, bg_height)
+            self._panel_result = result
+        blend_sprite(frame, self._panel, bg_x, bg_y)
         
-        return {
-            'class_id': predicted_class,
-            'class_name_kr': class_name_kr,
-            'confidence': confidence,
-            'probabilities': probabilities.cpu().numpy(),
-            'inference_time': inference_time
-        }
+        # FPS & Buffer (우상단)
+        if fps:
+            text_sprites.draw(frame, f"FPS: {fps:.1f}", self.font_small, (0, 255, 255), w - 225, 15)
+        text_sprites.draw(frame, f"Buffer: {frame_buffer_size}/16", self.font_small, (255, 255, 255), w - 270, 60)
+        return frame
     
-    def draw_results(self, frame, result, frame_buffer_size, fps=None):
-        """결과 그리기 - 우하단 배치"""
-        h, w = frame.shape[:2]
+    def overlay_results(self, result, width, height, frame_buffer_size):
+        """draw_results와 같은 배치의 결과 패널을 그리기 명령(Overlay)으로 반환합니다."""
+        overlay = Overlay(width, height)
+        bg_width, bg_height, margin = 450, 300, 20
+        bg_x = width - bg_width - margin
+        bg_y = height - bg_height - margin
+        text_x, text_y = bg_x + 30, bg_y + 15
+        class_name_kr = result['class_name_kr']
+        confidence = result['confidence']
+        class_id = result['class_id']
+        color_bgr = self.class_colors.get(class_id, (255, 255, 255))
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-        draw = ImageDraw.Draw(pil_image)
+        overlay.rect(bg_x, bg_y, bg_x + bg_width, bg_y + bg_height, (0, 0, 0), fill=True, alpha=180 / 255)
+        if confidence > self.confidence_threshold:
+            overlay.text(f"경고: {class_name_kr} 감지", text_x, text_y, (0, 0, 255), font=self.font_large)
+        else:
+            overlay.text("상태: 불확실", text_x, text_y, (0, 255, 255), font=self.font_large)
+        overlay.text(f"클래스: {class_name_kr}", text_x, text_y + 90,
+                     self.class_colors_rgb.get(class_id, (255, 255, 255))[::-1], font=self.font_medium)
+        overlay.text(f"신뢰도: {confidence*100:.1f}%", text_x, text_y + 143, (255, 255, 255), font=self.font_small)
         
+        bar_y = bg_y + 195
+        overlay.rect(bg_x, bar_y, bg_x + 450, bar_y + 30, (50, 50, 50), fill=True)
+        overlay.rect(bg_x, bar_y, bg_x + int(450 * confidence), bar_y + 30, color_bgr, fill=True)
+        
+        probs = result['probabilities']
+        for i, idx in enumerate(np.argsort(probs)[-3:][::-1]):
+            overlay.text(f"{i+1}. {self.id_to_label[idx]}: {probs[idx]*100:.1f}%", text_x, bg_y + 248 + i*38,
+                         (200, 200, 200), font=self.font_small)
+        overlay.text(f"Buffer: {frame_buffer_size}/16", width - 270, 60, (255, 255, 255), font=self.font_small)
+        return overlay
+    
+    def _render_panel(self, result, bg_width, bg_height):
+        """결과 패널을 (bg_x, bg_y) 기준 좌표의 BGRA 스프라이트로 그립니다."""
         class_name_kr = result['class_name_kr']
         confidence = result['confidence']
         class_id = result['class_id']
         color_rgb = self.class_colors_rgb.get(class_id, (255, 255, 255))
         
-        # 우하단 반투명 배경 (1.5배)
-        bg_width = 450  # 300 * 1.5
-        bg_height = 300  # 200 * 1.5
-        margin = 20
-        bg_x = w - bg_width - margin
-        bg_y = h - bg_height - margin
-        
-        overlay = Image.new('RGBA', pil_image.size, (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-        overlay_draw.rectangle([(bg_x, bg_y), (bg_x + bg_width, bg_y + bg_height)], fill=(0, 0, 0, 180))
-        pil_image = Image.alpha_composite(pil_image.convert('RGBA'), overlay).convert('RGB')
-        draw = ImageDraw.Draw(pil_image)
+        text_x, text_y = 30, 15
+        top3_y = 248
+        panel = Image.new('RGBA', (bg_width + 1, top3_y + 3 * 38 + 10), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(panel)
+        draw.rectangle([(0, 0), (bg_width, bg_height)], fill=(0, 0, 0, 180))
         
         is_abnormal = confidence > self.confidence_threshold
         
@@ -260,48 +461,28 @@ class AbnormalBehaviorDetector:
             status_text = "상태: 불확실"
             status_color = (255, 255, 0)
         
-        # 텍스트 위치 (우하단 기준)
-        text_x = bg_x + 30
-        text_y = bg_y + 15
-        
         draw.text((text_x, text_y), status_text, font=self.font_large, fill=status_color)
         draw.text((text_x, text_y + 90), f"클래스: {class_name_kr}", font=self.font_medium, fill=color_rgb)
         draw.text((text_x, text_y + 143), f"신뢰도: {confidence*100:.1f}%", font=self.font_small, fill=(255, 255, 255))
         
-        frame = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        
-        # 신뢰도 바 (우하단 하단)
+        # 신뢰도 바 (패널 하단)
         bar_width, bar_height = 450, 30  # 1.5배
-        bar_x = bg_x
-        bar_y = bg_y + 195
-        
-        cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), (50, 50, 50), -1)
+        bar_y = 195
+        draw.rectangle([(0, bar_y), (bar_width, bar_y + bar_height)], fill=(50, 50, 50, 255))
         fill_width = int(bar_width * confidence)
         color_bgr = self.class_colors.get(class_id, (255, 255, 255))
-        cv2.rectangle(frame, (bar_x, bar_y), (bar_x + fill_width, bar_y + bar_height), color_bgr, -1)
+        draw.rectangle([(0, bar_y), (fill_width, bar_y + bar_height)], fill=color_bgr[::-1] + (255,))
         
-        # 상위 3개 (우하단 최하단)
+        # 상위 3개 (패널 최하단)
         probs = result['probabilities']
         top3_indices = np.argsort(probs)[-3:][::-1]
-        
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-        draw = ImageDraw.Draw(pil_image)
-        
-        y_offset = bg_y + 248
         for i, idx in enumerate(top3_indices):
             label_kr = self.id_to_label[idx]
             prob = probs[idx]
             text = f"{i+1}. {label_kr}: {prob*100:.1f}%"
-            draw.text((text_x, y_offset + i*38), text, font=self.font_small, fill=(200, 200, 200))
-        
-        # FPS & Buffer (우상단)
-        if fps:
-            draw.text((w - 225, 15), f"FPS: {fps:.1f}", font=self.font_small, fill=(0, 255, 255))
-        draw.text((w - 270, 60), f"Buffer: {frame_buffer_size}/16", font=self.font_small, fill=(255, 255, 255))
+            draw.text((text_x, top3_y + i*38), text, font=self.font_small, fill=(200, 200, 200))
         
-        frame = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        return frame
+        return sprite_from_rgba(panel)
     
     def process_video(self, video_path, output_path=None, stride=8, display=True, real_time_speed=True):
         cap = cv2.VideoCapture(str(video_path))
@@ -322,7 +503,7 @@ class AbnormalBehaviorDetector:
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
-        frame_buffer = deque(maxlen=16)
+        clip_buffer = self.new_clip_buffer(stride=stride)
         frame_count = 0
         last_result = None
         fps_start_time = time.time()
@@ -340,10 +521,10 @@ class AbnormalBehaviorDetector:
                 
                 frame_count += 1
                 self.stats['total_frames'] += 1
-                frame_buffer.append(frame.copy())
+                self.push_frame(clip_buffer, frame)
                 
-                if len(frame_buffer) == 16 and frame_count % stride == 0:
-                    result = self.predict(list(frame_buffer))
+                if clip_buffer.ready():
+                    result = self.predict_clip(clip_buffer.clip())
                     last_result = result
                     self.stats['detections'][result['class_name_kr']] += 1
                     
@@ -359,7 +540,7 @@ class AbnormalBehaviorDetector:
                         fps_start_time = time.time()
                         fps_frame_count = 0
                     
-                    display_frame = self.draw_results(frame, last_result, len(frame_buffer), current_fps)
+                    display_frame = self.draw_results(frame, last_result, len(clip_buffer), current_fps, inplace=True)
                 else:
                     display_frame = frame
                 
@@ -416,6 +597,54 @@ class AbnormalBehaviorDetector:
         for key in self.stats['detections'].keys():
             self.stats['detections'][key] = 0
 
+# ============================================
+# 스트림용 클립 감지기
+# ============================================
+class ClipAnomalyDetector:
+    """
+    AbnormalBehaviorDetector를 process_frame(frame) -> (frame, results) 인터페이스로 감쌉니다.
+    축소된 프레임을 clip_len개까지 모으고 stride 프레임마다 추론하며, 마지막 결과를 매 프레임에 그립니다.
+    draw=False이면 그리지 않고 결과의 'overlay'로 패널의 그리기 명령을 돌려줍니다.
+    """
+    draw = True
+    
+    @property
+    def modifies_input(self):
+        # 결과를 입력 프레임에 직접 그릴 때만 파이프라인이 복사본을 넘깁니다.
+        return self.draw
+
+    def __init__(self, detector, clip_len=16, stride=8):
+        self.detector = detector
+        self.clip_buffer = detector.new_clip_buffer(clip_len, stride)
+        self.last_result = None
+
+    def reset(self):
+        """비디오가 처음부터 다시 재생될 때 버퍼와 결과를 비웁니다."""
+        self.clip_buffer.clear()
+        self.last_result = None
+
+    def process_frame(self, frame):
+        self.detector.push_frame(self.clip_buffer, frame)
+
+        if self.clip_buffer.ready():
+            self.last_result = self.detector.predict_clip(self.clip_buffer.clip())
+
+        if not self.last_result:
+            return frame, {}
+
+        result = self.last_result
+        results = {
+            'class_id': result['class_id'],
+            'class_name_kr': result['class_name_kr'],
+            'confidence': result['confidence'],
+            'is_abnormal': result['confidence'] > self.detector.confidence_threshold,
+        }
+        if not self.draw:
+            h, w = frame.shape[:2]
+            results['overlay'] = self.detector.overlay_results(result, w, h, len(self.clip_buffer))
+            return frame, results
+        return self.detector.draw_results(frame, result, len(self.clip_buffer), inplace=True), results
+
 # ============================================
 # 메인
 # ============================================
@@ -0,0 +1,176 @@
+"""
+Optimized3DCNN 추론용 아티팩트 내보내기
+
+BatchNorm을 앞/뒤 레이어에 접어 넣은 모델을 TorchScript(frozen)와 ONNX로 저장하고,
+원본 .pth 모델과 출력이 같은지 샘플 클립으로 확인합니다. 생성된 아티팩트는
+load_anomaly_runtime(runtime='auto')이 자동으로 사용합니다.
+
+사용법 (server 디렉터리에서):
+    python -m ai.anomaly_export --checkpoint ./ai/efficient_50_best.pth --clips ./uploads
+"""
+
+import argparse
+import copy
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from ai.aiConAnomalyDetect import (
+    AnomalyClipPredictor, OnnxAnomalyModel, anomaly_artifact_paths, load_anomaly_model
+)
+
+CLIP_LEN = 16
+TARGET_SIZE = 224
+VIDEO_SUFFIXES = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def fold_batchnorm(model):
+    """
+    eval 모드 Optimized3DCNN의 BatchNorm을 접은 복사본을 반환합니다.
+    - features: Conv3d -> BatchNorm3d 는 Conv3d 하나로 합칩니다.
+    - classifier: Linear -> ReLU -> BatchNorm1d -> Dropout -> Linear 의 BatchNorm1d는
+      ReLU 뒤에 있으므로 다음 Linear에 접습니다. (eval에서 Dropout은 항등 함수)
+    """
+    folded = copy.deepcopy(model).eval()
+
+    layers = list(folded.features)
+    for i in range(len(layers) - 1):
+        if isinstance(layers[i], nn.Conv3d) and isinstance(layers[i + 1], nn.BatchNorm3d):
+            layers[i] = fuse_conv_bn_eval(layers[i], layers[i + 1])
+            layers[i + 1] = nn.Identity()
+    folded.features = nn.Sequential(*[layer for layer in layers if not isinstance(layer, nn.Identity)])
+
+    layers = list(folded.classifier)
+    for i, layer in enumerate(layers):
+        if not isinstance(layer, nn.BatchNorm1d):
+            continue
+        following = [j for j in range(i + 1, len(layers)) if isinstance(layers[j], nn.Linear)]
+        between = layers[i + 1:following[0]] if following else None
+        if not following or not all(isinstance(m, nn.Dropout) for m in between):
+            continue
+        linear = layers[following[0]]
+        scale = layer.weight / torch.sqrt(layer.running_var + layer.eps)
+        shift = layer.bias - layer.running_mean * scale
+        fused = nn.Linear(linear.in_features, linear.out_features)
+        with torch.no_grad():
+            fused.weight.copy_(linear.weight * scale.unsqueeze(0))
+            fused.bias.copy_(linear.bias + linear.weight @ shift)
+        layers[following[0]] = fused
+        layers[i] = nn.Identity()
+    folded.classifier = nn.Sequential(*[layer for layer in layers
+                                        if not isinstance(layer, (nn.Identity, nn.Dropout))])
+    for param in folded.parameters():
+        param.requires_grad_(False)
+    return folded
+
+
+def export_artifacts(checkpoint, opset=17):
+    """체크포인트에서 TorchScript/ONNX/라벨 파일을 생성하고 경로 dict를 반환합니다."""
+    loaded = load_anomaly_model(checkpoint, 'cpu')
+    folded = fold_batchnorm(loaded.model)
+    paths = anomaly_artifact_paths(checkpoint)
+    dummy = torch.zeros(1, 3, CLIP_LEN, TARGET_SIZE, TARGET_SIZE)
+
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(folded, dummy))
+    scripted.save(paths['torchscript'])
+    print(f"[OK] TorchScript: {paths['torchscript']}")
+
+    torch.onnx.export(
+        folded, dummy, paths['onnx'], opset_version=opset,
+        input_names=['clip'], output_names=['logits'],
+        dynamic_axes={'clip': {0: 'batch'}, 'logits': {0: 'batch'}},
+    )
+    print(f"[OK] ONNX: {paths['onnx']}")
+
+    write_labels(checkpoint, loaded)
+    return paths
+
+
+def write_labels(checkpoint, loaded):
+    """아티팩트와 함께 사용할 라벨 맵 파일을 저장합니다. (TorchScript/ONNX에는 라벨이 없음)"""
+    with open(anomaly_artifact_paths(checkpoint)['labels'], 'w', encoding='utf-8') as f:
+        json.dump({'label_map': loaded.label_map, 'best_val_acc': loaded.best_val_acc}, f, ensure_ascii=False)
+
+
+def load_sample_clips(clips_dir, limit=8):
+    """폴더의 비디오마다 앞쪽 CLIP_LEN 프레임을 축소한 uint8 클립 (T, H, W, C)을 읽습니다."""
+    clips = []
+    for video in sorted(Path(clips_dir).rglob('*')):
+        if video.suffix.lower() not in VIDEO_SUFFIXES:
+            continue
+        cap = cv2.VideoCapture(str(video))
+        frames = []
+        while len(frames) < CLIP_LEN:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = cv2.resize(frame, (TARGET_SIZE, TARGET_SIZE))
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        cap.release()
+        if len(frames) == CLIP_LEN:
+            clips.append(np.stack(frames))
+        if len(clips) >= limit:
+            break
+    return clips
+
+
+def parity_check(checkpoint, clips, runtimes=('torchscript', 'onnx')):
+    """원본 .pth 대비 각 런타임의 최대 logit 차이, top-1 일치율, 평균 지연을 출력하고 반환합니다."""
+    reference = load_anomaly_model(checkpoint, 'cpu')
+    paths = anomaly_artifact_paths(checkpoint)
+    models = {'eager': reference.model}
+    if 'torchscript' in runtimes:
+        models['torchscript'] = torch.jit.load(paths['torchscript'], map_location='cpu').eval()
+    if 'onnx' in runtimes:
+        try:
+            models['onnx'] = OnnxAnomalyModel(paths['onnx'])
+        except ImportError:
+            print("[WARNING] onnxruntime이 없어 ONNX 검증을 건너뜁니다.")
+
+    inputs = AnomalyClipPredictor(reference, 'cpu').normalize_clips(clips)
+    report = {}
+    with torch.no_grad():
+        outputs = {}
+        for name, model in models.items():
+            model(inputs[:1]) # 워밍업
+            started = time.perf_counter()
+            outputs[name] = torch.cat([model(inputs[i:i + 1]) for i in range(len(clips))])
+            latency_ms = (time.perf_counter() - started) / len(clips) * 1000
+            report[name] = {'latency_ms': round(latency_ms, 2)}
+
+    for name, logits in outputs.items():
+        report[name]['max_abs_diff'] = float((logits - outputs['eager']).abs().max())
+        report[name]['top1_agreement'] = float((logits.argmax(1) == outputs['eager'].argmax(1)).float().mean())
+        print(f"{name:12s} latency {report[name]['latency_ms']:8.2f} ms/clip | "
+              f"max|diff| {report[name]['max_abs_diff']:.2e} | top-1 {report[name]['top1_agreement'] * 100:.1f}%")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimized3DCNN TorchScript/ONNX 내보내기 및 정확도 검증")
+    parser.add_argument('--checkpoint', default='./ai/efficient_50_best.pth')
+    parser.add_argument('--clips', help="검증용 비디오 폴더 (없으면 무작위 클립 사용)")
+    parser.add_argument('--num-clips', type=int, default=8)
+    parser.add_argument('--opset', type=int, default=17)
+    args = parser.parse_args()
+
+    export_artifacts(args.checkpoint, args.opset)
+
+    clips = load_sample_clips(args.clips, args.num_clips) if args.clips else []
+    if not clips:
+        print("[WARNING] 샘플 클립이 없어 무작위 클립으로 검증합니다.")
+        rng = np.random.default_rng(0)
+        clips = [rng.integers(0, 256, (CLIP_LEN, TARGET_SIZE, TARGET_SIZE, 3), dtype=np.uint8)
+                 for _ in range(args.num_clips)]
+    parity_check(args.checkpoint, clips)
+
+
+if __name__ == '__main__':
+    main()
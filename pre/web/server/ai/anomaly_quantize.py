@@ -0,0 +1,123 @@
+"""
+Optimized3DCNN INT8 양자화
+
+- static: BatchNorm을 접은 모델 전체(Conv3d 포함)를 FX 그래프 모드로 정적 양자화합니다.
+          클립 폴더로 활성값 범위를 보정(calibration)하며, x86 CPU용 fbgemm 엔진을 사용합니다.
+- dynamic: Linear 레이어만 동적 양자화합니다. (보정 불필요, Conv3d는 fp32 유지)
+
+결과는 TorchScript로 저장되며 load_anomaly_runtime(runtime='int8')으로 사용합니다.
+
+사용법 (server 디렉터리에서):
+    python -m ai.anomaly_quantize --checkpoint ./ai/efficient_50_best.pth --calibration ./uploads
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from ai.aiConAnomalyDetect import AnomalyClipPredictor, anomaly_artifact_paths, load_anomaly_model
+from ai.anomaly_export import CLIP_LEN, TARGET_SIZE, fold_batchnorm, load_sample_clips, write_labels
+
+QUANTIZED_ENGINE = 'fbgemm'
+
+
+def select_engine():
+    """x86에서 사용할 양자화 엔진을 설정합니다."""
+    if QUANTIZED_ENGINE not in torch.backends.quantized.supported_engines:
+        raise RuntimeError(f"{QUANTIZED_ENGINE} 양자화 엔진을 지원하지 않는 CPU/빌드입니다.")
+    torch.backends.quantized.engine = QUANTIZED_ENGINE
+
+
+def quantize_static(model, calibration_inputs):
+    """BatchNorm을 접은 모델을 보정 입력으로 정적 INT8 양자화합니다."""
+    select_engine()
+    folded = fold_batchnorm(model)
+    example = calibration_inputs[:1]
+    prepared = prepare_fx(folded, get_default_qconfig_mapping(QUANTIZED_ENGINE), (example,))
+    with torch.no_grad():
+        for i in range(len(calibration_inputs)):
+            prepared(calibration_inputs[i:i + 1])
+    return convert_fx(prepared)
+
+
+def quantize_linear_dynamic(model):
+    """Linear 레이어만 동적 INT8 양자화합니다."""
+    select_engine()
+    return quantize_dynamic(fold_batchnorm(model), {nn.Linear}, dtype=torch.qint8)
+
+
+def serialized_bytes(model):
+    buffer = io.BytesIO()
+    if isinstance(model, torch.jit.ScriptModule):
+        torch.jit.save(model, buffer)
+    else:
+        torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def compare(fp32_model, int8_model, inputs):
+    """fp32 대비 클립당 지연, 직렬화 크기, top-1 일치율을 출력하고 반환합니다."""
+    report = {}
+    outputs = {}
+    with torch.no_grad():
+        for name, model in (('fp32', fp32_model), ('int8', int8_model)):
+            model(inputs[:1]) # 워밍업
+            started = time.perf_counter()
+            outputs[name] = torch.cat([model(inputs[i:i + 1]) for i in range(len(inputs))])
+            report[name] = {
+                'latency_ms': round((time.perf_counter() - started) / len(inputs) * 1000, 2),
+                'size_mb': round(serialized_bytes(model) / 1024 ** 2, 2),
+            }
+    report['int8']['top1_agreement'] = float((outputs['int8'].argmax(1) == outputs['fp32'].argmax(1)).float().mean())
+    report['int8']['speedup'] = round(report['fp32']['latency_ms'] / max(report['int8']['latency_ms'], 1e-6), 2)
+
+    for name, row in report.items():
+        print(f"{name:5s} latency {row['latency_ms']:8.2f} ms/clip | size {row['size_mb']:7.2f} MB"
+              + (f" | top-1 agreement {row['top1_agreement'] * 100:.1f}% | x{row['speedup']}" if name == 'int8' else ''))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimized3DCNN INT8 양자화 및 fp32 비교 보고서")
+    parser.add_argument('--checkpoint', default='./ai/efficient_50_best.pth')
+    parser.add_argument('--calibration', help="보정용 비디오 폴더 (static 모드에 필요)")
+    parser.add_argument('--mode', choices=('static', 'dynamic'), default='static')
+    parser.add_argument('--num-clips', type=int, default=32)
+    parser.add_argument('--eval-fraction', type=float, default=0.25, help="보정에 쓰지 않고 비교에만 쓸 클립 비율")
+    args = parser.parse_args()
+
+    loaded = load_anomaly_model(args.checkpoint, 'cpu')
+    clips = load_sample_clips(args.calibration, args.num_clips) if args.calibration else []
+    if not clips:
+        if args.mode == 'static':
+            parser.error("static 모드에는 --calibration 폴더의 클립이 필요합니다.")
+        rng = np.random.default_rng(0)
+        clips = [rng.integers(0, 256, (CLIP_LEN, TARGET_SIZE, TARGET_SIZE, 3), dtype=np.uint8) for _ in range(8)]
+    inputs = AnomalyClipPredictor(loaded, 'cpu').normalize_clips(clips)
+
+    n_eval = max(1, int(len(inputs) * args.eval_fraction))
+    calibration, evaluation = (inputs[n_eval:], inputs[:n_eval]) if len(inputs) > n_eval else (inputs, inputs)
+
+    if args.mode == 'static':
+        quantized = quantize_static(loaded.model, calibration)
+    else:
+        quantized = quantize_linear_dynamic(loaded.model)
+
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(quantized, inputs[:1]))
+    path = anomaly_artifact_paths(args.checkpoint)['int8']
+    scripted.save(path)
+    write_labels(args.checkpoint, loaded)
+    print(f"[OK] INT8 ({args.mode}) 모델 저장: {path}")
+
+    compare(loaded.model, scripted, evaluation)
+
+
+if __name__ == '__main__':
+    main()
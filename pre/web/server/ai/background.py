@@ -0,0 +1,193 @@
+"""
+배경 차분 엔진
+
+AbandonedItemDetector가 사용하는 배경 모델입니다. 모든 엔진은 축소된(scale) 프레임에서 동작하고,
+배경은 update_every 프레임마다 learning_rate로 조금씩 갱신되므로 조명 변화 같은 느린 변화를
+따라가면서도 처음부터 다시 학습할 필요가 없습니다. 전경 마스크는 원본 해상도로 돌려줍니다.
+
+- RunningAverageBackground: 가중 이동 평균. 전경 픽셀은 갱신하지 않아 놓인 물건이 배경에 녹지 않습니다.
+                            비교용 uint8 배경은 갱신된 뒤 처음 비교할 때만 다시 만듭니다.
+- MOG2Background: OpenCV MOG2 (픽셀별 가우시안 혼합)
+- DualRateBackground: 느린 장기 배경과 빠른 단기 배경. 장기 배경과는 다르지만 단기 배경에는 이미
+                      흡수된 픽셀, 즉 "새로 생겨 멈춰 있는" 영역을 전경으로 돌려줍니다.
+"""
+
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+
+class BackgroundEngine(ABC):
+    """
+    Args:
+        scale (float): 배경 모델을 계산할 해상도 비율 (1.0이면 원본)
+        learning_rate (float): 학습 후 배경 갱신 비율
+        update_every (int): 배경을 갱신할 프레임 간격
+        threshold (int): 배경과 다르다고 볼 밝기 차이 (0~255)
+    """
+
+    def __init__(self, scale=0.5, learning_rate=0.001, update_every=1, threshold=40):
+        self.scale = scale
+        self.learning_rate = learning_rate
+        self.update_every = max(1, int(update_every))
+        self.threshold = threshold
+        self.frames = 0
+
+    def _small(self, frame):
+        if self.scale == 1.0:
+            return frame
+        h, w = frame.shape[:2]
+        return cv2.resize(frame, (max(1, int(w * self.scale)), max(1, int(h * self.scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def _full(self, mask, frame):
+        h, w = frame.shape[:2]
+        if mask.shape[:2] == (h, w):
+            return mask
+        return cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+
+    def _difference(self, small, background):
+        """축소 프레임과 uint8 배경의 차이를 이진 마스크로 만듭니다."""
+        diff = cv2.absdiff(small, background)
+        gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
+        blur = cv2.GaussianBlur(gray, (5, 5), 0)
+        _, mask = cv2.threshold(blur, self.threshold, 255, cv2.THRESH_BINARY)
+        return mask
+
+    @abstractmethod
+    def learn(self, frame, rate):
+        """학습 구간에서 배경을 rate로 갱신합니다."""
+
+    @abstractmethod
+    def apply(self, frame):
+        """전경 마스크(원본 해상도 uint8, 전경 255)를 반환하고 필요하면 배경을 갱신합니다."""
+
+    def reset(self):
+        self.frames = 0
+
+
+class RunningAverageBackground(BackgroundEngine):
+    """
+    Args:
+        update_foreground (bool): True이면 전경 픽셀도 배경과 같은 비율로 반영합니다. (놓인 물건이 점차 배경이 됩니다.)
+        foreground_rate (float): update_foreground=False일 때 전경 픽셀의 갱신 비율. None이면 learning_rate의 1/10.
+                                 0보다 크면 조명이 갑자기 바뀌어 전경이 된 픽셀도 결국 배경으로 돌아옵니다.
+    """
+
+    def __init__(self, update_foreground=False, foreground_rate=None, **options):
+        super().__init__(**options)
+        self.update_foreground = update_foreground
+        self.foreground_rate = self.learning_rate / 10 if foreground_rate is None else foreground_rate
+        self._average = None # float32 배경 (축소 해상도)
+        self._background = None # 비교용 uint8 배경 캐시 (None이면 평균이 바뀌어 다시 만들어야 함)
+
+    @property
+    def background(self):
+        """비교용 uint8 배경. 평균이 갱신된 뒤 처음 접근할 때만 변환합니다."""
+        if self._background is None:
+            self._background = cv2.convertScaleAbs(self._average)
+        return self._background
+
+    def _accumulate(self, small, rate, foreground=None):
+        if self._average is None:
+            self._average = small.astype(np.float32)
+        elif foreground is None:
+            cv2.accumulateWeighted(small, self._average, rate)
+        else:
+            cv2.accumulateWeighted(small, self._average, rate, mask=cv2.bitwise_not(foreground))
+            if self.foreground_rate > 0:
+                cv2.accumulateWeighted(small, self._average, self.foreground_rate, mask=foreground)
+        self._background = None
+
+    def learn(self, frame, rate):
+        self._accumulate(self._small(frame), rate)
+
+    def apply(self, frame):
+        small = self._small(frame)
+        if self._average is None:
+            self._accumulate(small, self.learning_rate)
+        mask = self._difference(small, self.background)
+        self.frames += 1
+        if self.learning_rate > 0 and self.frames % self.update_every == 0:
+            self._accumulate(small, self.learning_rate, None if self.update_foreground else mask)
+        return self._full(mask, frame)
+
+    def reset(self):
+        super().reset()
+        self._average = self._background = None
+
+
+class MOG2Background(BackgroundEngine):
+    """
+    Args:
+        history (int): MOG2 history
+        var_threshold (float): MOG2 varThreshold (낮을수록 민감)
+    """
+
+    def __init__(self, history=500, var_threshold=16, **options):
+        super().__init__(**options)
+        self.history = history
+        self.var_threshold = var_threshold
+        self._model = None
+
+    def _subtract(self, small, rate):
+        if self._model is None:
+            self._model = cv2.createBackgroundSubtractorMOG2(self.history, self.var_threshold, detectShadows=False)
+        return self._model.apply(small, learningRate=rate)
+
+    def learn(self, frame, rate):
+        self._subtract(self._small(frame), rate)
+
+    def apply(self, frame):
+        self.frames += 1
+        rate = self.learning_rate if self.frames % self.update_every == 0 else 0
+        mask = cv2.medianBlur(self._subtract(self._small(frame), rate), 5)
+        return self._full(mask, frame)
+
+    def reset(self):
+        super().reset()
+        self._model = None
+
+
+class DualRateBackground(BackgroundEngine):
+    """
+    Args:
+        short_rate (float): 단기 배경 갱신 비율 (멈춘 물체가 이 속도로 단기 배경에 흡수됩니다.)
+    """
+
+    def __init__(self, short_rate=0.05, **options):
+        super().__init__(**options)
+        # 축소는 여기서 한 번만 하므로 내부 배경은 축소 프레임을 그대로 받습니다.
+        inner = dict(options, scale=1.0)
+        self.long = RunningAverageBackground(**inner)
+        self.short = RunningAverageBackground(update_foreground=True, **dict(inner, learning_rate=short_rate))
+
+    def learn(self, frame, rate):
+        small = self._small(frame)
+        self.long._accumulate(small, rate)
+        self.short._accumulate(small, rate)
+
+    def apply(self, frame):
+        small = self._small(frame)
+        long_mask = self.long.apply(small)
+        short_mask = self.short.apply(small)
+        self.frames += 1
+        return self._full(cv2.bitwise_and(long_mask, cv2.bitwise_not(short_mask)), frame)
+
+    def reset(self):
+        super().reset()
+        self.long.reset()
+        self.short.reset()
+
+
+BACKGROUND_ENGINES = {
+    'running_average': RunningAverageBackground,
+    'mog2': MOG2Background,
+    'dual': DualRateBackground,
+}
+
+
+def make_background(kind='running_average', **options):
+    """이름으로 배경 엔진을 만듭니다. (BACKGROUND_ENGINES 참고)"""
+    return BACKGROUND_ENGINES[kind](**options)
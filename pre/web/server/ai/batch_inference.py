@@ -0,0 +1,164 @@
+"""
+세션 간 동적 마이크로 배칭 추론
+
+여러 스트림 스레드가 보낸 프레임을 최대 max_wait_ms 동안 모아 한 번의 배치 호출로
+추론하고, 결과를 Future로 각 호출자에게 돌려줍니다. 추론은 전용 OS 스레드에서
+실행되므로 eventlet 루프(웹소켓 emit)를 막지 않습니다.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Args:
+        batch_fn: batch_fn(items, **kwargs) -> items와 같은 순서의 결과 리스트
+        max_batch (int): 한 번에 처리할 최대 항목 수입니다.
+        max_wait_ms (float): 첫 항목이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간입니다.
+                             (꼬리 지연 상한)
+        sleep: 결과 대기 시 사용할 협조적 대기 함수. (예: socketio.sleep)
+               None이면 Future.result()로 블로킹 대기합니다.
+        name (str): 워커 스레드 이름 및 로그용 이름입니다.
+    """
+
+    def __init__(self, batch_fn, max_batch=8, max_wait_ms=10, sleep=None, name='batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._sleep = sleep
+        self._queue = queue.Queue()
+        self._stats = {'batches': 0, 'items': 0, 'total_wait_sec': 0.0, 'total_infer_sec': 0.0}
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item, **kwargs):
+        """항목을 큐에 넣고 결과 Future를 반환합니다."""
+        future = Future()
+        self._queue.put((item, kwargs, future, time.monotonic()))
+        return future
+
+    def __call__(self, item, **kwargs):
+        """항목을 제출하고 결과가 나올 때까지 대기합니다."""
+        return self.wait(self.submit(item, **kwargs))
+
+    def wait(self, future):
+        """submit()이 반환한 Future의 결과를 기다립니다."""
+        if self._sleep is None:
+            return future.result()
+        while not future.done():
+            self._sleep(0.001)
+        return future.result()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[3] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _group_key(kwargs):
+        """추론 옵션의 그룹 키. 리스트 같은 해시할 수 없는 값(예: classes=[0])은 repr로 비교합니다."""
+        return repr(sorted(kwargs.items()))
+
+    def _fail(self, entries, error):
+        for entry in entries:
+            if not entry[2].done():
+                entry[2].set_exception(error)
+
+    def _run(self):
+        # 워커 스레드가 끝나면 모든 호출자가 영원히 기다리므로 어떤 예외도 루프 밖으로 내보내지 않습니다.
+        while True:
+            batch = self._collect()
+            try:
+                # 추론 옵션(conf 등)이 같은 항목끼리만 한 번에 호출합니다.
+                groups = {}
+                for entry in batch:
+                    groups.setdefault(self._group_key(entry[1]), []).append(entry)
+            except Exception as e:
+                print(f"[{self.name}] batch grouping error: {e}")
+                self._fail(batch, e)
+                continue
+
+            for entries in groups.values():
+                started = time.monotonic()
+                try:
+                    results = self.batch_fn([e[0] for e in entries], **entries[0][1])
+                    if len(results) != len(entries):
+                        raise RuntimeError(f"batch_fn returned {len(results)} results for {len(entries)} items")
+                    for entry, result in zip(entries, results):
+                        entry[2].set_result(result)
+                except Exception as e:
+                    print(f"[{self.name}] batch inference error: {e}")
+                    self._fail(entries, e)
+                finished = time.monotonic()
+                self._stats['batches'] += 1
+                self._stats['items'] += len(entries)
+                self._stats['total_wait_sec'] += sum(started - e[3] for e in entries)
+                self._stats['total_infer_sec'] += finished - started
+
+    def stats(self):
+        """누적 배치 수, 평균 배치 크기, 평균 대기/추론 시간(ms)을 반환합니다."""
+        batches = self._stats['batches']
+        items = self._stats['items']
+        return {
+            'batches': batches,
+            'items': items,
+            'avg_batch_size': round(items / batches, 2) if batches else 0.0,
+            'avg_queue_wait_ms': round(self._stats['total_wait_sec'] / items * 1000, 2) if items else 0.0,
+            'avg_batch_infer_ms': round(self._stats['total_infer_sec'] / batches * 1000, 2) if batches else 0.0,
+            'pending': self._queue.qsize(),
+        }
+
+
+class BatchedYOLO:
+    """
+    Ultralytics YOLO 모델을 MicroBatcher로 감싼 프록시
+
+    단일 프레임 호출 model(frame, **kwargs)와 results[0] 접근, model.names를 그대로
+    지원하므로 기존 감지기 코드를 바꾸지 않고 그대로 넘겨줄 수 있습니다.
+    프레임 리스트를 넘기면 (예: 타일) 모두 같은 배치에 제출하고 프레임별 결과 리스트를 반환합니다.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait_ms=10, sleep=None):
+        self.model = model
+        self.names = model.names
+        self.batcher = MicroBatcher(self._predict_batch, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                                    sleep=sleep, name=f"yolo-batcher-{id(model):x}")
+
+    def _predict_batch(self, frames, **kwargs):
+        return self.model(frames, **kwargs)
+
+    def __call__(self, source, **kwargs):
+        if isinstance(source, list):
+            futures = [self.batcher.submit(frame, **kwargs) for frame in source]
+            return [self.batcher.wait(future) for future in futures]
+        return [self.batcher(source, **kwargs)]
+
+
+class BatchedClipPredictor:
+    """
+    AnomalyClipPredictor를 MicroBatcher로 감싼 프록시
+
+    여러 스트림이 제출한 클립을 max_wait_ms 안에서 모아 한 번의 3D-CNN forward로 추론합니다.
+    넘겨준 클립(예: ClipBuffer 뷰)은 결과를 받을 때까지 수정하면 안 됩니다.
+    """
+
+    def __init__(self, predictor, max_batch=4, max_wait_ms=30, sleep=None):
+        self.predictor = predictor
+        self.batcher = MicroBatcher(predictor.predict_batch, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                                    sleep=sleep, name=f"clip-batcher-{id(predictor):x}")
+
+    def __call__(self, clip):
+        return self.batcher(clip)
@@ -0,0 +1,62 @@
+"""
+슬라이딩 윈도우 클립 버퍼
+
+축소된 프레임만 (T, H, W, C) uint8로 저장합니다. 각 프레임을 링의 두 위치(i, i + window)에
+함께 써 두므로 최근 window개 프레임은 항상 연속된 슬라이스이며, 겹치는 클립을 복사 없이
+뷰로 꺼낼 수 있습니다.
+"""
+
+import numpy as np
+
+
+class ClipBuffer:
+    """
+    Args:
+        window (int): 클립 길이 (프레임 수)
+        stride (int): 추론 간격 (프레임 수). window보다 작으면 클립이 겹칩니다.
+        frame_shape (tuple): 저장할 (축소된) 프레임 shape
+        dtype: 저장 dtype. 정규화는 추론 시 한 번에 수행하므로 기본값은 uint8입니다.
+    """
+
+    def __init__(self, window=16, stride=8, frame_shape=(224, 224, 3), dtype=np.uint8):
+        if window <= 0 or stride <= 0:
+            raise ValueError("window와 stride는 1 이상이어야 합니다.")
+        self.window = window
+        self.stride = stride
+        self._frames = np.empty((2 * window,) + tuple(frame_shape), dtype=dtype)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.window)
+
+    @property
+    def nbytes(self):
+        return self._frames.nbytes
+
+    def append(self, fill):
+        """
+        fill(out)으로 다음 슬롯에 프레임을 씁니다. (예: cv2.resize(frame, size, dst=out))
+        배열을 직접 넘기면 그대로 복사합니다.
+        """
+        slot = self.count % self.window
+        out = self._frames[slot]
+        if callable(fill):
+            fill(out)
+        else:
+            out[...] = fill
+        self._frames[slot + self.window] = out
+        self.count += 1
+
+    def ready(self):
+        """window가 가득 찼고 이번 프레임이 stride 간격에 해당하면 True"""
+        return self.count >= self.window and self.count % self.stride == 0
+
+    def clip(self):
+        """최근 window개 프레임을 오래된 순서로 담은 (T, H, W, C) 뷰. (복사 없음, 다음 append 전까지 유효)"""
+        if self.count < self.window:
+            raise ValueError("클립을 만들기에 프레임이 부족합니다.")
+        start = self.count % self.window
+        return self._frames[start:start + self.window]
+
+    def clear(self):
+        self.count = 0
@@ -7,8 +7,18 @@ import time
 from PIL import ImageFont, ImageDraw, Image
 import os
 
+from ai.overlay import Overlay, add_pose, apply_overlay
+
 class FireDetector:
-    def __init__(self, yolo_model_path=None):
+    draw = True # False이면 프레임에 그리지 않고 결과의 'overlay'로 그리기 명령을 돌려줍니다.
+    motion_gated = True # 파이프라인의 움직임 게이트가 정적인 프레임에서 직전 결과를 재사용해도 됩니다.
+
+    @property
+    def modifies_input(self):
+        # 입력 프레임에 직접 그릴 때만 파이프라인이 복사본을 넘깁니다.
+        return self.draw
+
+    def __init__(self, yolo_model_path=None, yolo_model=None):
         # MediaPipe 초기화
         self.mp_pose = mp.solutions.pose
         self.mp_hand = mp.solutions.hands
@@ -31,7 +41,11 @@ class FireDetector:
         # YOLO
         self.YOLO_AVAILABLE = False
         self.yolo_model = None
-        if yolo_model_path:
+        if yolo_model is not None:
+            # 미리 로드된(공유) YOLO 모델 사용
+            self.yolo_model = yolo_model
+            self.YOLO_AVAILABLE = True
+        elif yolo_model_path:
             try:
                 from ultralytics import YOLO
                 self.yolo_model = YOLO(yolo_model_path)
@@ -374,8 +388,8 @@ class FireDetector:
         
         self.confirmed_fires = [f for f in self.confirmed_fires if f.get('lost_frames', 0) < 60]
 
-    def draw_fire(self, frame, fire):
-        """화재 표시"""
+    def draw_fire(self, overlay, fire):
+        """화재 표시 명령을 overlay에 추가합니다."""
         cx, cy = fire['center']
         fire_id = fire['id']
         dtype = fire['detection_type']
@@ -403,35 +417,35 @@ class FireDetector:
             
             x1 = max(0, x1 - expand_x)
             y1 = max(0, y1 - expand_y)
-            x2 = min(frame.shape[1], x2 + expand_x)
-            y2 = min(frame.shape[0], y2 + expand_y)
+            x2 = min(overlay.width, x2 + expand_x)
+            y2 = min(overlay.height, y2 + expand_y)
             
-            cv.rectangle(frame, (x1, y1), (x2, y2), color, 2)  # 선 두께도 3에서 2로 조정
+            overlay.box(x1, y1, x2, y2, color, 2, conf=fire.get('yolo_conf'))  # 선 두께도 3에서 2로 조정
         else:
             # 일반 박스
             box_size = 30  # 35에서 30으로 조정
-            cv.rectangle(frame, (cx-box_size, cy-box_size), 
-                        (cx+box_size, cy+box_size), color, 2)
+            overlay.box(cx-box_size, cy-box_size, cx+box_size, cy+box_size, color, 2)
         
         # 중심점
-        cv.circle(frame, (cx, cy), 5, color, -1)
-        cv.circle(frame, (cx, cy), 7, (255, 255, 255), 1)
+        overlay.circle(cx, cy, 5, color, -1)
+        overlay.circle(cx, cy, 7, (255, 255, 255), 1)
         
         # 라벨
         label_text = f"#{fire_id} {label} C:{conf}"
-        cv.putText(frame, label_text, (cx-30, cy-40),
-                  cv.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        overlay.text(label_text, cx-30, cy-40, color, scale=0.6)
         
         # Alert 모드에서 깜빡임 효과
         if self.alert_mode and (self.frame_count % 10 < 5):
             if 'yolo_bbox' in fire:
-                cv.rectangle(frame, (x1-3, y1-3), (x2+3, y2+3), (0, 0, 255), 1)
+                overlay.rect(x1-3, y1-3, x2+3, y2+3, (0, 0, 255), 1)
             else:
-                cv.rectangle(frame, (cx-35, cy-35), (cx+35, cy+35), (0, 0, 255), 1)
+                overlay.rect(cx-35, cy-35, cx+35, cy+35, (0, 0, 255), 1)
 
     def process_frame(self, frame):
         self.frame_count += 1
         detection_results = {'is_fire': False, 'fire_count': 0, 'status_message': 'No fire detected'}
+        # 그리기 명령은 모아 두었다가 마지막에 그리므로 색상 감지는 주석이 없는 프레임에서 수행됩니다.
+        overlay = Overlay(frame.shape[1], frame.shape[0])
 
         frame_rgb = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
         pose_res = self.pose.process(frame_rgb)
@@ -440,7 +454,8 @@ class FireDetector:
         hand_positions = {}
 
         if pose_res.pose_landmarks:
-            self.mp_drawing.draw_landmarks(frame, pose_res.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+            add_pose(overlay, pose_res.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
+                     point_color=(0, 0, 255), line_color=(224, 224, 224))
             landmarks = pose_res.pose_landmarks.landmark
             
             left_arm = self.calculate_arm_length(
@@ -469,8 +484,8 @@ class FireDetector:
                 )
                 hand_positions['left'] = (tips, center)
                 for tip in tips:
-                    cv.circle(frame, tip, 4, (0, 255, 0), -1)
-                cv.circle(frame, center, 8, (0, 255, 0), 2)
+                    overlay.circle(tip[0], tip[1], 4, (0, 255, 0), -1)
+                overlay.circle(center[0], center[1], 8, (0, 255, 0), 2)
             
             if landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].visibility > 0.5:
                 tips, center = self.get_hand_landmarks(
@@ -480,8 +495,8 @@ class FireDetector:
                 )
                 hand_positions['right'] = (tips, center)
                 for tip in tips:
-                    cv.circle(frame, tip, 4, (0, 255, 0), -1)
-                cv.circle(frame, center, 8, (0, 255, 0), 2)
+                    overlay.circle(tip[0], tip[1], 4, (0, 255, 0), -1)
+                overlay.circle(center[0], center[1], 8, (0, 255, 0), 2)
         
         color_candidates = []
         fire_mask = self.detect_fire_color(frame)
@@ -505,7 +520,7 @@ class FireDetector:
         self.update_fires(merged_detections, hand_positions, arm_lengths, frame.shape)
         
         for fire in self.confirmed_fires:
-            self.draw_fire(frame, fire)
+            self.draw_fire(overlay, fire)
         
         active_fires = [f for f in self.confirmed_fires if f.get('lost_frames', 0) == 0]
         detection_results['fire_count'] = len(active_fires)
@@ -524,16 +539,15 @@ class FireDetector:
             types[f['detection_type']] = types.get(f['detection_type'], 0) + 1
         
         if self.alert_mode:
-            cv.rectangle(frame, (5, 5), (frame.shape[1]-5, 40), (0, 0, 255), 2)
+            overlay.rect(5, 5, frame.shape[1]-5, 40, (0, 0, 255), 2)
             status_color = (0, 0, 255) if (self.frame_count % 10 < 5) else (255, 255, 255)
         else:
             status_color = (255, 255, 255)
         
         status_text = f"{status} | Active: {active} (C:{types['COLOR']} Y:{types['YOLO']} H:{types['HYBRID']})"
-        cv.putText(frame, status_text, (10, 25),
-                  cv.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+        overlay.text(status_text, 10, 25, status_color, scale=0.6)
 
-        return frame, detection_results
+        return apply_overlay(frame, overlay, detection_results, self.draw), detection_results
 
 # if __name__ == "__main__":
 #     # Example usage (for testing the class)
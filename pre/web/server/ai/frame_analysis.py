@@ -0,0 +1,174 @@
+"""
+프레임 단위 공유 분석 (YOLO 탐지, grayscale, 광학 흐름)
+
+여러 감지기가 같은 스트림을 처리할 때 공통 중간 결과를 프레임마다 한 번만 계산합니다.
+- detections(): 같은 YOLO 모델의 탐지 결과를 모든 감지기가 공유합니다.
+- gray(), flow(), flow_magnitude(): 같은 너비의 grayscale/Farneback 흐름을 공유합니다.
+- flow_magnitude_roi(): 지정한 영역(예: 사람 주변)에서만 흐름을 계산합니다.
+
+StreamAnalysis는 스트림당 하나이며 프레임 간 상태(이전 gray)를 보관합니다.
+FrameAnalysis는 프레임마다 만들어지는 메모이제이션 캐시입니다.
+"""
+
+import cv2
+import numpy as np
+
+# 공유 YOLO 패스의 신뢰도 하한. 감지기들은 결과를 각자의 임계값으로 다시 거릅니다.
+SHARED_DETECTION_CONF = 0.1
+
+# cv2.calcOpticalFlowFarneback(pyr_scale, levels, winsize, iterations, poly_n, poly_sigma, flags)
+FARNEBACK_PARAMS = (0.5, 3, 15, 3, 5, 1.2, 0)
+
+
+def resize_to_width(frame, width):
+    """프레임을 주어진 너비로 (비율 유지) 축소합니다. width가 None이거나 같으면 그대로 반환합니다."""
+    h, w = frame.shape[:2]
+    if width is None or width == w:
+        return frame
+    return cv2.resize(frame, (width, int(width * h / w)))
+
+
+class StreamAnalysis:
+    """
+    스트림 하나의 공유 분석 상태
+
+    Args:
+        detection_width (int): 공유 YOLO 패스를 실행할 프레임 너비입니다. 지정하면 모든 감지기가
+                               이 너비의 한 번의 패스를 공유하고, 결과는 각 감지기의 좌표계로 변환됩니다.
+                               None이면 요청한 감지기의 너비에서 실행합니다. (감지기 단독 실행과 동일)
+    """
+
+    def __init__(self, detection_width=None):
+        self.detection_width = detection_width
+        self._prev_gray = {} # 너비 -> 이전 프레임 gray
+        self._flow_widths = set()
+
+    def frame(self, frame):
+        """새 프레임의 분석 캐시를 만듭니다. 처리가 끝나면 commit()을 호출해야 합니다."""
+        return FrameAnalysis(self, frame)
+
+    def reset(self):
+        """이전 프레임 상태를 지웁니다. (예: 파일 소스가 처음부터 다시 재생될 때)"""
+        self._prev_gray.clear()
+
+
+class FrameAnalysis:
+    """프레임 하나에 대한 공유 중간 결과 캐시"""
+
+    def __init__(self, stream, frame):
+        self.stream = stream
+        self.frame = frame
+        self._resized = {}
+        self._gray = {}
+        self._flow = {}
+        self._magnitude = {}
+        self._detections = {}
+
+    def resized(self, width=None):
+        if width not in self._resized:
+            self._resized[width] = resize_to_width(self.frame, width)
+        return self._resized[width]
+
+    def gray(self, width=None):
+        if width not in self._gray:
+            self._gray[width] = cv2.cvtColor(self.resized(width), cv2.COLOR_BGR2GRAY)
+        return self._gray[width]
+
+    def flow(self, width=None):
+        """
+        이전 프레임 대비 Farneback 광학 흐름을 반환합니다. 이전 프레임이 없으면 None입니다.
+        """
+        self.stream._flow_widths.add(width)
+        if width not in self._flow:
+            prev_gray = self.stream._prev_gray.get(width)
+            if prev_gray is None:
+                self._flow[width] = None
+            else:
+                self._flow[width] = cv2.calcOpticalFlowFarneback(prev_gray, self.gray(width), None, *FARNEBACK_PARAMS)
+        return self._flow[width]
+
+    def has_previous(self, width=None):
+        """이 너비의 이전 프레임 gray가 있는지 반환합니다. (이후 프레임을 위해 너비를 등록합니다.)"""
+        self.stream._flow_widths.add(width)
+        return width in self.stream._prev_gray
+
+    def flow_magnitude(self, width=None, scale=1.0):
+        """
+        width 좌표계의 흐름 크기(픽셀/프레임)를 반환합니다. 이전 프레임이 없으면 None입니다.
+
+        scale < 1이면 축소된 피라미드 단계(width * scale)에서 흐름을 계산한 뒤 크기를 width로
+        확대하고 변위도 같은 비율로 보정합니다. 임계값과 픽셀 수는 width 기준으로 유지됩니다.
+        """
+        key = (width, scale)
+        if key not in self._magnitude:
+            target = self.gray(width)
+            flow_width = target.shape[1] if scale == 1.0 else max(1, int(round(target.shape[1] * scale)))
+            flow = self.flow(width if scale == 1.0 else flow_width)
+            if flow is None:
+                self._magnitude[key] = None
+            else:
+                mag, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+                if flow_width != target.shape[1]:
+                    mag = cv2.resize(mag, (target.shape[1], target.shape[0]), interpolation=cv2.INTER_LINEAR)
+                    mag *= target.shape[1] / flow_width
+                self._magnitude[key] = mag
+        return self._magnitude[key]
+
+    def flow_magnitude_roi(self, width, rois):
+        """
+        rois [(x1, y1, x2, y2), ...] 안에서만 흐름을 계산한 크기 배열을 반환합니다. (영역 밖은 0)
+        rois가 비어 있으면 흐름을 계산하지 않습니다. 이전 프레임이 없으면 None입니다.
+        영역이 겹치면 겹친 픽셀에는 더 큰 크기를 남깁니다. (겹치지 않게 합쳐서 넘기면 중복 계산이 없습니다.)
+        """
+        self.stream._flow_widths.add(width)
+        key = (width, tuple(rois))
+        if key not in self._magnitude:
+            prev_gray = self.stream._prev_gray.get(width)
+            if prev_gray is None:
+                self._magnitude[key] = None
+            else:
+                gray = self.gray(width)
+                mag = np.zeros(gray.shape, dtype=np.float32)
+                for x1, y1, x2, y2 in rois:
+                    flow = cv2.calcOpticalFlowFarneback(prev_gray[y1:y2, x1:x2], gray[y1:y2, x1:x2], None, *FARNEBACK_PARAMS)
+                    roi_mag, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+                    np.maximum(mag[y1:y2, x1:x2], roi_mag, out=mag[y1:y2, x1:x2])
+                self._magnitude[key] = mag
+        return self._magnitude[key]
+
+    def detections(self, model, conf=0.25, width=None, imgsz=None):
+        """
+        YOLO 탐지 결과를 (N, 6) 배열 [x1, y1, x2, y2, score, cls]로 반환합니다.
+
+        Args:
+            model: YOLO 모델 (또는 BatchedYOLO 프록시). 같은 모델 객체끼리 결과를 공유합니다.
+            conf (float): 이 감지기의 신뢰도 임계값
+            width (int): 결과 좌표계의 프레임 너비 (None이면 원본 프레임)
+            imgsz (int): YOLO 입력 크기 (None이면 모델 기본값). 같은 크기를 요청한 감지기끼리만 패스를 공유합니다.
+        """
+        pass_width = self.stream.detection_width or width
+        key = (id(model), pass_width, imgsz)
+        if key not in self._detections:
+            options = {'imgsz': imgsz} if imgsz is not None else {}
+            results = model(self.resized(pass_width), conf=SHARED_DETECTION_CONF, verbose=False, **options)
+            self._detections[key] = results[0].boxes.data.cpu().numpy()
+        detections = self._detections[key]
+        detections = detections[detections[:, 4] >= conf]
+
+        source_w = self.resized(pass_width).shape[1]
+        target_w = self.resized(width).shape[1]
+        if source_w != target_w:
+            detections = detections.copy()
+            detections[:, :4] *= target_w / source_w
+        return detections
+
+    def commit(self):
+        """흐름을 사용하는 너비의 현재 gray를 다음 프레임의 이전 gray로 저장합니다."""
+        for width in self.stream._flow_widths:
+            self.stream._prev_gray[width] = self.gray(width)
+
+
+def person_boxes(detections, min_conf=0.5):
+    """탐지 결과 중 사람(COCO 클래스 0)의 경계 상자만 정수 배열로 반환합니다."""
+    persons = detections[(detections[:, 5] == 0) & (detections[:, 4] >= min_conf)]
+    return persons[:, :4].astype(np.int32)
@@ -0,0 +1,127 @@
+"""
+프로세스 전역 모델 레지스트리
+
+가중치 파일마다 모델을 한 번만 (처음 요청될 때) 로드하고, 모든 감지기가
+같은 읽기 전용 핸들을 공유합니다. 연결마다 YOLO/torch 가중치를 다시 읽지 않습니다.
+"""
+
+import os
+import threading
+import time
+
+import psutil
+
+
+def _module_bytes(obj):
+    """nn.Module(또는 .model 속성에 nn.Module을 가진 객체)의 파라미터+버퍼 크기(바이트)"""
+    module = obj if hasattr(obj, 'parameters') else getattr(obj, 'model', None)
+    if module is None or not hasattr(module, 'parameters'):
+        return None
+    total = sum(p.numel() * p.element_size() for p in module.parameters())
+    total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total
+
+
+class ModelRegistry:
+    """
+    (종류, 가중치 경로, 옵션) 키로 로드된 모델을 캐시합니다. 옵션이 다르면 별도의 인스턴스가 만들어집니다.
+
+    로드는 키별 락으로 보호되므로 여러 세션이 동시에 연결해도 같은 가중치를
+    두 번 읽지 않으며, 서로 다른 모델의 로드는 서로를 막지 않습니다.
+    공유 핸들은 읽기 전용으로 사용해야 합니다. (추론만 수행, 파라미터 수정 금지)
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._info = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, loader, track_memory=True):
+        """
+        키에 해당하는 모델을 반환합니다. 없으면 loader()로 로드 후 캐시합니다.
+        track_memory=False는 다른 모델을 감싸는 프록시처럼 메모리 보고에서 제외할 항목에 사용합니다.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            process = psutil.Process(os.getpid())
+            rss_before = process.memory_info().rss
+            started = time.time()
+            model = loader()
+            self._models[key] = model
+            if track_memory:
+                self._info[key] = {
+                    'load_time_sec': round(time.time() - started, 3),
+                    'param_bytes': _module_bytes(model),
+                    'rss_delta_bytes': process.memory_info().rss - rss_before,
+                }
+                print(f"[MODEL] Loaded {key[0]} from {key[1]} in {self._info[key]['load_time_sec']}s")
+            return model
+
+    def yolo(self, weights_path):
+        """Ultralytics YOLO 모델을 반환합니다."""
+        def load():
+            from ultralytics import YOLO
+            return YOLO(weights_path)
+        return self.get(('yolo', os.path.abspath(weights_path)), load)
+
+    def batched_yolo(self, weights_path, max_batch=8, max_wait_ms=10, sleep=None):
+        """
+        모든 스트림이 공유하는 마이크로 배칭 YOLO 프록시를 반환합니다.
+        같은 가중치에 대해서는 하나의 배치 워커만 생성됩니다.
+        """
+        def load():
+            from ai.batch_inference import BatchedYOLO
+            return BatchedYOLO(self.yolo(weights_path), max_batch=max_batch, max_wait_ms=max_wait_ms, sleep=sleep)
+        return self.get(('batched_yolo', os.path.abspath(weights_path), max_batch, max_wait_ms), load, track_memory=False)
+
+    def anomaly_model(self, model_path, device='cpu', runtime='auto', num_threads=None):
+        """
+        이상행동 3D-CNN (Optimized3DCNN)과 라벨 정보를 반환합니다.
+        runtime='auto'이면 내보낸 ONNX/TorchScript 아티팩트가 있을 때 그것을 사용합니다.
+        """
+        def load():
+            from ai.aiConAnomalyDetect import load_anomaly_runtime
+            return load_anomaly_runtime(model_path, device, runtime, num_threads)
+        return self.get(('anomaly', os.path.abspath(model_path), device, runtime, num_threads), load)
+
+    def batched_anomaly_model(self, model_path, device='cpu', max_batch=4, max_wait_ms=30, sleep=None,
+                              runtime='auto', num_threads=None):
+        """
+        모든 스트림이 공유하는 3D-CNN 클립 배치 추론 프록시를 반환합니다.
+        AbnormalBehaviorDetector(batcher=...)로 넘겨줍니다.
+        """
+        def load():
+            from ai.aiConAnomalyDetect import AnomalyClipPredictor
+            from ai.batch_inference import BatchedClipPredictor
+            predictor = AnomalyClipPredictor(self.anomaly_model(model_path, device, runtime, num_threads), device)
+            return BatchedClipPredictor(predictor, max_batch=max_batch, max_wait_ms=max_wait_ms, sleep=sleep)
+        key = ('batched_anomaly', os.path.abspath(model_path), device, runtime, num_threads, max_batch, max_wait_ms)
+        return self.get(key, load, track_memory=False)
+
+    @staticmethod
+    def _label(key):
+        kind, path, *extra = key
+        return f"{kind}:{os.path.basename(path)}" + (f"[{'/'.join(map(str, extra))}]" if extra else '')
+
+    def batching_report(self):
+        """배칭 프록시별 배치 크기 및 대기/추론 시간 통계를 반환합니다."""
+        return {
+            self._label(key): model.batcher.stats()
+            for key, model in list(self._models.items())
+            if hasattr(model, 'batcher')
+        }
+
+    def memory_report(self):
+        """로드된 모델별 메모리 사용량과 로드 시간을 반환합니다."""
+        return {self._label(key): dict(info) for key, info in self._info.items()}
@@ -0,0 +1,206 @@
+"""
+광학 흐름 기반 행동 감지 공통 구현
+
+DamageDetector, ViolenceDetector, WeakDetector는 같은 방식으로 동작합니다.
+사람 영역(YOLO) 안에서 흐름 크기가 임계값을 넘는 픽셀 수를 세고, 그 수가 연속 프레임 동안
+기준을 넘으면 경보합니다. 흐름과 YOLO 패스는 FrameAnalysis를 통해 스트림당 한 번만
+계산되므로 세 감지기를 같은 스트림에 붙여도 Farneback 계산은 한 번입니다.
+
+flow_roi=True이면 사람 주변 영역에서만 흐름을 계산하고, 사람이 없는 프레임은 흐름 계산을
+건너뜁니다. 흐름 크기는 어차피 사람 마스크 밖에서 0이 되므로 danger_pixels의 의미는 같습니다.
+"""
+
+import cv2 as cv
+import numpy as np
+from ultralytics import YOLO
+from PIL import ImageFont
+
+from ai.frame_analysis import StreamAnalysis, person_boxes
+from ai.overlay import Overlay, apply_overlay
+from ai.text_sprites import text_sprites
+
+# ROI 흐름 계산 시 Farneback 창/피라미드가 경계 밖 문맥을 볼 수 있도록 더하는 여백(px)
+ROI_PADDING = 16
+
+
+def merge_overlapping(rois):
+    """겹치는 사각형을 두 사각형을 모두 덮는 사각형으로 합쳐, 서로 겹치지 않는 사각형 목록을 반환합니다."""
+    rois = list(rois)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rois)):
+            for j in range(i + 1, len(rois)):
+                a, b = rois[i], rois[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rois[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del rois[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return rois
+
+
+def mask_rois(mask, padding=ROI_PADDING):
+    """
+    마스크의 연결 영역마다 여백을 더한 경계 사각형 [(x1, y1, x2, y2), ...]을 반환합니다.
+    여백 때문에 겹치는 사각형은 합치므로 같은 픽셀의 흐름을 두 번 계산하지 않습니다.
+    """
+    h, w = mask.shape[:2]
+    contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    rois = []
+    for contour in contours:
+        x, y, bw, bh = cv.boundingRect(contour)
+        rois.append((max(0, x - padding), max(0, y - padding), min(w, x + bw + padding), min(h, y + bh + padding)))
+    return sorted(merge_overlapping(rois))
+
+
+class FlowBehaviorDetector:
+    """
+    흐름 기반 행동 감지기의 기반 클래스. 하위 클래스는 result_key와 labels만 정의합니다.
+
+    Args:
+        flow_scale (float): 흐름을 계산할 해상도 비율입니다. 0.5이면 resize_width의 절반 너비에서
+                            계산합니다. 임계값과 danger_pixels는 resize_width 기준으로 유지됩니다.
+        flow_roi (bool): True이면 사람 주변 영역에서만 (resize_width 해상도로) 흐름을 계산합니다.
+                         이때 flow_scale은 사용하지 않습니다.
+    """
+    accepts_analysis = True # 파이프라인의 공유 FrameAnalysis(YOLO/흐름)를 받을 수 있습니다.
+    draw = True # False이면 프레임에 그리지 않고 결과의 'overlay'로 그리기 명령을 돌려줍니다.
+    motion_gated = True # 파이프라인의 움직임 게이트가 정적인 프레임에서 직전 결과를 재사용해도 됩니다.
+
+    result_key = 'is_danger'
+    labels = ('Ratio', 'Pixels', 'Frames')
+
+    def __init__(self, yolo_model_path=None, resize_width=720, min_person_conf=0.5, box_margin=20, flow_threshold=3.0, danger_pixels_min=100, consec_frames=3, yolo_model=None, flow_scale=1.0, flow_roi=False):
+        # yolo_model: 미리 로드된(공유) YOLO 모델. 없으면 yolo_model_path에서 로드합니다.
+        self.model = yolo_model if yolo_model is not None else YOLO(yolo_model_path)
+        self.resize_width = resize_width
+        self.new_h = None
+        self.min_person_conf = min_person_conf
+        self.box_margin = box_margin
+        self.flow_threshold = flow_threshold
+        self.danger_pixels_min = danger_pixels_min
+        self.consec_frames = consec_frames
+        self.flow_scale = flow_scale
+        self.flow_roi = flow_roi
+
+        self.analysis = StreamAnalysis() # 공유 분석 없이 단독 실행할 때 사용합니다.
+        self.danger_accum = 0
+        self.alert_frames = 0
+        self.total_frames = 0
+        self.flow_skipped_frames = 0 # ROI 모드에서 사람이 없어 흐름 계산을 건너뛴 프레임 수
+
+        try:
+            self.font_pil = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", 26)
+        except IOError:
+            self.font_pil = ImageFont.load_default()
+            print("Arial 폰트를 찾을 수 없어 기본 폰트 사용")
+
+    def _initialize_dimensions(self, frame):
+        h0, w0 = frame.shape[:2]
+        self.new_w = self.resize_width
+        self.new_h = int(self.new_w * h0 / w0)
+
+    def person_mask(self, analysis):
+        """여백을 더한 사람 경계 상자 영역을 255로 채운 마스크"""
+        detections = analysis.detections(self.model, width=self.new_w)
+        person_mask = np.zeros((self.new_h, self.new_w), dtype=np.uint8)
+        for x1, y1, x2, y2 in person_boxes(detections, self.min_person_conf):
+            x1 = max(0, x1 - self.box_margin)
+            y1 = max(0, y1 - self.box_margin)
+            x2 = min(self.new_w, x2 + self.box_margin)
+            y2 = min(self.new_h, y2 + self.box_margin)
+            person_mask[y1:y2, x1:x2] = 255
+        return person_mask
+
+    def process_frame(self, frame, analysis=None):
+        own_analysis = analysis is None
+        if own_analysis:
+            analysis = self.analysis.frame(frame)
+
+        if self.new_h is None:
+            self._initialize_dimensions(frame)
+
+        frame_resized = analysis.resized(self.new_w)
+        if self.draw:
+            frame_resized = frame_resized.copy()
+        if self.flow_roi:
+            ready = analysis.has_previous(self.new_w)
+        else:
+            mag = analysis.flow_magnitude(self.new_w, self.flow_scale)
+            ready = mag is not None
+
+        if not ready:
+            if own_analysis:
+                analysis.commit()
+            return frame_resized, {self.result_key: False, 'status_message': 'Initializing...'}
+
+        self.total_frames += 1
+
+        person_mask = self.person_mask(analysis)
+        if self.flow_roi:
+            rois = mask_rois(person_mask)
+            if not rois:
+                self.flow_skipped_frames += 1
+            mag = analysis.flow_magnitude_roi(self.new_w, rois)
+
+        mag_masked = mag * (person_mask / 255.0)
+        danger_area = mag_masked > self.flow_threshold
+        danger_pixels = np.sum(danger_area)
+
+        # Accumulate
+        if danger_pixels > self.danger_pixels_min:
+            self.danger_accum += 1
+        else:
+            self.danger_accum = max(0, self.danger_accum - 1)
+
+        is_alert = self.danger_accum >= self.consec_frames
+
+        overlay = Overlay(self.new_w, self.new_h)
+        if is_alert:
+            overlay.mask(danger_area, (0, 0, 255), alpha=0.5)  # Red highlight
+            self.alert_frames += 1
+
+        danger_ratio = (self.alert_frames / self.total_frames * 100) if self.total_frames > 0 else 0.0
+        ratio_label, pixels_label, frames_label = self.labels
+        texts = [
+            f"{ratio_label}:{danger_ratio:5.1f}%",
+            f"{pixels_label}:{danger_pixels:6d}",
+            f"{frames_label}:{self.danger_accum:3d}"
+        ]
+        self._add_stats(overlay, texts)
+
+        if own_analysis:
+            analysis.commit()
+
+        detection_results = {
+            self.result_key: is_alert,
+            'status_message': " | ".join(texts)
+        }
+        frame_resized = apply_overlay(frame_resized, overlay, detection_results, self.draw)
+
+        return frame_resized, detection_results
+
+    def _add_stats(self, overlay, texts):
+        """프레임 상단 중앙의 통계 막대를 overlay에 추가합니다."""
+        colors = [(255, 255, 0), (0, 255, 255), (255, 100, 100)]
+
+        segment_widths = [text_sprites.text_width(t, self.font_pil) for t in texts]
+        total_width = sum(w + 30 for w in segment_widths) - 20
+
+        padding = 15
+        box_height = 45
+        box_width = total_width + 2 * padding
+        box_x = (self.new_w - box_width) // 2
+        box_y = 8
+
+        overlay.rect(box_x, box_y, box_x + box_width, box_y + box_height, (0, 0, 0), fill=True)
+        overlay.rect(box_x, box_y, box_x + box_width, box_y + box_height, (80, 80, 80), 1)
+
+        x_offset = box_x + padding
+        y_offset = box_y + 8
+        for i, t in enumerate(texts):
+            overlay.text(t, x_offset, y_offset, colors[i], font=self.font_pil)
+            x_offset += segment_widths[i] + 30
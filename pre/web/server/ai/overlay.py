@@ -0,0 +1,214 @@
+"""
+감지기 오버레이 그리기 명령
+
+감지기는 상자, 선, 원, 텍스트를 프레임에 바로 그리는 대신 Overlay에 그리기 명령으로 모읍니다.
+- draw=True (기본값): render(frame, overlay)로 서버에서 프레임에 그립니다. (기존 화면과 동일)
+- draw=False: 프레임에는 아무것도 그리지 않고 결과의 'overlay' 필드로 Overlay를 돌려줍니다.
+  파이프라인의 metadata_only 모드는 이를 to_dict()로 직렬화해 원본 프레임과 함께 보내 클라이언트가 그리게 합니다.
+
+직렬화 형식 (to_dict, 좌표는 size [너비, 높이] 프레임 기준 픽셀, 색상은 '#rrggbb'):
+    {'size': [w, h], 'items': [
+        {'t': 'box', 'xyxy': [x1, y1, x2, y2], 'c': '#00ff00', 'w': 2, 'label': 'Person', 'conf': 0.91},
+        {'t': 'rect', 'xyxy': [x1, y1, x2, y2], 'c': '#000000', 'fill': true, 'a': 0.7},
+        {'t': 'line', 'pts': [[x, y], ...], 'c': '#ff0000', 'w': 2, 'closed': false, 'fill': false, 'a': 1.0},
+        {'t': 'circle', 'xy': [x, y], 'r': 5, 'c': '#ffffff', 'w': -1},
+        {'t': 'text', 'xy': [x, y], 'text': '...', 'c': '#ffffff', 'size': 18},
+        {'t': 'mask', 'cell': 8, 'grid': [gw, gh], 'bits': '<base64>', 'c': '#ff0000', 'a': 0.5},
+    ]}
+text의 xy는 PIL 폰트이면 글자 상자 좌상단, Hershey 폰트이면 OpenCV처럼 기준선 왼쪽입니다.
+('anchor': 'top' 또는 'baseline')
+mask는 픽셀 마스크를 cell px 격자로 줄인 것입니다. bits는 격자(gh행 x gw열, 행 우선)를 np.packbits로
+묶은 base64 문자열이며, 서버 렌더링은 원래 픽셀 마스크를 그대로 사용합니다.
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+from ai.text_sprites import text_sprites
+
+HERSHEY_PX = 22 # FONT_HERSHEY_SIMPLEX scale 1.0의 대략적인 글자 높이(px)
+MASK_CELL = 8 # 직렬화할 때 마스크를 줄이는 격자 크기(px)
+
+
+def hex_color(bgr):
+    b, g, r = (int(v) for v in bgr[:3])
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+class Overlay:
+    """
+    한 프레임의 그리기 명령 목록. 색상은 OpenCV와 같은 BGR 튜플로 받습니다.
+
+    Args:
+        width (int), height (int): 좌표 기준 프레임 크기
+    """
+
+    def __init__(self, width, height):
+        self.width = int(width)
+        self.height = int(height)
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def box(self, x1, y1, x2, y2, color, thickness=2, label=None, conf=None, label_scale=0.6):
+        """경계 상자. label이 있으면 상자 위 (x1, y1 - 10)에 그립니다."""
+        item = {'t': 'box', 'xyxy': [int(x1), int(y1), int(x2), int(y2)], 'c': color, 'w': thickness}
+        if label is not None:
+            item['label'] = label
+            item['_scale'] = label_scale
+        if conf is not None:
+            item['conf'] = round(float(conf), 3)
+        self.items.append(item)
+
+    def rect(self, x1, y1, x2, y2, color, thickness=1, fill=False, alpha=1.0):
+        """채우기/반투명이 가능한 사각형 (패널, 막대 등)"""
+        self.items.append({'t': 'rect', 'xyxy': [int(x1), int(y1), int(x2), int(y2)], 'c': color,
+                           'w': thickness, 'fill': fill, 'a': alpha})
+
+    def polyline(self, points, color, thickness=2, closed=False, fill=False, alpha=1.0):
+        """꺾은선/다각형. fill=True이면 닫힌 다각형을 채웁니다."""
+        pts = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        self.items.append({'t': 'line', 'pts': pts, 'c': color, 'w': thickness,
+                           'closed': closed or fill, 'fill': fill, 'a': alpha})
+
+    def circle(self, x, y, radius, color, thickness=-1):
+        """원. thickness=-1이면 채웁니다."""
+        self.items.append({'t': 'circle', 'xy': [int(x), int(y)], 'r': int(radius), 'c': color, 'w': thickness})
+
+    def mask(self, mask, color, alpha=1.0, cell=MASK_CELL):
+        """이진 마스크 (H, W) 영역을 color로 칠합니다. alpha < 1이면 반투명하게 섞습니다."""
+        self.items.append({'t': 'mask', 'cell': cell, 'c': color, 'a': alpha, '_mask': mask})
+
+    def text(self, text, x, y, color, scale=0.6, thickness=2, font=None):
+        """
+        텍스트. font(PIL 폰트)를 주면 캐시된 텍스트 스프라이트로, 아니면 Hershey 폰트로 그립니다.
+        """
+        item = {'t': 'text', 'xy': [int(x), int(y)], 'text': text, 'c': color}
+        if font is not None:
+            item.update(size=getattr(font, 'size', 10), anchor='top', _font=font)
+        else:
+            item.update(size=round(HERSHEY_PX * scale), anchor='baseline', _scale=scale, _thickness=thickness)
+        self.items.append(item)
+
+    def to_dict(self):
+        """JSON으로 보낼 수 있는 간결한 dict (렌더링 전용 필드 '_*'는 제외)"""
+        items = []
+        for item in self.items:
+            out = {}
+            for key, value in item.items():
+                if key.startswith('_'):
+                    continue
+                if key == 'c':
+                    value = hex_color(value)
+                elif key == 'pts':
+                    value = value.tolist()
+                out[key] = value
+            if item['t'] == 'mask':
+                out.update(_mask_grid(item['_mask'], item['cell']))
+            items.append(out)
+        return {'size': [self.width, self.height], 'items': items}
+
+
+def _mask_grid(mask, cell):
+    """마스크를 cell px 격자로 줄여 {'grid': [gw, gh], 'bits': base64}로 반환합니다."""
+    h, w = mask.shape[:2]
+    gh, gw = -(-h // cell), -(-w // cell)
+    padded = np.zeros((gh * cell, gw * cell), dtype=bool)
+    padded[:h, :w] = mask
+    grid = padded.reshape(gh, cell, gw, cell).any(axis=(1, 3))
+    return {'grid': [gw, gh], 'bits': base64.b64encode(np.packbits(grid).tobytes()).decode('ascii')}
+
+
+def _blend(frame, draw, alpha, x1, y1, x2, y2):
+    """draw(layer, dx, dy)로 영역 복사본에 그린 결과를 (x1, y1, x2, y2) 영역에서만 alpha로 섞습니다."""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2 + 1), min(h, y2 + 1)
+    if x1 >= x2 or y1 >= y2:
+        return
+    roi = frame[y1:y2, x1:x2]
+    layer = roi.copy()
+    draw(layer, -x1, -y1)
+    cv2.addWeighted(layer, alpha, roi, 1.0 - alpha, 0, roi)
+
+
+def render(frame, overlay):
+    """overlay의 그리기 명령을 frame (BGR)에 순서대로 직접 그리고 frame을 반환합니다."""
+    for item in overlay.items:
+        kind, color = item['t'], item['c']
+        if kind == 'box':
+            x1, y1, x2, y2 = item['xyxy']
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, item['w'])
+            if 'label' in item:
+                cv2.putText(frame, item['label'], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, item['_scale'], color, 2)
+        elif kind == 'rect':
+            x1, y1, x2, y2 = item['xyxy']
+            thickness = -1 if item['fill'] else item['w']
+            if item['a'] >= 1.0:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+            else:
+                _blend(frame, lambda layer, dx, dy: cv2.rectangle(layer, (x1 + dx, y1 + dy), (x2 + dx, y2 + dy),
+                                                                  color, thickness),
+                       item['a'], x1, y1, x2, y2)
+        elif kind == 'line':
+            pts = item['pts']
+            if len(pts) == 0:
+                continue
+            def draw(layer, dx=0, dy=0, pts=pts, item=item):
+                shifted = pts + (dx, dy)
+                if item['fill']:
+                    cv2.fillPoly(layer, [shifted], item['c'])
+                else:
+                    cv2.polylines(layer, [shifted], item['closed'], item['c'], item['w'])
+            if item['a'] >= 1.0:
+                draw(frame)
+            else:
+                x1, y1 = pts.min(axis=0)
+                x2, y2 = pts.max(axis=0)
+                pad = 0 if item['fill'] else item['w']
+                _blend(frame, draw, item['a'], int(x1) - pad, int(y1) - pad, int(x2) + pad, int(y2) + pad)
+        elif kind == 'mask':
+            selected = item['_mask'].astype(bool, copy=False)
+            pixels = frame[selected]
+            if len(pixels):
+                paint = np.empty_like(pixels)
+                paint[:] = color
+                frame[selected] = cv2.addWeighted(paint, item['a'], pixels, 1.0 - item['a'], 0)
+        elif kind == 'circle':
+            cv2.circle(frame, tuple(item['xy']), item['r'], color, item['w'])
+        elif kind == 'text':
+            x, y = item['xy']
+            if '_font' in item:
+                text_sprites.draw(frame, item['text'], item['_font'], color[::-1], x, y)
+            else:
+                cv2.putText(frame, item['text'], (x, y), cv2.FONT_HERSHEY_SIMPLEX, item['_scale'], color,
+                            item['_thickness'])
+    return frame
+
+
+def add_pose(overlay, landmarks, connections, point_color, line_color, thickness=2, radius=2, min_visibility=0.5):
+    """
+    MediaPipe 포즈 랜드마크(정규화 좌표)를 선/원 명령으로 추가합니다.
+    drawing_utils.draw_landmarks처럼 가시성이 min_visibility 미만인 점과 그 연결선은 제외합니다.
+    """
+    points = {}
+    for idx, lm in enumerate(landmarks.landmark):
+        if getattr(lm, 'visibility', 1.0) < min_visibility:
+            continue
+        if 0.0 <= lm.x <= 1.0 and 0.0 <= lm.y <= 1.0:
+            points[idx] = (int(lm.x * overlay.width), int(lm.y * overlay.height))
+    for start, end in connections:
+        if start in points and end in points:
+            overlay.polyline([points[start], points[end]], line_color, thickness)
+    for x, y in points.values():
+        overlay.circle(x, y, radius, point_color, thickness)
+
+
+def apply_overlay(frame, overlay, results, draw=True):
+    """draw=True이면 frame에 그리고, 아니면 results['overlay']에 Overlay를 담습니다. frame을 반환합니다."""
+    if draw:
+        return render(frame, overlay)
+    results['overlay'] = overlay
+    return frame
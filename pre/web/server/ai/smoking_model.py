@@ -5,6 +5,8 @@ import tensorflow as tf
 import mediapipe as mp
 from collections import deque
 
+from ai.overlay import Overlay, add_pose, apply_overlay
+
 # --- 1. 모델 및 설정 불러오기 (초기화 함수) ---
 def load_smoking_model():
     """
@@ -134,3 +136,32 @@ def process_frame_for_smoking(frame, sequence_data, model, pose):
         prediction_text = f"SMOKING ({prediction:.2f})" if prediction > 0.9 else f"NORMAL ({prediction:.2f})"
 
     return prediction_text, frame, results
+
+
+# --- 3. 파이프라인용 감지기 래퍼 ---
+class SmokingDetector:
+    """
+    process_frame(frame) -> (frame, results) 인터페이스를 따르는 흡연 감지기입니다.
+    피드마다 자체 시퀀스 버퍼를 가지며, 포즈 스켈레톤을 입력 프레임에 직접 그립니다.
+    draw=False이면 스켈레톤을 그리지 않고 결과의 'overlay'로 선/점 명령을 돌려줍니다.
+    """
+    draw = True
+
+    def __init__(self, model, pose, window_size=WINDOW_SIZE):
+        self.model = model
+        self.pose = pose
+        self.sequence_data = deque(maxlen=window_size)
+
+    @property
+    def modifies_input(self):
+        # 입력 프레임에 직접 그릴 때만 파이프라인이 복사본을 넘깁니다.
+        return self.draw
+
+    def process_frame(self, frame):
+        prediction, processed_frame, landmarks = process_frame_for_smoking(frame, self.sequence_data, self.model, self.pose)
+        results = {'prediction': prediction, 'is_smoking': "SMOKING" in prediction}
+        overlay = Overlay(processed_frame.shape[1], processed_frame.shape[0])
+        if landmarks.pose_landmarks:
+            add_pose(overlay, landmarks.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+                     point_color=(245, 117, 66), line_color=(245, 66, 230))
+        return apply_overlay(processed_frame, overlay, results, self.draw), results
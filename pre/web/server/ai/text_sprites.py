@@ -0,0 +1,91 @@
+"""
+텍스트/라벨 스프라이트 캐시
+
+PIL로 한 번 그린 텍스트를 (미리 곱한 BGR, 알파) 스프라이트로 캐시하고, 프레임에는 텍스트가
+차지하는 영역만 NumPy 슬라이싱으로 직접 블렌딩합니다. 프레임 전체를 PIL 이미지로 바꿨다가
+되돌리는 복사가 없습니다. 캐시는 (텍스트, 폰트, 색상) 키의 LRU이며 모든 감지기가 공유합니다.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# color: 미리 곱한 BGR (H, W, 3) float32, alpha: (H, W, 1) float32, text_width: 텍스트 너비 (px)
+Sprite = namedtuple('Sprite', ['color', 'alpha', 'text_width'])
+
+
+def sprite_from_rgba(image, text_width=None):
+    """PIL RGBA 이미지를 스프라이트로 변환합니다."""
+    rgba = np.asarray(image, dtype=np.float32)
+    alpha = rgba[..., 3:4] / 255.0
+    return Sprite(rgba[..., 2::-1] * alpha, alpha, image.width if text_width is None else text_width)
+
+
+def render_text_sprite(text, font, color):
+    """텍스트를 draw.text((x, y), ...)와 같은 위치 기준의 스프라이트로 그립니다. color는 RGB입니다."""
+    left, _, right, bottom = font.getbbox(text)
+    image = Image.new('RGBA', (max(1, right), max(1, bottom)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((0, 0), text, font=font, fill=color)
+    return sprite_from_rgba(image, right - left)
+
+
+def blend_sprite(frame, sprite, x, y):
+    """스프라이트를 BGR 프레임의 (x, y)에 직접 알파 블렌딩합니다. 프레임 밖은 잘라냅니다."""
+    h, w = sprite.alpha.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    sx, sy = x0 - x, y0 - y
+    a = sprite.alpha[sy:sy + y1 - y0, sx:sx + x1 - x0]
+    c = sprite.color[sy:sy + y1 - y0, sx:sx + x1 - x0]
+    roi = frame[y0:y1, x0:x1]
+    roi[:] = (roi * (1.0 - a) + c + 0.5).astype(np.uint8)
+
+
+class TextSpriteCache:
+    """
+    (텍스트, 폰트, 색상) -> Sprite LRU 캐시
+
+    Args:
+        max_items (int): 보관할 최대 스프라이트 수. 넘으면 가장 오래 쓰지 않은 것부터 버립니다.
+    """
+
+    def __init__(self, max_items=1024):
+        self.max_items = max_items
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font, color):
+        key = (text, id(font), tuple(color))
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+        sprite = render_text_sprite(text, font, tuple(color))
+        with self._lock:
+            self.misses += 1
+            self._sprites[key] = sprite
+            while len(self._sprites) > self.max_items:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def text_width(self, text, font):
+        return self.get(text, font, (255, 255, 255)).text_width
+
+    def draw(self, frame, text, font, color, x, y):
+        """frame (BGR)의 (x, y)에 텍스트를 그립니다. color는 RGB이며 PIL draw.text와 같은 위치에 그립니다."""
+        blend_sprite(frame, self.get(text, font, color), x, y)
+
+    def stats(self):
+        return {'items': len(self._sprites), 'hits': self.hits, 'misses': self.misses}
+
+
+# 모든 감지기가 공유하는 캐시
+text_sprites = TextSpriteCache()
@@ -0,0 +1,92 @@
+"""
+전경 영역 타일 YOLO 추론
+
+넓은 화각에서 작은 물체(가방 등)는 전체 프레임을 YOLO 입력 크기로 줄이면 사라집니다. 전체 프레임은
+낮은 해상도로 한 번만 보고, 배경 차이 마스크가 가리키는 영역만 원본 해상도 타일로 다시 본 뒤
+결과를 클래스별 NMS로 합칩니다. 빈 영역에는 고해상도 추론 비용을 쓰지 않습니다.
+
+탐지 결과 형식은 FrameAnalysis.detections()와 같은 (N, 6) 배열 [x1, y1, x2, y2, score, cls]입니다.
+"""
+
+import cv2
+import numpy as np
+
+
+def tile_regions(mask, tile_size, max_tiles=4, min_area=400):
+    """
+    전경 마스크의 연결 영역을 덮는 타일 [(x1, y1, x2, y2), ...]를 면적이 큰 순서로 반환합니다.
+    영역이 tile_size보다 작으면 영역 중심의 tile_size 정사각형을, 크면 영역 경계 상자를 사용합니다.
+    이미 고른 타일 안에 중심이 들어가는 영역은 건너뜁니다.
+    """
+    h, w = mask.shape[:2]
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    rects = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) >= min_area]
+    rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+
+    tiles = []
+    for x, y, bw, bh in rects:
+        cx, cy = x + bw // 2, y + bh // 2
+        if any(tx1 <= cx < tx2 and ty1 <= cy < ty2 for tx1, ty1, tx2, ty2 in tiles):
+            continue
+        tw, th = min(w, max(bw, tile_size)), min(h, max(bh, tile_size))
+        x1 = int(np.clip(cx - tw // 2, 0, w - tw))
+        y1 = int(np.clip(cy - th // 2, 0, h - th))
+        tiles.append((x1, y1, x1 + tw, y1 + th))
+        if len(tiles) >= max_tiles:
+            break
+    return tiles
+
+
+def nms(detections, iou_threshold=0.5):
+    """클래스별 NMS. 점수 순으로 남긴 탐지 결과 배열을 반환합니다."""
+    if len(detections) == 0:
+        return detections
+    keep = []
+    for cls in np.unique(detections[:, 5]):
+        idx = np.flatnonzero(detections[:, 5] == cls)
+        idx = idx[np.argsort(-detections[idx, 4])]
+        boxes = detections[idx, :4]
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        alive = np.ones(len(idx), dtype=bool)
+        for i in range(len(idx)):
+            if not alive[i]:
+                continue
+            keep.append(idx[i])
+            xx1 = np.maximum(boxes[i, 0], boxes[i + 1:, 0])
+            yy1 = np.maximum(boxes[i, 1], boxes[i + 1:, 1])
+            xx2 = np.minimum(boxes[i, 2], boxes[i + 1:, 2])
+            yy2 = np.minimum(boxes[i, 3], boxes[i + 1:, 3])
+            inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+            iou = inter / np.maximum(areas[i] + areas[i + 1:] - inter, 1e-6)
+            alive[i + 1:] &= iou < iou_threshold
+    keep.sort(key=lambda i: -detections[i, 4])
+    return detections[keep]
+
+
+def tiled_detections(model, frame, tiles, global_detections, conf=0.1, imgsz=None, iou_threshold=0.5):
+    """
+    global_detections에 tiles 영역별 원본 해상도 추론 결과를 더하고 NMS로 합칩니다.
+
+    Args:
+        model: YOLO 모델 (또는 BatchedYOLO 프록시). 타일 이미지 리스트를 받아 타일별 결과 리스트를 반환해야 합니다.
+        frame (numpy.ndarray): 원본 해상도 프레임
+        tiles (list): tile_regions()의 타일 목록
+        global_detections (numpy.ndarray): 전체 프레임 저해상도 패스의 탐지 결과 (frame 좌표계)
+        imgsz (int): 타일 추론 입력 크기 (None이면 모델 기본값)
+    """
+    merged = [global_detections]
+    options = {'conf': conf, 'verbose': False}
+    if imgsz is not None:
+        options['imgsz'] = imgsz
+    # 타일을 한 번의 배치 호출로 추론합니다.
+    results = model([frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles], **options) if tiles else []
+    for (x1, y1, _, _), result in zip(tiles, results):
+        detections = result.boxes.data.cpu().numpy()
+        if len(detections):
+            detections = detections.copy()
+            detections[:, [0, 2]] += x1
+            detections[:, [1, 3]] += y1
+            merged.append(detections)
+    if len(merged) == 1:
+        return global_detections
+    return nms(np.concatenate(merged), iou_threshold)
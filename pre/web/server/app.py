@@ -9,8 +9,6 @@ import numpy as np
 from flask_cors import CORS
 import logging
 import requests
-from threading import Thread, Event
-from ultralytics import YOLO
 
 #Handel token releated operations
 from endpoints.auth.helpers import revoke_token, is_token_revoked
@@ -23,20 +21,22 @@ from models import Roles, Incidents
 from models.camera import CameraDetails
 from flask_migrate import Migrate # Flask-Migrate 임포트
 
-from collections import deque
-from ai.smoking_model import load_smoking_model, process_frame_for_smoking
-import mediapipe as mp
-from ai.abandon import AbandonedItemDetector
-from ai.Damage import DamageDetector
-from ai.Violence import ViolenceDetector
-from ai.Weak import WeakDetector
-from ai.fire import FireDetector # Import the new FireDetector
+from streaming.capture_hub import CaptureHub
+from streaming.transport import FrameTransport, decode_image_field
+from streaming.fanout import FeedPublisher
+from streaming.pacing import PacingController
+from streaming.process_pool import PipelineProcessPool, WorkerPipeline
+from incident_store import IncidentRecorder
+import feeds
+from feeds import FEEDS, model_registry
 
-from ai.aiConAnomalyDetect import AbnormalBehaviorDetector
+# 감지기 생성 함수와 피드 설정은 feeds.py에 있습니다. (작업 프로세스와 공유)
+# 모델은 피드가 처음 감지기를 만들 때 model_registry로 한 번만 로드됩니다.
 
-# --- 모델 전역 로드 ---
-yolo_model = YOLO('./ai/yolov8n.pt') # YOLO 모델을 앱 시작 시 한 번만 로드합니다.
-fire_detector_yolo_model = YOLO('./ai/best.pt') # YOLO fire model
+# 피드 파이프라인을 별도 작업 프로세스에서 실행합니다. (False면 모두 이 프로세스에서 협조적으로 실행)
+# 작업자 안에서는 스트림 간 배칭 대신 프로세스별 모델로 병렬 실행합니다.
+USE_PIPELINE_PROCESSES = False
+PIPELINE_PROCESSES = None # 최대 작업 프로세스 수 (None이면 CPU 코어 수, 넘치는 피드는 이 프로세스에서 실행)
 
 
 # Creating the Flask app instance
@@ -52,6 +52,20 @@ app.config.from_object('config.BaseConfig')
 app.config['SECRET_KEY'] = 'key'
 socketio = SocketIO(app, cors_allowed_origins="*") 
 
+# 피드 파이프라인 작업 프로세스 풀 (USE_PIPELINE_PROCESSES일 때 init_server()가 만듭니다.)
+pipeline_pool = None
+
+# 소스별로 디코더 하나를 공유하는 캡처 허브 (뷰어 수와 무관하게 소스당 1회 디코딩)
+capture_hub = CaptureHub(start_task=socketio.start_background_task, sleep=socketio.sleep)
+
+# 네임스페이스별로 협상된 프레임 전송 모드 (string: base64 data URL, binary: JPEG 바이트 첨부)
+frame_transport = FrameTransport()
+
+# (네임스페이스, 소스)별 파이프라인 1개를 실행하고 뷰어는 룸으로 같은 프레임을 받습니다.
+# 송신 큐가 FEED_MAX_QUEUE 패킷을 넘는 느린 뷰어는 최신 프레임이 올 때까지 건너뜁니다.
+FEED_MAX_QUEUE = 4
+feed_publisher = FeedPublisher(socketio, frame_transport, max_queue=FEED_MAX_QUEUE)
+
 # Initializing the database with the app instance
 db.init_app(app)
 
@@ -102,144 +116,32 @@ def get_dashboard_stats():
     }
     return jsonify(stats)
 
-# --- 대시보드 이상행동 감지 웹소켓 핸들러 ---
-video_list = [
-    './uploads/C_3_13_1_BU_SMA_08-28_14-30-29_CA_RGB_DF2_F1.mp4',
-    './uploads/C_3_10_1_BU_DYA_08-04_11-16-33_CC_RGB_DF2_M2.mp4',
-    './uploads/C_3_11_29_BU_SMC_08-07_16-19-38_CD_RGB_DF2_F1.mp4',
-]
-
-def dashboard_video_processing_thread(video_path, sid, stop_event, namespace):
-    """대시보드 이상행동 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting dashboard anomaly detection thread for {sid} on {namespace} with video {video_path}")
-    try:
-        detector = AbnormalBehaviorDetector(model_path='./ai/efficient_50_best.pth', device='cpu')
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print(f"Error: Could not open video stream from {video_path}")
-            return
-
-        frame_buffer = deque(maxlen=16)
-        frame_count = 0
-        stride = 8
-        last_result = None
-
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid} on {namespace}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                frame_buffer.clear()
-                frame_count = 0
-                last_result = None
-                continue
-
-            frame_count += 1
-            frame_buffer.append(frame.copy())
-
-            display_frame = frame
-
-            if len(frame_buffer) == 16 and frame_count % stride == 0:
-                result = detector.predict(list(frame_buffer))
-                last_result = result
-
-            if last_result:
-                display_frame = detector.draw_results(frame, last_result, len(frame_buffer))
-
-            _, buffer = cv2.imencode('.jpg', display_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-            }, namespace=namespace, room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-
-    except Exception as e:
-        print(f'Exiting dashboard detection thread for {sid} on {namespace} due to error: {e}')
-    finally:
-        if 'cap' in locals() and cap.isOpened():
-            cap.release()
-        print(f"Released video capture for {sid} on {namespace}")
-
-@socketio.on('connect', namespace='/ws/dashboard_feed')
-def connect_dashboard_feed():
-    sid = request.sid
-    print(f'Client connected to dashboard feed 1: {sid}')
-    stop_event = Event()
-    video_threads[sid] = stop_event
-    socketio.start_background_task(target=dashboard_video_processing_thread, video_path=video_list[0], sid=sid, stop_event=stop_event, namespace='/ws/dashboard_feed')
-
-@socketio.on('disconnect', namespace='/ws/dashboard_feed')
-def disconnect_dashboard_feed():
-    sid = request.sid
-    print(f'Client disconnected from dashboard feed 1: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-
-@socketio.on('connect', namespace='/ws/dashboard_feed_2')
-def connect_dashboard_feed_2():
-    sid = request.sid
-    print(f'Client connected to dashboard feed 2: {sid}')
-    stop_event = Event()
-    video_threads[sid] = stop_event
-    socketio.start_background_task(target=dashboard_video_processing_thread, video_path=video_list[1], sid=sid, stop_event=stop_event, namespace='/ws/dashboard_feed_2')
-
-@socketio.on('disconnect', namespace='/ws/dashboard_feed_2')
-def disconnect_dashboard_feed_2():
-    sid = request.sid
-    print(f'Client disconnected from dashboard feed 2: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
+# --- 모델 메모리 사용량 API ---
+@app.route('/models/stats', methods=['GET'])
+def get_model_stats():
+    """레지스트리에 로드된 모델별 메모리 사용량, 로드 시간 및 배칭 통계를 반환합니다."""
+    return jsonify({
+        "models": model_registry.memory_report(),
+        "batching": model_registry.batching_report(),
+    })
+
+# --- 스트림 상태 API ---
+@app.route('/streams/stats', methods=['GET'])
+def get_stream_stats():
+    """공유 캡처 소스, 피드별 처리 FPS와 뷰어별 송신 FPS/큐 길이/드롭 수, 작업 프로세스 풀을 반환합니다."""
+    return jsonify({
+        "sources": capture_hub.stats(),
+        "feeds": feed_publisher.stats(),
+        "processes": pipeline_pool.stats() if pipeline_pool is not None else None,
+    })
 
 #Initialize boolean
 initialized = False
 
-# --- 감지기 인스턴스 및 처리 플래그 저장용 전역 변수 ---
-abandoned_detectors = {}
-damage_detectors = {}
-is_processing = False # 흡연 처리 중인지 확인하는 플래그
-is_abandon_processing = False # 유기물 처리 중인지 확인하는 플래그
-is_damage_processing = False # 폭행 처리 중인지 확인하는 플래그
-
-
-# --- 인시던트 저장 헬퍼 함수 ---
-def save_incident_if_needed(sid, incident_type, module_name, frame):
-    """쿨다운을 확인하고 데이터베이스에 인시던트를 저장하고, 필요한 경우 이미지도 저장합니다."""
-    now = time.time()
-    last_saved_key = f"{sid}_{incident_type.lower().replace(' ', '_')}"
-    last_saved = last_incident_time.get(last_saved_key, 0)
-    if now - last_saved > INCIDENT_SAVE_COOLDOWN:
-        with app.app_context():
-            try:
-                # 이미지 저장
-                image_filename = f"{incident_type.lower().replace(' ', '_')}_{int(now)}.jpg"
-                image_path_relative = os.path.join('incident_images', image_filename)
-                image_path_relative = image_path_relative.replace('\\', '/')
-                full_image_path = os.path.join(app.root_path, image_path_relative)
-                cv2.imwrite(full_image_path, frame)
-
-                # 데이터베이스에 인시던트 저장
-                incident = Incidents(
-                    type=incident_type,
-                    module=module_name,
-                    camera="Camera 1",  # Placeholder
-                    status="Active",
-                    image_path=image_path_relative
-                )
-                incident.save()
-                last_incident_time[last_saved_key] = now
-                print(f"Incident saved: {incident_type} detected by {sid} with image {image_path_relative}")
-            except Exception as db_e:
-                print(f"Error saving {incident_type} incident to DB: {db_e}")
-
 
-import time
-
-video_threads = {} # 백그라운드 비디오 처리 스레드를 관리하기 위한 딕셔너리
-last_incident_time = {} # 인시던트 저장 쿨다운을 관리하기 위한 딕셔너리
-INCIDENT_SAVE_COOLDOWN = 30 # seconds
+# --- 인시던트 자동 저장 (쿨다운 포함, headless.py와 공유) ---
+incident_recorder = IncidentRecorder(app)
+save_incident_if_needed = incident_recorder.save_incident_if_needed
 
 
 @jwt.expired_token_loader
@@ -294,377 +196,55 @@ def create_roles():
     db.session.commit()
     db.session.close()
 
-# --- 흡연 감지 웹소켓 핸들러 ---
-smoking_model, smoking_pose = load_smoking_model()
-sequence_data = deque(maxlen=30)
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
-
-def smoking_video_processing_thread(video_path, sid, stop_event):
-    """흡연 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting smoking detection thread for {sid} with video {video_path}")
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
-    try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            prediction, processed_frame, landmarks = process_frame_for_smoking(frame, sequence_data, smoking_model, smoking_pose)
-            if landmarks.pose_landmarks:
-                mp_drawing.draw_landmarks(
-                    processed_frame, landmarks.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                    landmark_drawing_spec=mp_drawing.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2),
-                    connection_drawing_spec=mp_drawing.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2)
-                )
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if smoking is detected, with cooldown
-            if "SMOKING" in prediction:
-                # save_incident_if_needed(sid, "Smoking", "SmokingDetector", processed_frame)
-                pass
-
-            socketio.emit('response', {'image': 'data:image/jpeg;base64,' + encoded_image, 'prediction': prediction}, namespace='/ws/video_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-    except Exception as e:
-        print(f'Exiting smoking detection thread for {sid} due to error: {e}')
-    finally:
-        cap.release()
-        print(f"Released video capture for {sid}")
-
-
-@socketio.on('connect', namespace='/ws/video_feed' )
-def test_connect():
-    sid = request.sid
-    print(f'Client connected to smoking feed: {sid}')
-    # Stop any existing thread for this session, just in case
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-    
-    video_path = './uploads/C_3_10_1_BU_DYA_08-04_11-16-33_CC_RGB_DF2_M2.mp4'
-    socketio.start_background_task(target=smoking_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
-    
-@socketio.on('disconnect', namespace='/ws/video_feed')
-def test_disconnect():
-    sid = request.sid
-    print(f'Client disconnected from smoking feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set() # Signal the thread to stop
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
-
-# --- 유기물 감지 웹소켓 핸들러 ---
-def abandoned_video_processing_thread(video_path, sid, stop_event):
-    """유기물 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting abandoned item detection thread for {sid} with video {video_path}")
-    detector = AbandonedItemDetector(yolo_model=yolo_model)
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
-    try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            processed_frame, detection_results = detector.process_frame(frame)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if abandoned item is detected, with cooldown
-            if detection_results and detection_results.get('abandoned_items'):
-                # save_incident_if_needed(sid, "Abandoned Item", "AbandonedItemDetector", processed_frame)
-                pass
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-                'detections': detection_results
-            }, namespace='/ws/abandoned_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-    except Exception as e:
-        print(f'Exiting abandoned item detection thread for {sid} due to error: {e}')
-    finally:
-        cap.release()
-        print(f"Released video capture for {sid}")
-
-@socketio.on('connect', namespace='/ws/abandoned_feed')
-def connect_abandoned_feed():
-    sid = request.sid
-    print(f'Client connected to abandoned feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-
-    video_path = './uploads/C_3_11_29_BU_SMC_08-07_16-19-38_CD_RGB_DF2_F1.mp4'
-    socketio.start_background_task(target=abandoned_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
-
-@socketio.on('disconnect', namespace='/ws/abandoned_feed')
-def disconnect_abandoned_feed():
-    sid = request.sid
-    print(f'Client disconnected from abandoned feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
-
-# --- 파손 감지 웹소켓 핸들러 ---
-def breakage_video_processing_thread(video_path, sid, stop_event):
-    """파손 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting breakage detection thread for {sid} with video {video_path}")
-    detector = DamageDetector(yolo_model_path='./ai/yolov8n.pt')
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
-    try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            processed_frame, detection_results = detector.process_frame(frame)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if damage is detected, with cooldown
-            if detection_results.get('is_danger'):
-                # save_incident_if_needed(sid, "Damage", "DamageDetector", processed_frame)
-                pass
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-                'detections': detection_results
-            }, namespace='/ws/damage_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-    except Exception as e:
-        print(f'Exiting breakage detection thread for {sid} due to error: {e}')
-    finally:
-        cap.release()
-        print(f"Released video capture for {sid}")
-
-@socketio.on('connect', namespace='/ws/damage_feed')
-def connect_breakage_feed():
-    sid = request.sid
-    print(f'Client connected to breakage feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-
-    video_path = './uploads/C_3_8_1_BU_SMA_09-17_13-38-51_CA_RGB_DF2_M1.mp4'
-    socketio.start_background_task(target=breakage_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
-
-@socketio.on('disconnect', namespace='/ws/damage_feed')
-def disconnect_breakage_feed():
-    sid = request.sid
-    print(f'Client disconnected from breakage feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
-
-# --- 폭행 감지 웹소켓 핸들러 ---
-def violence_video_processing_thread(video_path, sid, stop_event):
-    """폭행 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting violence detection thread for {sid} with video {video_path}")
-    detector = ViolenceDetector(yolo_model_path='./ai/yolov8n.pt')
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
-    try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            processed_frame, detection_results = detector.process_frame(frame)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if violence is detected, with cooldown
-            if detection_results.get('is_violence'):
-                # save_incident_if_needed(sid, "Violence", "ViolenceDetector", processed_frame)
-                pass 
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-                'detections': detection_results
-            }, namespace='/ws/violence_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-    except Exception as e:
-        print(f'Exiting violence detection thread for {sid} due to error: {e}')
-    finally:
-        cap.release()
-        print(f"Released video capture for {sid}")
-
-@socketio.on('connect', namespace='/ws/violence_feed')
-def connect_violence_feed():
-    sid = request.sid
-    print(f'Client connected to violence feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-
-    video_path = './uploads/C_3_13_1_BU_SMA_08-28_14-30-29_CA_RGB_DF2_F1.mp4'
-    socketio.start_background_task(target=violence_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
-
-@socketio.on('disconnect', namespace='/ws/violence_feed')
-def disconnect_violence_feed():
-    sid = request.sid
-    print(f'Client disconnected from violence feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
-
-# --- 교통약자 감지 웹소켓 핸들러 ---
-def weak_video_processing_thread(video_path, sid, stop_event):
-    """교통약자 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting weak detection thread for {sid} with video {video_path}")
-    detector = WeakDetector(yolo_model_path='./ai/yolov8n.pt')
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
+# 인시던트 자동 저장 여부 (False면 클라이언트의 confirm_incident로만 저장)
+AUTO_SAVE_INCIDENTS = False
+
+# --- 감지 피드 처리 ---
+def feed_pipeline_thread(video_path, stop_event, feed, config):
+    """피드 하나의 감지 파이프라인을 실행하는 백그라운드 스레드 (피드당 1개)"""
+    print(f"Starting {config.label} thread for {feed.name}")
+    persist = incident_recorder.persister(feed.namespace) if AUTO_SAVE_INCIDENTS else None
+    pipeline = None
+    subscription = None
+    error = None
     try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            processed_frame, detection_results = detector.process_frame(frame)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if weak user is detected, with cooldown
-            if detection_results.get('is_weak'):
-                # save_incident_if_needed(sid, "Weak User", "WeakDetector", processed_frame)
-                pass
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-                'detections': detection_results
-            }, namespace='/ws/weak_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
+        if pipeline_pool is not None:
+            pipeline = pipeline_pool.start(feed.namespace, feed.publish, persist)
+        if pipeline is None:
+            pipeline = config.build_pipeline(publish=feed.publish, persist=persist, sleep=socketio.sleep)
+        subscription = capture_hub.subscribe(video_path)
+
+        pacer = PacingController(subscription.fps, sleep=socketio.sleep)
+        feed.pacer = pipeline.pacer if isinstance(pipeline, WorkerPipeline) else pacer
+        feed.pipeline = pipeline
+        pipeline.run(subscription, stop_event, pacer)
     except Exception as e:
-        print(f'Exiting weak detection thread for {sid} due to error: {e}')
+        error = e
+        print(f'Exiting {config.label} thread for {feed.name} due to error: {e}')
     finally:
-        cap.release()
-        print(f"Released video capture for {sid}")
-
-@socketio.on('connect', namespace='/ws/weak_feed')
-def connect_weak_feed():
+        if isinstance(pipeline, WorkerPipeline):
+            pipeline.close() # 시작하지 못한 작업자 예약도 반환합니다.
+        if subscription is not None:
+            subscription.close()
+            print(f"Released video subscription for {feed.name}")
+        # 남은 뷰어에게 알리고 피드를 제거해 다음 접속이 새 파이프라인을 시작하게 합니다.
+        feed_publisher.end(feed, f"{config.label} stopped: {error}" if error else None)
+
+# --- 감지 피드 웹소켓 핸들러 ---
+def connect_feed():
     sid = request.sid
-    print(f'Client connected to weak feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-
-    video_path = './uploads/C_3_14_1_BU_DYB_10-11_14-46-58_CB_DF2_M2.mp4'
-    socketio.start_background_task(target=weak_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
-
-@socketio.on('disconnect', namespace='/ws/weak_feed')
-def disconnect_weak_feed():
-    sid = request.sid
-    print(f'Client disconnected from weak feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
-
-
-# --- 화재 감지 웹소켓 핸들러 ---
-def fire_video_processing_thread(video_path, sid, stop_event):
-    """화재 감지 비디오 처리를 위한 백그라운드 스레드"""
-    print(f"Starting fire detection thread for {sid} with video {video_path}")
-    detector = FireDetector(yolo_model_path='./ai/fire_detection.pt') # Assuming a YOLO fire model exists
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Error: Could not open video stream from {video_path}")
-        return
-
-    try:
-        while not stop_event.is_set():
-            ret, frame = cap.read()
-            if not ret:
-                print(f"End of video stream for {sid}, restarting.")
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
-                continue
-
-            processed_frame, detection_results = detector.process_frame(frame)
-            _, buffer = cv2.imencode('.jpg', processed_frame)
-            encoded_image = base64.b64encode(buffer).decode('utf-8')
-            
-            # Save incident if fire is detected, with cooldown
-            if detection_results.get('is_fire'):
-                # save_incident_if_needed(sid, "Fire", "FireDetector", processed_frame)
-                pass
-
-            socketio.emit('response', {
-                'image': 'data:image/jpeg;base64,' + encoded_image,
-                'detections': detection_results
-            }, namespace='/ws/fire_feed', room=sid)
-            socketio.sleep(0.03) # ~33 FPS
-    except Exception as e:
-        print(f'Exiting fire detection thread for {sid} due to error: {e}')
-    finally:
-        if 'cap' in locals() and cap.isOpened():
-            cap.release()
-        print(f"Released video capture for {sid}")
-
-@socketio.on('connect', namespace='/ws/fire_feed')
-def connect_fire_feed():
-    sid = request.sid
-    print(f'Client connected to fire feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-
-    stop_event = Event()
-    video_threads[sid] = stop_event
-
-    # You'll need to provide a suitable video path for fire detection
-    video_path = './uploads/C_3_9_2_BU_SMB_09-02_10-43-45_CA_RGB_DF2_M2.mp4' # Example video path
-    socketio.start_background_task(target=fire_video_processing_thread, video_path=video_path, sid=sid, stop_event=stop_event)
+    namespace = request.namespace
+    config = FEEDS[namespace]
+    frame_transport.negotiate(sid, namespace, request.args.get('transport'))
+    print(f'Client connected to {config.label} feed ({namespace}): {sid}')
+    feed_publisher.join(sid, namespace, config.source, feed_pipeline_thread, config=config)
 
-@socketio.on('disconnect', namespace='/ws/fire_feed')
-def disconnect_fire_feed():
+def disconnect_feed():
     sid = request.sid
-    print(f'Client disconnected from fire feed: {sid}')
-    if sid in video_threads:
-        video_threads[sid].set()
-        del video_threads[sid]
-        print(f"Stopped video thread for {sid}")
+    namespace = request.namespace
+    print(f'Client disconnected from {FEEDS[namespace].label} feed ({namespace}): {sid}')
+    feed_publisher.leave(sid, namespace)
+    frame_transport.discard(sid, namespace)
 
 # --- 인시던트 확인 및 저장 핸들러 ---
 
@@ -680,10 +260,8 @@ def _handle_incident_confirmation_logic(data):
         # 프론트엔드에서 전송된 데이터 추출
         incident_type = data.get('mode')
         detection_mode = data.get('detectionMode')
-        base64_image_data = data.get('image').split(',')[1]
-
-        # Base64 이미지 디코딩
-        image_bytes = base64.b64decode(base64_image_data)
+        # 이미지 디코딩 (data URL 문자열 또는 바이너리 전송 모드의 JPEG 바이트)
+        image_bytes = decode_image_field(data.get('image'))
         np_arr = np.frombuffer(image_bytes, np.uint8)
         frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
 
@@ -715,35 +293,45 @@ def _handle_incident_confirmation_logic(data):
         db.session.remove()
 
 
-@socketio.on('confirm_incident', namespace='/ws/video_feed')
-def handle_smoking_confirm(data):
-    _handle_incident_confirmation_logic(data)
-
-@socketio.on('confirm_incident', namespace='/ws/abandoned_feed')
-def handle_abandoned_confirm(data):
-    _handle_incident_confirmation_logic(data)
-
-@socketio.on('confirm_incident', namespace='/ws/damage_feed')
-def handle_damage_confirm(data):
-    _handle_incident_confirmation_logic(data)
 
-@socketio.on('confirm_incident', namespace='/ws/violence_feed')
-def handle_violence_confirm(data):
+def handle_incident_confirm(data):
     _handle_incident_confirmation_logic(data)
 
-@socketio.on('confirm_incident', namespace='/ws/weak_feed')
-def handle_weak_confirm(data):
-    _handle_incident_confirmation_logic(data)
+# --- 프레임 전송 모드 협상 핸들러 ---
+def handle_set_transport(data):
+    """클라이언트가 요청한 전송 모드(string/binary)를 현재 네임스페이스에 적용합니다."""
+    mode = frame_transport.negotiate(request.sid, request.namespace, (data or {}).get('mode'))
+    feed_publisher.update_mode(request.sid, request.namespace)
+    emit('transport', {'mode': mode})
 
-@socketio.on('confirm_incident', namespace='/ws/fire_feed')
-def handle_fire_confirm(data):
-    _handle_incident_confirmation_logic(data)
+# --- 피드별 이벤트 핸들러 등록 ---
+for feed_namespace in FEEDS:
+    socketio.on_event('connect', connect_feed, namespace=feed_namespace)
+    socketio.on_event('disconnect', disconnect_feed, namespace=feed_namespace)
+    socketio.on_event('confirm_incident', handle_incident_confirm, namespace=feed_namespace)
+    socketio.on_event('set_transport', handle_set_transport, namespace=feed_namespace)
 
 
+def init_server():
+    """
+    서버 프로세스에서만 실행할 초기화 (DB 테이블/역할, 모델 예열, 작업 프로세스 풀)
 
-with app.app_context():
-   initialize_database()
-   create_roles()
+    spawn으로 시작한 파이프라인 작업자는 이 파일을 '__mp_main__'으로 다시 임포트하므로,
+    모듈 최상위에는 부작용이 있는 초기화를 두지 않고 __main__에서 이 함수를 호출합니다.
+    """
+    global pipeline_pool
+    # 배치 프록시가 결과를 기다리는 동안 다른 피드에 양보합니다.
+    feeds.configure(sleep=socketio.sleep)
+    if USE_PIPELINE_PROCESSES:
+        pipeline_pool = PipelineProcessPool(
+            'feeds:build_worker_pipeline', max_workers=PIPELINE_PROCESSES, sleep=socketio.sleep,
+        )
+    with app.app_context():
+        initialize_database()
+        create_roles()
+    # 첫 흡연 피드 접속이 모델 로딩을 기다리지 않도록 미리 불러옵니다.
+    feeds.smoking_models()
 
 if __name__ == '__main__':
+    init_server()
     socketio.run(app, host='0.0.0.0', port=5000, async_mode='eventlet')
@@ -558,21 +558,6 @@ def make_phone_call(to_numbers, message):
         print(f"Call initiated to {number}: {call.sid}")
 
 
-# Function to detect motion between two frames
-def is_motion_detected(current_frame, reference_frame, threshold=50):
-    # Convert frames to grayscale
-    gray_current = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
-    gray_reference = cv2.cvtColor(reference_frame, cv2.COLOR_BGR2GRAY)
-
-    # Compute the absolute difference between the current frame and reference frame
-    frame_delta = cv2.absdiff(gray_reference, gray_current)
-
-    # Threshold to get the regions with significant changes
-    thresh = cv2.threshold(frame_delta, threshold, 255, cv2.THRESH_BINARY)[1]
-
-    # If there are white pixels in the thresholded image, motion is detected
-    return np.sum(thresh) > 0
-
 # Reports API's #
 
 @rest_api.route('/reports', methods=['GET', 'POST'])
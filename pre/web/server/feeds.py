@@ -0,0 +1,276 @@
+"""
+감지기 생성 함수와 웹소켓 피드 설정
+
+Flask/Socket.IO에 의존하지 않으므로 app.py, headless.py와 파이프라인 작업 프로세스
+(streaming/process_pool.py)가 같은 설정으로 감지기를 만듭니다. 모델은 프로세스마다
+model_registry를 통해 처음 요청될 때 한 번만 로드됩니다.
+"""
+
+import os
+import time
+
+from ai.abandon import AbandonedItemDetector
+from ai.background import make_background
+from ai.Damage import DamageDetector
+from ai.Violence import ViolenceDetector
+from ai.Weak import WeakDetector
+from ai.fire import FireDetector # Import the new FireDetector
+
+from ai.aiConAnomalyDetect import AbnormalBehaviorDetector, ClipAnomalyDetector
+from ai.model_registry import ModelRegistry
+from ai.frame_analysis import StreamAnalysis
+from streaming.inference_policy import InferencePolicy
+from streaming.motion_gate import MotionGate
+from streaming.pipeline import DetectorPipeline
+
+# --- 모델 레지스트리 ---
+# 모든 감지기는 레지스트리를 통해 가중치 파일당 하나의 모델을 공유합니다.
+model_registry = ModelRegistry()
+
+# 모든 스트림의 YOLO 호출을 모아 배치로 추론합니다. (False면 스트림별 배치 크기 1)
+YOLO_BATCHING = True
+YOLO_MAX_BATCH = 8 # 한 번에 추론할 최대 프레임 수
+YOLO_MAX_WAIT_MS = 10 # 배치를 채우기 위해 기다리는 최대 시간 (꼬리 지연 상한)
+
+# 이상행동 3D-CNN 클립도 스트림 간 배치로 추론합니다.
+ANOMALY_BATCHING = True
+ANOMALY_MAX_BATCH = 4 # 한 번에 추론할 최대 클립 수
+ANOMALY_MAX_WAIT_MS = 30 # 다른 스트림의 클립을 기다리는 최대 시간
+# 'auto': ai/anomaly_export.py로 내보낸 ONNX/TorchScript 아티팩트가 있으면 사용 (없으면 .pth)
+# 'int8': ai/anomaly_quantize.py로 만든 INT8 모델 사용 (명시적으로 선택해야 함)
+ANOMALY_RUNTIME = 'auto'
+ANOMALY_NUM_THREADS = None # ONNX Runtime/torch intra-op 스레드 수 (None이면 기본값)
+
+# 배치 프록시의 결과 대기 함수. app.py는 socketio.sleep으로 설정합니다.
+cooperative_sleep = time.sleep
+
+
+def configure(sleep=None, yolo_batching=None, anomaly_batching=None, anomaly_num_threads=None):
+    """실행 환경에 맞게 대기 함수와 스트림 간 배칭 여부를 설정합니다. (감지기 생성 전에 호출)"""
+    global cooperative_sleep, YOLO_BATCHING, ANOMALY_BATCHING, ANOMALY_NUM_THREADS
+    if sleep is not None:
+        cooperative_sleep = sleep
+    if yolo_batching is not None:
+        YOLO_BATCHING = yolo_batching
+    if anomaly_batching is not None:
+        ANOMALY_BATCHING = anomaly_batching
+    if anomaly_num_threads is not None:
+        ANOMALY_NUM_THREADS = anomaly_num_threads
+
+
+def get_yolo(weights_path):
+    """감지기에 넘겨줄 공유 YOLO 핸들을 반환합니다. (배칭 설정 시 배치 프록시)"""
+    if YOLO_BATCHING:
+        return model_registry.batched_yolo(weights_path, max_batch=YOLO_MAX_BATCH,
+                                           max_wait_ms=YOLO_MAX_WAIT_MS, sleep=cooperative_sleep)
+    return model_registry.yolo(weights_path)
+
+
+def smoking_models():
+    """흡연 감지 모델과 MediaPipe Pose를 반환합니다. (TensorFlow는 처음 요청될 때 로드)"""
+    def load():
+        from ai.smoking_model import load_smoking_model
+        return load_smoking_model()
+    return model_registry.get(('smoking', os.path.abspath('./ai/best_model.h5')), load)
+
+
+# --- 감지 피드 설정 ---
+video_list = [
+    './uploads/C_3_13_1_BU_SMA_08-28_14-30-29_CA_RGB_DF2_F1.mp4',
+    './uploads/C_3_10_1_BU_DYA_08-04_11-16-33_CC_RGB_DF2_M2.mp4',
+    './uploads/C_3_11_29_BU_SMC_08-07_16-19-38_CD_RGB_DF2_F1.mp4',
+]
+
+# 이상행동 3D-CNN 클립 길이와 추론 간격(프레임). stride < clip_len이면 클립이 겹칩니다.
+ANOMALY_CLIP_LEN = 16
+ANOMALY_STRIDE = 8
+
+def build_anomaly_detector():
+    detector = AbnormalBehaviorDetector(
+        model_path='./ai/efficient_50_best.pth', device='cpu',
+        loaded_model=model_registry.anomaly_model('./ai/efficient_50_best.pth', device='cpu',
+                                                  runtime=ANOMALY_RUNTIME, num_threads=ANOMALY_NUM_THREADS),
+        batcher=model_registry.batched_anomaly_model(
+            './ai/efficient_50_best.pth', device='cpu', max_batch=ANOMALY_MAX_BATCH,
+            max_wait_ms=ANOMALY_MAX_WAIT_MS, sleep=cooperative_sleep,
+            runtime=ANOMALY_RUNTIME, num_threads=ANOMALY_NUM_THREADS
+        ) if ANOMALY_BATCHING else None,
+    )
+    return ClipAnomalyDetector(detector, clip_len=ANOMALY_CLIP_LEN, stride=ANOMALY_STRIDE)
+
+def build_smoking_detector():
+    from ai.smoking_model import SmokingDetector
+    smoking_model, smoking_pose = smoking_models()
+    return SmokingDetector(smoking_model, smoking_pose)
+
+def build_fire_detector():
+    try:
+        fire_yolo_model = get_yolo('./ai/fire_detection.pt') # Assuming a YOLO fire model exists
+    except Exception as e:
+        print(f"[INIT] YOLO not available: {e}")
+        fire_yolo_model = None
+    return FireDetector(yolo_model=fire_yolo_model)
+
+# 흐름 기반 감지기(damage/violence/weak)의 광학 흐름 계산 해상도 비율 (1.0 = 720px 너비)
+MOTION_FLOW_SCALE = 1.0
+# True면 사람 주변 영역에서만 흐름을 계산하고 사람이 없는 프레임은 흐름 계산을 건너뜁니다.
+# 기본값은 전체 프레임 흐름이며, 피드별로 FeedConfig(flow_roi=True)로 켤 수 있습니다.
+MOTION_FLOW_ROI = False
+
+# 움직임 게이트: 정적인 프레임에서 무거운 감지기(motion_gated)를 실행하지 않고 직전 결과를 재사용합니다.
+MOTION_GATE = True
+MOTION_GATE_THRESHOLD = 25 # 썸네일 픽셀 밝기 변화 임계값 (낮을수록 민감)
+MOTION_GATE_MIN_CHANGED = 0.002 # 움직임으로 볼 바뀐 픽셀 비율 (낮을수록 민감)
+MOTION_GATE_MAX_SKIP = 5 # 변화가 없어도 이 프레임 수마다 한 번은 감지기를 실행합니다.
+
+# 유기물 감지의 타일 추론: 전체 프레임은 저해상도로 보고 배경 차이 영역만 원본 해상도 타일로 다시 봅니다.
+ABANDONED_TILED = False
+ABANDONED_GLOBAL_IMGSZ = 320 # 전체 프레임 패스의 YOLO 입력 크기
+ABANDONED_TILE_SIZE = 320 # 타일 크기(원본 픽셀) = 타일 추론 입력 크기
+# 유기물 감지의 배경 모델 ('running_average', 'mog2', 'dual'). 학습 후에도 전경이 아닌 픽셀은 천천히 갱신합니다.
+ABANDONED_BACKGROUND = 'running_average'
+ABANDONED_BACKGROUND_SCALE = 0.5 # 배경 모델을 계산할 해상도 비율
+ABANDONED_BACKGROUND_RATE = 0.005 # 학습 후 갱신 1회당 배경 갱신 비율 (0이면 학습 후 고정)
+ABANDONED_BACKGROUND_UPDATE_EVERY = 5 # 배경을 갱신할 프레임 간격 (갱신할 때만 비교용 배경을 다시 만듭니다.)
+
+# 감지기 이름 -> 기본 추론 주기. 정수는 N프레임마다 한 번, 'Xhz'는 초당 최대 X회입니다.
+# 추론하지 않는 프레임은 직전 결과를 재사용하고 상자는 이어 그립니다. (예: {'fire': 3, 'abandoned': '2hz'})
+DETECTOR_POLICIES = {}
+
+# 감지기 이름 -> 생성 함수. 피드 설정은 이 이름들로 감지기를 조합합니다.
+DETECTOR_FACTORIES = {
+    'anomaly': build_anomaly_detector,
+    'smoking': build_smoking_detector,
+    'abandoned': lambda: AbandonedItemDetector(yolo_model=get_yolo('./ai/yolov8n.pt'), tiled=ABANDONED_TILED,
+                                               global_imgsz=ABANDONED_GLOBAL_IMGSZ, tile_size=ABANDONED_TILE_SIZE,
+                                               background=make_background(ABANDONED_BACKGROUND,
+                                                                          scale=ABANDONED_BACKGROUND_SCALE,
+                                                                          learning_rate=ABANDONED_BACKGROUND_RATE,
+                                                                          update_every=ABANDONED_BACKGROUND_UPDATE_EVERY)),
+    'damage': lambda: DamageDetector(yolo_model=get_yolo('./ai/yolov8n.pt'), flow_scale=MOTION_FLOW_SCALE, flow_roi=MOTION_FLOW_ROI),
+    'violence': lambda: ViolenceDetector(yolo_model=get_yolo('./ai/yolov8n.pt'), flow_scale=MOTION_FLOW_SCALE, flow_roi=MOTION_FLOW_ROI),
+    'weak': lambda: WeakDetector(yolo_model=get_yolo('./ai/yolov8n.pt'), flow_scale=MOTION_FLOW_SCALE, flow_roi=MOTION_FLOW_ROI),
+    'fire': build_fire_detector,
+}
+
+# 융합 피드: 하나의 디코딩 스트림에서 여러 감지기를 실행하고 결과를 합쳐서 보냅니다.
+FUSION_DETECTORS = ['violence', 'damage', 'abandoned']
+FUSION_DETECTION_WIDTH = 720 # 공유 YOLO 패스를 실행할 프레임 너비
+
+class FeedConfig:
+    """
+    웹소켓 피드 하나의 설정
+
+    Args:
+        label (str): 로그용 이름
+        source (str): 비디오 파일 경로 또는 RTSP URL
+        detectors (list): DETECTOR_FACTORIES의 감지기 이름 목록. 첫 번째 감지기의 주석 프레임을 송출합니다.
+        payload: payload(results) -> 'response' 이벤트에 함께 보낼 필드 dict
+        detection_width (int): 지정하면 감지기들이 이 너비의 YOLO 패스 하나를 공유합니다.
+        metadata_only (bool): True이면 서버에서 주석을 그리지 않고 원본 프레임과 'overlays'(그리기 명령)를 보냅니다.
+        motion_gate: 움직임 게이트 설정. None이면 MOTION_GATE 기본값, False이면 끄기,
+                     dict이면 MotionGate 인자를 덮어씁니다. (예: {'threshold': 15}로 더 민감하게)
+        policies (dict): 감지기 이름 -> 추론 주기 (DETECTOR_POLICIES를 덮어씁니다. 예: {'fire': 3})
+        flow_roi (bool): 흐름 기반 감지기가 사람 주변 영역에서만 흐름을 계산할지 여부. None이면 MOTION_FLOW_ROI
+    """
+    def __init__(self, label, source, detectors, payload=None, detection_width=None, resize_width=None,
+                 metadata_only=False, motion_gate=None, policies=None, flow_roi=None):
+        self.label = label
+        self.source = source
+        self.detectors = detectors
+        self.payload = payload
+        self.detection_width = detection_width
+        self.resize_width = resize_width
+        self.metadata_only = metadata_only
+        self.motion_gate = motion_gate
+        self.policies = policies or {}
+        self.flow_roi = flow_roi
+
+    def build_detectors(self):
+        detectors = {name: DETECTOR_FACTORIES[name]() for name in self.detectors}
+        if self.flow_roi is not None:
+            for detector in detectors.values():
+                if hasattr(detector, 'flow_roi'):
+                    detector.flow_roi = self.flow_roi
+        return detectors
+
+    def build_motion_gate(self):
+        """이 피드(카메라)의 MotionGate를 만듭니다. 게이트를 끈 경우 None을 반환합니다."""
+        enabled = MOTION_GATE if self.motion_gate is None else bool(self.motion_gate)
+        if not enabled:
+            return None
+        options = dict(threshold=MOTION_GATE_THRESHOLD, min_changed_ratio=MOTION_GATE_MIN_CHANGED,
+                       max_skip=MOTION_GATE_MAX_SKIP)
+        if isinstance(self.motion_gate, dict):
+            options.update(self.motion_gate)
+        return MotionGate(**options)
+
+    def build_policies(self):
+        """이 피드(카메라)의 감지기 이름 -> InferencePolicy를 만듭니다. (ClipAnomalyDetector는 자체 stride 사용)"""
+        specs = {**DETECTOR_POLICIES, **self.policies}
+        return {name: InferencePolicy.parse(spec) for name, spec in specs.items()
+                if name in self.detectors and name != 'anomaly'}
+
+    def build_pipeline(self, publish=None, persist=None, sleep=time.sleep, metadata_only=None):
+        """이 피드의 감지기로 DetectorPipeline을 만듭니다."""
+        return DetectorPipeline(
+            self.build_detectors(),
+            publish=publish,
+            payload=self.payload,
+            persist=persist,
+            resize_width=self.resize_width,
+            sleep=sleep,
+            analysis=StreamAnalysis(detection_width=self.detection_width),
+            metadata_only=self.metadata_only if metadata_only is None else metadata_only,
+            motion_gate=self.build_motion_gate(),
+            policies=self.build_policies(),
+        )
+
+def single_detections(name):
+    return lambda results: {'detections': results[name]}
+
+FEEDS = {
+    '/ws/dashboard_feed': FeedConfig('dashboard anomaly detection', video_list[0], ['anomaly']),
+    '/ws/dashboard_feed_2': FeedConfig('dashboard anomaly detection', video_list[1], ['anomaly']),
+    '/ws/video_feed': FeedConfig(
+        'smoking detection', './uploads/C_3_10_1_BU_DYA_08-04_11-16-33_CC_RGB_DF2_M2.mp4', ['smoking'],
+        payload=lambda results: {'prediction': results['smoking']['prediction']},
+    ),
+    '/ws/abandoned_feed': FeedConfig(
+        'abandoned item detection', './uploads/C_3_11_29_BU_SMC_08-07_16-19-38_CD_RGB_DF2_F1.mp4', ['abandoned'],
+        payload=single_detections('abandoned'),
+    ),
+    '/ws/damage_feed': FeedConfig(
+        'breakage detection', './uploads/C_3_8_1_BU_SMA_09-17_13-38-51_CA_RGB_DF2_M1.mp4', ['damage'],
+        payload=single_detections('damage'),
+    ),
+    '/ws/violence_feed': FeedConfig(
+        'violence detection', './uploads/C_3_13_1_BU_SMA_08-28_14-30-29_CA_RGB_DF2_F1.mp4', ['violence'],
+        payload=single_detections('violence'),
+    ),
+    '/ws/weak_feed': FeedConfig(
+        'weak detection', './uploads/C_3_14_1_BU_DYB_10-11_14-46-58_CB_DF2_M2.mp4', ['weak'],
+        payload=single_detections('weak'),
+    ),
+    # You'll need to provide a suitable video path for fire detection
+    # 화재 피드는 원본 프레임과 그리기 명령을 보내고 대시보드(CameraFeedProcessor)가 캔버스에 그립니다.
+    '/ws/fire_feed': FeedConfig(
+        'fire detection', './uploads/C_3_9_2_BU_SMB_09-02_10-43-45_CA_RGB_DF2_M2.mp4', ['fire'],
+        payload=single_detections('fire'), metadata_only=True,
+    ),
+    # 'detections'는 감지기 이름 -> 결과 dict입니다.
+    '/ws/fusion_feed': FeedConfig(
+        'fused detection', video_list[0], FUSION_DETECTORS,
+        payload=lambda results: {'detections': results},
+        detection_width=FUSION_DETECTION_WIDTH,
+    ),
+}
+
+
+def build_worker_pipeline(namespace, publish, threads=None):
+    """
+    작업 프로세스 안에서 피드의 파이프라인을 만듭니다. (streaming.process_pool이 호출)
+    한 프로세스에 스트림이 하나뿐이므로 스트림 간 배칭은 끄고 블로킹 대기를 사용합니다.
+    """
+    configure(sleep=time.sleep, yolo_batching=False, anomaly_batching=False, anomaly_num_threads=threads)
+    return FEEDS[namespace].build_pipeline(publish=publish)
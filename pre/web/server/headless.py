@@ -0,0 +1,140 @@
+"""
+헤드리스 감지 실행기 (알림/기록 전용)
+
+브라우저 연결 여부와 관계없이 설정된 카메라에 감지기를 계속 적용하고 인시던트만 저장합니다.
+JPEG 인코딩과 송출을 하지 않으며, 기본적으로 주석도 그리지 않습니다. (metadata_only)
+--draw를 주면 저장되는 인시던트 이미지에 주석을 그립니다.
+
+웹 서버(app.py)를 임포트하지 않으므로 Socket.IO, 라우트, 모델 예열 같은 서버 초기화가 실행되지
+않습니다. 인시던트 저장용 DB 연결만 최소 Flask 앱으로 만듭니다. 카메라별 파이프라인은 OS 스레드에서
+실행되고, 오류로 끝나면 대기 시간을 늘려 가며 다시 시작합니다.
+
+사용법 (server 디렉터리에서):
+    python headless.py                                    # feeds.FEEDS의 모든 피드
+    python headless.py --feeds /ws/violence_feed /ws/fire_feed
+    python headless.py --source rtsp://10.0.0.5/stream --detectors violence,damage --camera "Camera 3"
+    python headless.py --source rtsp://10.0.0.5/stream --detectors fire,abandoned --policy fire=3,abandoned=2hz
+"""
+
+import argparse
+import json
+import threading
+import time
+from threading import Event
+
+from feeds import DETECTOR_FACTORIES, FEEDS, FUSION_DETECTION_WIDTH, FeedConfig
+from incident_store import IncidentRecorder
+from streaming.capture_hub import CaptureHub
+from streaming.pacing import PacingController
+
+# 카메라 파이프라인이 오류로 끝나면 RETRY_DELAY초 뒤 다시 시작하고, 연속 실패마다 대기 시간을
+# 두 배로 늘립니다. (최대 RETRY_MAX_DELAY초, 그보다 오래 정상 동작했으면 처음 값으로 되돌립니다.)
+RETRY_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+
+# 헤드리스 실행기는 OS 스레드와 time.sleep을 사용합니다.
+capture_hub = CaptureHub()
+
+
+def create_incident_app():
+    """인시던트 저장에 필요한 최소 Flask 앱 (DB 세션과 이미지 저장 경로만 사용)"""
+    from flask import Flask
+    from extensions import db
+
+    app = Flask(__name__)
+    app.config.from_object('config.BaseConfig')
+    db.init_app(app)
+    with app.app_context():
+        try:
+            db.create_all()
+        except Exception as e:
+            print('> Error: DBMS Table creation exception: ' + str(e))
+    return app
+
+
+def run_camera(camera, config, stop_event, pipelines, recorder, draw=False):
+    """카메라 하나의 감지 파이프라인을 송출 없이 실행합니다. (인시던트 저장만 수행, 실패하면 예외 발생)"""
+    pipeline = config.build_pipeline(persist=recorder.persister(camera, camera=camera),
+                                     sleep=time.sleep, metadata_only=not draw)
+    subscription = capture_hub.subscribe(config.source)
+    pacer = PacingController(subscription.fps)
+    pipelines[camera] = pipeline
+    try:
+        pipeline.run(subscription, stop_event, pacer)
+    finally:
+        subscription.close()
+        print(f"Released video subscription for {camera}")
+
+
+def headless_pipeline_thread(camera, config, stop_event, pipelines, recorder, draw=False):
+    """run_camera()를 stop_event가 설정될 때까지 실행하고, 오류로 끝나면 백오프 후 다시 시작합니다."""
+    delay = RETRY_DELAY
+    while not stop_event.is_set():
+        print(f"Starting headless {config.label} for {camera}")
+        started = time.monotonic()
+        try:
+            run_camera(camera, config, stop_event, pipelines, recorder, draw)
+        except Exception as e:
+            print(f"Headless {config.label} for {camera} stopped due to error: {e}")
+        if stop_event.is_set():
+            break
+        if time.monotonic() - started > RETRY_MAX_DELAY:
+            delay = RETRY_DELAY
+        print(f"Restarting headless {config.label} for {camera} in {delay:.0f}s")
+        stop_event.wait(delay)
+        delay = min(delay * 2, RETRY_MAX_DELAY)
+
+
+def camera_configs(args, parser):
+    """명령행 인자로 카메라 이름 -> FeedConfig를 만듭니다."""
+    if args.source:
+        detectors = [name.strip() for name in args.detectors.split(',') if name.strip()]
+        unknown = [name for name in detectors if name not in DETECTOR_FACTORIES]
+        if not detectors or unknown:
+            parser.error(f"알 수 없는 감지기: {unknown or args.detectors} (사용 가능: {', '.join(DETECTOR_FACTORIES)})")
+        camera = args.camera or args.source
+        policies = dict(item.split('=', 1) for item in args.policy.split(',') if '=' in item) if args.policy else {}
+        return {camera: FeedConfig(f"{'+'.join(detectors)} detection", args.source, detectors,
+                                   detection_width=FUSION_DETECTION_WIDTH if len(detectors) > 1 else None,
+                                   policies=policies)}
+
+    namespaces = args.feeds or list(FEEDS)
+    unknown = [namespace for namespace in namespaces if namespace not in FEEDS]
+    if unknown:
+        parser.error(f"알 수 없는 피드: {unknown} (사용 가능: {', '.join(FEEDS)})")
+    return {namespace: FEEDS[namespace] for namespace in namespaces}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="브라우저 없이 감지기를 실행하고 인시던트만 저장합니다.")
+    parser.add_argument('--feeds', nargs='+', help="실행할 feeds.FEEDS 네임스페이스 (기본값: 전체)")
+    parser.add_argument('--source', help="FEEDS 대신 사용할 비디오 파일 경로 또는 RTSP URL")
+    parser.add_argument('--detectors', default='violence', help="--source에 적용할 감지기 이름 (쉼표로 구분)")
+    parser.add_argument('--camera', help="--source의 카메라 이름 (인시던트의 camera 값)")
+    parser.add_argument('--policy', help="--source 감지기별 추론 주기 (예: fire=3,abandoned=2hz)")
+    parser.add_argument('--draw', action='store_true', help="인시던트 이미지에 주석을 그립니다.")
+    parser.add_argument('--stats-interval', type=float, default=60.0, help="파이프라인 통계 출력 간격(초), 0이면 출력 안 함")
+    args = parser.parse_args()
+
+    configs = camera_configs(args, parser)
+    recorder = IncidentRecorder(create_incident_app())
+    stop_event = Event()
+    pipelines = {}
+    for camera, config in configs.items():
+        threading.Thread(target=headless_pipeline_thread, name=f"headless {camera}", daemon=True,
+                         args=(camera, config, stop_event, pipelines, recorder, args.draw)).start()
+
+    try:
+        while True:
+            time.sleep(args.stats_interval or 60.0)
+            if args.stats_interval:
+                stats = {camera: pipeline.stats() for camera, pipeline in list(pipelines.items())}
+                print(json.dumps({'sources': capture_hub.stats(), 'pipelines': stats}, ensure_ascii=False))
+    except KeyboardInterrupt:
+        print("Stopping headless pipelines...")
+        stop_event.set()
+        time.sleep(1.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+인시던트 자동 저장
+
+감지 결과가 INCIDENT_RULES에 해당하면 쿨다운을 확인한 뒤 이미지 파일과 Incidents 레코드를
+저장합니다. 웹소켓 피드(app.py)와 헤드리스 실행기(headless.py)가 함께 사용합니다.
+"""
+
+import os
+import time
+
+import cv2
+
+from models import Incidents
+
+INCIDENT_SAVE_COOLDOWN = 30 # seconds
+
+# 감지기 이름 -> (인시던트 유형, 모듈 이름, 결과 -> 인시던트 여부)
+INCIDENT_RULES = {
+    'smoking': ("Smoking", "SmokingDetector", lambda result: result['is_smoking']),
+    'abandoned': ("Abandoned Item", "AbandonedItemDetector", lambda result: result.get('abandoned_items')),
+    'damage': ("Damage", "DamageDetector", lambda result: result.get('is_danger')),
+    'violence': ("Violence", "ViolenceDetector", lambda result: result.get('is_violence')),
+    'weak': ("Weak User", "WeakDetector", lambda result: result.get('is_weak')),
+    'fire': ("Fire", "FireDetector", lambda result: result.get('is_fire')),
+}
+
+
+class IncidentRecorder:
+    """
+    Args:
+        app: Flask 앱 (DB 세션용 app_context와 이미지 저장 경로 root_path)
+        cooldown (float): 같은 (피드, 유형)의 인시던트를 다시 저장하기까지의 최소 간격(초)
+    """
+
+    def __init__(self, app, cooldown=INCIDENT_SAVE_COOLDOWN, image_dir='incident_images'):
+        self.app = app
+        self.cooldown = cooldown
+        self.image_dir = image_dir
+        self.last_incident_time = {} # 인시던트 저장 쿨다운을 관리하기 위한 딕셔너리
+
+    def save_incident_if_needed(self, sid, incident_type, module_name, frame, camera="Camera 1"):
+        """쿨다운을 확인하고 데이터베이스에 인시던트를 저장하고, 필요한 경우 이미지도 저장합니다."""
+        now = time.time()
+        last_saved_key = f"{sid}_{incident_type.lower().replace(' ', '_')}"
+        last_saved = self.last_incident_time.get(last_saved_key, 0)
+        if now - last_saved <= self.cooldown:
+            return False
+        with self.app.app_context():
+            try:
+                # 이미지 저장
+                image_filename = f"{incident_type.lower().replace(' ', '_')}_{int(now)}.jpg"
+                image_path_relative = os.path.join(self.image_dir, image_filename).replace('\\', '/')
+                full_image_path = os.path.join(self.app.root_path, image_path_relative)
+                os.makedirs(os.path.dirname(full_image_path), exist_ok=True)
+                if isinstance(frame, (bytes, bytearray)): # 작업 프로세스가 보낸 JPEG 바이트
+                    with open(full_image_path, 'wb') as f:
+                        f.write(frame)
+                else:
+                    cv2.imwrite(full_image_path, frame)
+
+                # 데이터베이스에 인시던트 저장
+                incident = Incidents(
+                    type=incident_type,
+                    module=module_name,
+                    camera=camera,
+                    status="Active",
+                    image_path=image_path_relative
+                )
+                incident.save()
+                self.last_incident_time[last_saved_key] = now
+                print(f"Incident saved: {incident_type} detected by {sid} with image {image_path_relative}")
+                return True
+            except Exception as db_e:
+                print(f"Error saving {incident_type} incident to DB: {db_e}")
+                return False
+
+    def persister(self, sid, camera="Camera 1"):
+        """DetectorPipeline/WorkerPipeline의 persist(display 또는 JPEG 바이트, results) 훅을 만듭니다."""
+        def persist(display, results):
+            for name, result in results.items():
+                rule = INCIDENT_RULES.get(name)
+                if rule and result and rule[2](result):
+                    incident_type, module_name, _ = rule
+                    self.save_incident_if_needed(sid, incident_type, module_name, display, camera)
+        return persist
@@ -1,11 +1,13 @@
 import os
 
 from sqlalchemy import text
-from app import db, app
+from app import db, app, initialize_database, create_roles
 
 result = os.scandir("seed")
 
 with app.app_context():
+    initialize_database()
+    create_roles()
     for item in result:
         if item.is_file:
             sql = open(item.path, "r")
@@ -0,0 +1,315 @@
+"""
+소스(업로드 파일 경로 / RTSP URL)별 공유 캡처 허브
+
+같은 소스를 보는 모든 웹소켓 세션이 하나의 cv2.VideoCapture 디코더를 공유합니다.
+프레임은 공유 메모리 링(streaming/frame_ring.py)의 슬롯에 바로 디코딩되고, 구독자는 각자의
+커서로 복사 없이 읽어 갑니다. 작업 프로세스도 같은 링에 연결해 읽을 수 있습니다.
+마지막 구독자가 해제되면 디코딩 루프가 종료되고 캡처와 링이 해제됩니다.
+
+링 슬롯 크기는 처음 디코딩한 프레임으로 정합니다. 해상도가 바뀌면 (라이브 재연결 등) 새 크기의
+링을 만들고, 구독자는 다음 읽기에서 새 링으로 옮겨 갑니다.
+"""
+
+import threading
+import time
+
+import cv2
+
+from streaming.frame_ring import SharedFrameRing, create_lock
+
+
+class SourceClosedError(IOError):
+    """디코딩 루프가 오류로 끝나 구독한 소스에서 더 이상 프레임이 오지 않을 때 발생합니다."""
+
+
+def _is_live_source(source):
+    """RTSP/HTTP 등 URL 소스인지 확인합니다. (파일은 되감기, 라이브는 재연결)"""
+    return '://' in str(source)
+
+
+class FrameSubscription:
+    """하나의 소스에 대한 구독자 핸들. 구독자별 읽기 커서(링 리더)를 가집니다."""
+
+    def __init__(self, hub, source):
+        self._hub = hub
+        self._source = source
+        self._reader = source.ring.reader()
+        self.closed = False
+
+    def _follow_ring(self):
+        """소스가 링을 다시 만들었으면 (해상도 변경) 리더를 새 링으로 옮깁니다."""
+        ring = self._source.ring
+        if self._reader.ring is not ring and not self._source.closed:
+            self._reader.close()
+            self._reader = ring.reader()
+
+    @property
+    def source(self):
+        return self._source.key
+
+    @property
+    def fps(self):
+        return self._source.fps
+
+    @property
+    def ring_name(self):
+        """작업 프로세스가 SharedFrameRing.attach()로 연결할 공유 메모리 이름 (링을 다시 만들면 바뀝니다.)"""
+        self._follow_ring()
+        return self._reader.ring.name
+
+    @property
+    def ring_lock(self):
+        """링의 프로세스 간 공유 잠금 (소스가 링을 다시 만들어도 같은 잠금을 씁니다.)"""
+        return self._source.lock
+
+    @property
+    def reader_index(self):
+        """이 구독의 링 리더 칸 (작업 프로세스는 ring.reader(reader_index)로 이 커서를 이어받습니다.)"""
+        self._follow_ring()
+        return self._reader.index
+
+    @property
+    def ended(self):
+        """소스의 디코딩 루프가 끝나 더 이상 프레임이 오지 않는지 여부"""
+        return self._source.closed
+
+    def ensure_open(self):
+        """
+        Raises:
+            SourceClosedError: 소스의 디코딩 루프가 끝난 경우
+        """
+        if self._source.closed:
+            raise SourceClosedError(f"Capture source {self.source} stopped: {self._source.error}")
+
+    def read(self):
+        """
+        커서 이후의 다음 프레임을 반환합니다. 새 프레임이 없으면 None을 반환합니다.
+        구독자가 너무 느려 링에서 밀려난 경우 남아 있는 가장 오래된 프레임으로 건너뜁니다.
+
+        반환된 image 배열은 모든 구독자가 공유하는 링 슬롯 뷰이므로 수정하면 안 되며,
+        다음 read()/read_latest() 전까지만 유효합니다. 그리기나 보관이 필요하면 호출자가 copy() 해야 합니다.
+
+        Raises:
+            SourceClosedError: 소스의 디코딩 루프가 끝난 경우
+        """
+        self.ensure_open()
+        self._follow_ring()
+        return self._reader.read()
+
+    def read_latest(self):
+        """가장 최근 프레임만 반환합니다. (중간 프레임은 건너뜀)"""
+        self.ensure_open()
+        self._follow_ring()
+        return self._reader.read_latest()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._reader.close()
+            self._hub._release(self._source)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _CaptureSource:
+    """단일 소스의 디코딩 루프와 공유 메모리 링"""
+
+    def __init__(self, key, cap, ring_size, max_readers):
+        """
+        Raises:
+            IOError: 첫 프레임을 디코딩할 수 없는 경우 (슬롯 크기를 정할 수 없음)
+        """
+        self.key = key
+        self.cap = cap
+        self.live = _is_live_source(key)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else 30.0
+        ret, frame = cap.read()
+        if not ret:
+            raise IOError(f"Could not decode a frame from {key}")
+        self.shape = frame.shape
+        self.lock = create_lock() # 링을 다시 만들어도 작업 프로세스가 같은 잠금을 쓰도록 소스가 가집니다.
+        self.ring = SharedFrameRing(slots=ring_size, slot_bytes=frame.nbytes, max_readers=max_readers, lock=self.lock)
+        self.dropped = 0 # 이전 링들에서 쓰지 못한 프레임 수
+        self.epoch = 0
+        self.refcount = 0
+        self.closed = False # 디코딩 루프가 끝났는지 여부 (구독자는 SourceClosedError를 받습니다.)
+        self.error = None
+        self.ring.write(frame, self.epoch)
+
+    @property
+    def seq(self):
+        return self.ring.seq
+
+    @property
+    def ring_dropped(self):
+        return self.dropped + self.ring.dropped
+
+    def _resize_ring(self, frame):
+        """새 프레임 크기로 링을 다시 만듭니다. 이전 링은 닫히고 구독자는 다음 읽기에서 옮겨 갑니다."""
+        old = self.ring
+        self.ring = SharedFrameRing(slots=old.slots, slot_bytes=frame.nbytes, max_readers=old.max_readers,
+                                    lock=self.lock, seq=old.seq)
+        self.dropped += old.dropped
+        print(f"Resized frame ring for {self.key}: {self.shape} -> {frame.shape}")
+        old.close()
+
+    def read_frame(self):
+        """
+        다음 프레임을 링의 빈 슬롯에 바로 디코딩합니다. 캡처 실패 시 False를 반환합니다.
+        해상도가 바뀌면 (라이브 재연결 등) 새 크기의 링을 만들어 그 프레임을 복사해 넣습니다.
+        """
+        slot, view = self.ring.claim(self.shape)
+        ret, frame = self.cap.read(view) if view is not None else self.cap.read()
+        if not ret:
+            return False
+        if view is not None and frame.ctypes.data == view.ctypes.data:
+            self.ring.commit(slot, frame.shape, self.epoch)
+        else:
+            if frame.nbytes != self.ring.slot_bytes:
+                self._resize_ring(frame)
+            self.shape = frame.shape
+            self.ring.write(frame, self.epoch)
+        return True
+
+    def close(self):
+        self.closed = True
+        self.cap.release()
+        self.ring.close()
+
+
+class CaptureHub:
+    """
+    소스 경로/URL을 키로 디코더를 공유하는 캡처 허브
+
+    Args:
+        start_task: 백그라운드 작업 실행 함수. (예: socketio.start_background_task)
+                    None이면 데몬 스레드를 사용합니다.
+        sleep: 협조적 대기 함수. (예: socketio.sleep) None이면 time.sleep을 사용합니다.
+        ring_size (int): 소스별 공유 메모리 링의 프레임 슬롯 수입니다.
+        max_readers (int): 소스별로 동시에 붙을 수 있는 구독자 수입니다.
+        reconnect_delay (float): 라이브 소스 읽기 실패 시 재연결 대기 시간(초)입니다. 연속 실패마다 두 배로
+                                 늘어나며, 파일 소스의 재시도 대기 시간 상한이기도 합니다.
+        max_read_failures (int): 연속으로 이 횟수만큼 프레임을 읽지 못하면 소스를 닫습니다. (빈 파일, 끊긴 카메라 등)
+    """
+
+    def __init__(self, start_task=None, sleep=None, ring_size=8, max_readers=32, reconnect_delay=2.0,
+                 max_read_failures=10):
+        self._start_task = start_task or self._start_thread
+        self._sleep = sleep or time.sleep
+        self.ring_size = ring_size
+        self.max_readers = max_readers
+        self.reconnect_delay = reconnect_delay
+        self.max_read_failures = max_read_failures
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _start_thread(target, *args, **kwargs):
+        thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+
+    def subscribe(self, source):
+        """
+        소스를 구독합니다. 첫 구독자일 때 캡처를 열고 디코딩 루프를 시작합니다.
+
+        Raises:
+            IOError: 소스를 열 수 없거나 첫 프레임을 디코딩할 수 없는 경우
+        """
+        key = str(source)
+        with self._lock:
+            entry = self._sources.get(key)
+            if entry is not None:
+                entry.refcount += 1
+                return FrameSubscription(self, entry)
+
+        cap = cv2.VideoCapture(key)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video stream from {key}")
+        try:
+            opened = _CaptureSource(key, cap, self.ring_size, self.max_readers)
+        except Exception:
+            cap.release()
+            raise
+
+        with self._lock:
+            entry = self._sources.get(key)
+            if entry is not None:
+                # 여는 동안 다른 구독자가 먼저 등록한 경우
+                opened.close()
+            else:
+                entry = opened
+                self._sources[key] = entry
+                self._start_task(self._decode_loop, entry)
+            entry.refcount += 1
+        print(f"Subscribed to capture source {key} (subscribers: {entry.refcount})")
+        return FrameSubscription(self, entry)
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refcount = max(0, entry.refcount - 1)
+        print(f"Unsubscribed from capture source {entry.key} (subscribers: {entry.refcount})")
+
+    def _should_stop(self, entry):
+        with self._lock:
+            if entry.refcount == 0:
+                if self._sources.get(entry.key) is entry:
+                    del self._sources[entry.key]
+                return True
+        return False
+
+    def _decode_loop(self, entry):
+        """소스당 하나만 실행되는 디코딩 루프"""
+        print(f"Starting capture decode loop for {entry.key}")
+        frame_interval = 1.0 / entry.fps
+        failures = 0 # 연속으로 읽지 못한 횟수
+        try:
+            while not self._should_stop(entry):
+                started = time.time()
+                if not entry.read_frame():
+                    failures += 1
+                    if failures > self.max_read_failures:
+                        raise IOError(f"no frames after {self.max_read_failures} attempts")
+                    if entry.live:
+                        print(f"Lost live stream {entry.key}, reconnecting.")
+                        entry.cap.release()
+                        self._sleep(self.reconnect_delay * 2 ** (failures - 1))
+                        entry.cap = cv2.VideoCapture(entry.key)
+                    else:
+                        # 파일 끝이면 처음부터 다시 재생합니다. 되감아도 읽히지 않는 파일(빈 파일, 탐색 불가 등)은
+                        # 대기 시간을 늘려 가며 재시도해 다른 작업을 굶기지 않습니다.
+                        entry.cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # 비디오 루프
+                        entry.epoch += 1
+                        self._sleep(min(self.reconnect_delay, frame_interval * 2 ** (failures - 1)))
+                    continue
+                failures = 0
+
+                # 파일 소스는 원본 FPS에 맞춰 재생, 라이브 소스는 read()가 자연스럽게 대기합니다.
+                if entry.live:
+                    self._sleep(0)
+                else:
+                    self._sleep(max(0.0, frame_interval - (time.time() - started)))
+        except Exception as e:
+            print(f"Capture decode loop for {entry.key} stopped due to error: {e}")
+            entry.error = e
+            with self._lock:
+                if self._sources.get(entry.key) is entry:
+                    del self._sources[entry.key]
+        finally:
+            # 링을 닫기 전에 표시해 남은 구독자가 닫힌 링 대신 SourceClosedError를 받게 합니다.
+            entry.close()
+            print(f"Released shared video capture for {entry.key}")
+
+    def stats(self):
+        """소스별 구독자 수, 디코딩된 프레임 수와 링에 쓰지 못한 프레임 수를 반환합니다."""
+        with self._lock:
+            return {
+                key: {'subscribers': entry.refcount, 'frames_decoded': entry.seq, 'fps': entry.fps,
+                      'ring_dropped': entry.ring_dropped}
+                for key, entry in self._sources.items()
+            }
@@ -0,0 +1,222 @@
+"""
+주석 프레임 인코딩 1회 팬아웃
+
+(네임스페이스, 소스)마다 파이프라인을 하나만 실행합니다. 파이프라인은 감지/주석/JPEG 인코딩을
+한 번 수행하고, 같은 피드를 보는 모든 뷰어는 Socket.IO 룸으로 같은 버퍼를 받습니다.
+뷰어별 비용은 전체 파이프라인이 아니라 소켓 쓰기 한 번입니다.
+
+느린 뷰어는 송신 큐가 max_queue를 넘으면 그 프레임을 건너뜁니다. (최신 프레임 우선)
+큐가 비워지면 다음 프레임부터 다시 받으므로 메모리와 지연이 큐 길이로 제한됩니다.
+"""
+
+import threading
+import time
+from threading import Event
+
+from flask_socketio import join_room, leave_room
+
+from streaming.transport import build_frame_payload
+
+
+def room_name(namespace, source, mode):
+    return f"{namespace}|{source}|{mode}"
+
+
+class Viewer:
+    """피드를 보는 한 세션의 전송 모드와 송신 통계"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.sent = 0
+        self.dropped = 0
+        self.queue_depth = 0
+        self.achieved_fps = 0.0
+        self._last_sent = None
+
+    def mark_sent(self, now):
+        if self._last_sent is not None and now > self._last_sent:
+            self.achieved_fps += 0.1 * (1.0 / (now - self._last_sent) - self.achieved_fps)
+        self._last_sent = now
+        self.sent += 1
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'queue_depth': self.queue_depth,
+            'achieved_fps': round(self.achieved_fps, 2),
+        }
+
+
+class Feed:
+    """하나의 (네임스페이스, 소스) 파이프라인과 그 뷰어 목록"""
+
+    def __init__(self, publisher, namespace, source):
+        self._publisher = publisher
+        self.namespace = namespace
+        self.source = source
+        self.stop_event = Event()
+        self.viewers = {} # sid -> Viewer
+        self.pacer = None # 처리 루프가 PacingController를 설정합니다. (통계용)
+        self.pipeline = None # 처리 루프가 DetectorPipeline을 설정합니다. (통계용)
+
+    @property
+    def name(self):
+        return f"{self.namespace} ({self.source})"
+
+    def publish(self, jpeg_buffer, **fields):
+        """
+        인코딩된 프레임을 모든 뷰어에게 보냅니다. 페이로드는 전송 모드별로 한 번만 만들고,
+        송신 큐가 밀린 뷰어는 이번 프레임에서 제외합니다.
+        """
+        publisher = self._publisher
+        now = time.monotonic()
+        viewers = list(self.viewers.items())
+        for mode in {viewer.mode for _, viewer in viewers}:
+            receivers, backlogged = [], []
+            for sid, viewer in viewers:
+                if viewer.mode != mode:
+                    continue
+                viewer.queue_depth = publisher.queue_depth(sid, self.namespace)
+                if viewer.queue_depth > publisher.max_queue:
+                    viewer.dropped += 1
+                    backlogged.append(sid)
+                else:
+                    receivers.append(viewer)
+            if not receivers:
+                continue
+            payload = build_frame_payload(jpeg_buffer, mode, **fields)
+            publisher.socketio.emit('response', payload, namespace=self.namespace,
+                                    room=room_name(self.namespace, self.source, mode),
+                                    skip_sid=backlogged or None)
+            for viewer in receivers:
+                viewer.mark_sent(now)
+
+    def stats(self):
+        return {
+            'viewers': {sid: viewer.stats() for sid, viewer in list(self.viewers.items())},
+            'pacing': self.pacer.stats() if self.pacer else None,
+            'pipeline': self.pipeline.stats() if self.pipeline else None,
+        }
+
+
+class FeedPublisher:
+    """
+    피드 파이프라인의 시작/종료와 뷰어의 룸 입장/퇴장을 관리합니다.
+
+    Args:
+        socketio: flask_socketio.SocketIO 인스턴스
+        transport: 뷰어별 전송 모드를 제공하는 FrameTransport
+        max_queue (int): 뷰어별 송신 대기 패킷이 이 값을 넘으면 프레임을 건너뜁니다.
+    """
+
+    def __init__(self, socketio, transport, max_queue=4):
+        self.socketio = socketio
+        self.transport = transport
+        self.max_queue = max_queue
+        self._feeds = {}
+        self._viewer_feeds = {} # (namespace, sid) -> Feed
+        self._lock = threading.Lock()
+
+    def join(self, sid, namespace, source, target, **target_kwargs):
+        """
+        뷰어를 피드에 추가합니다. 피드의 첫 뷰어이면 파이프라인을 시작합니다.
+        (연결 핸들러 안에서 호출해야 합니다.)
+
+        target은 target(video_path=source, stop_event=..., feed=..., **target_kwargs)로 호출됩니다.
+        """
+        self.leave(sid, namespace)
+        mode = self.transport.mode(sid, namespace)
+        with self._lock:
+            key = (namespace, source)
+            feed = self._feeds.get(key)
+            start = feed is None
+            if start:
+                feed = Feed(self, namespace, source)
+                self._feeds[key] = feed
+            feed.viewers[sid] = Viewer(mode)
+            self._viewer_feeds[(namespace, sid)] = feed
+        join_room(room_name(namespace, source, mode), sid=sid, namespace=namespace)
+        print(f"Viewer {sid} joined feed {feed.name} (viewers: {len(feed.viewers)})")
+        if start:
+            self.socketio.start_background_task(target=target, video_path=source, stop_event=feed.stop_event,
+                                                feed=feed, **target_kwargs)
+        return feed
+
+    def leave(self, sid, namespace):
+        """뷰어를 피드에서 제거합니다. 마지막 뷰어였다면 파이프라인을 멈춥니다."""
+        with self._lock:
+            feed = self._viewer_feeds.pop((namespace, sid), None)
+            if feed is None:
+                return
+            viewer = feed.viewers.pop(sid, None)
+            mode = viewer.mode if viewer else None
+            if not feed.viewers:
+                feed.stop_event.set()
+                self._feeds.pop((feed.namespace, feed.source), None)
+        try:
+            leave_room(room_name(namespace, feed.source, mode), sid=sid, namespace=namespace)
+        except Exception:
+            pass # 이미 연결이 끊긴 경우
+        print(f"Viewer {sid} left feed {feed.name} (viewers: {len(feed.viewers)})")
+        if feed.stop_event.is_set():
+            print(f"Stopped feed pipeline {feed.name}")
+
+    def end(self, feed, reason=None):
+        """
+        파이프라인이 끝난 피드를 정리합니다. (처리 스레드가 종료될 때 호출합니다.)
+        남은 뷰어에게 'feed_ended'를 보내고 룸에서 내보내므로, 다음 join()은 새 파이프라인을 시작합니다.
+        """
+        with self._lock:
+            if self._feeds.get((feed.namespace, feed.source)) is feed:
+                del self._feeds[(feed.namespace, feed.source)]
+            viewers = list(feed.viewers.items())
+            feed.viewers.clear()
+            for sid, _ in viewers:
+                if self._viewer_feeds.get((feed.namespace, sid)) is feed:
+                    del self._viewer_feeds[(feed.namespace, sid)]
+            feed.stop_event.set()
+        if not viewers:
+            return
+        message = {'message': reason or f"feed {feed.name} stopped"}
+        for mode in {viewer.mode for _, viewer in viewers}:
+            self.socketio.emit('feed_ended', message, namespace=feed.namespace,
+                               room=room_name(feed.namespace, feed.source, mode))
+        for sid, viewer in viewers:
+            try:
+                # 처리 스레드에는 요청 컨텍스트가 없으므로 Socket.IO 서버에서 직접 룸을 나갑니다.
+                self.socketio.server.leave_room(sid, room_name(feed.namespace, feed.source, viewer.mode),
+                                                namespace=feed.namespace)
+            except Exception:
+                pass # 이미 연결이 끊긴 경우
+        print(f"Ended feed {feed.name}; notified {len(viewers)} viewer(s)")
+
+    def update_mode(self, sid, namespace):
+        """뷰어의 전송 모드가 바뀌면 해당 모드의 룸으로 옮깁니다."""
+        feed = self._viewer_feeds.get((namespace, sid))
+        if feed is None:
+            return
+        viewer = feed.viewers.get(sid)
+        new_mode = self.transport.mode(sid, namespace)
+        if viewer is None or viewer.mode == new_mode:
+            return
+        leave_room(room_name(namespace, feed.source, viewer.mode), sid=sid, namespace=namespace)
+        join_room(room_name(namespace, feed.source, new_mode), sid=sid, namespace=namespace)
+        viewer.mode = new_mode
+
+    def queue_depth(self, sid, namespace):
+        """뷰어의 Engine.IO 송신 큐에 쌓인 패킷 수를 반환합니다. 알 수 없으면 0입니다."""
+        try:
+            server = self.socketio.server
+            eio_sid = server.manager.eio_sid_from_sid(sid, namespace)
+            eio_socket = server.eio.sockets.get(eio_sid)
+            return eio_socket.queue.qsize() if eio_socket is not None else 0
+        except Exception:
+            return 0
+
+    def stats(self):
+        """피드별 뷰어 송신 통계(FPS, 큐 길이, 드롭 수)와 처리 페이싱 통계를 반환합니다."""
+        with self._lock:
+            feeds = list(self._feeds.values())
+        return {feed.name: feed.stats() for feed in feeds}
@@ -0,0 +1,267 @@
+"""
+공유 메모리 고정 슬롯 프레임 링
+
+multiprocessing.shared_memory 블록 하나에 헤더와 고정 크기 프레임 슬롯을 둡니다.
+쓰는 쪽(CaptureHub 디코딩 루프)은 슬롯에 바로 디코딩하고, 읽는 쪽(같은 프로세스의 파이프라인
+또는 작업 프로세스)은 자기 커서로 슬롯을 복사 없이 numpy 뷰로 읽습니다.
+
+- 슬롯 헤더: seq(0이면 비어 있거나 쓰는 중), epoch, 프레임 shape, timestamp
+- 리더 테이블: 리더별 커서와 고정(pin)된 seq. 쓰는 쪽은 고정된 슬롯을 덮어쓰지 않으므로
+  리더가 받은 뷰는 다음 read()/release() 전까지 유효합니다. 링을 닫아도 이 프로세스의 리더가
+  고정한 뷰가 남아 있으면 매핑은 마지막 고정이 풀릴 때 해제합니다. (numpy 뷰는 매핑을 붙잡지 않습니다.)
+
+슬롯 선택/무효화/공개와 리더의 고정은 프로세스 간 공유 잠금(lock) 안에서 합니다. 잠금이 메모리
+장벽 역할도 하므로 다른 프로세스의 저장/로드 순서가 바뀌어도 쓰는 쪽이 고정된 슬롯을 덮어쓰지 않습니다.
+프레임 데이터 복사/디코딩은 잠금 밖에서 합니다. (무효화된 슬롯은 리더가 고르지 않습니다.)
+작업 프로세스는 링 이름과 함께 같은 잠금을 넘겨받아 attach()합니다.
+"""
+
+import multiprocessing as mp
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# seq: 소스 내 단조 증가 번호, epoch: 파일 소스가 처음부터 다시 재생될 때마다 증가
+CapturedFrame = namedtuple('CapturedFrame', ['seq', 'image', 'timestamp', 'epoch'])
+
+_META = 4 # write_seq, slots, slot_bytes, max_readers
+_SLOT_FIELDS = 5 # seq, epoch, h, w, c
+_READER_FIELDS = 3 # active, cursor, pinned
+
+
+# 쓰지 못한 프레임을 처음과 이 개수마다 로그로 남깁니다.
+DROP_LOG_EVERY = 100
+
+
+def create_lock():
+    """링과 작업 프로세스가 공유할 잠금. (spawn 작업자에게 Process 인자로 넘길 수 있습니다.)"""
+    return mp.get_context('spawn').Lock()
+
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+
+class SharedFrameRing:
+    """
+    Args:
+        slots (int): 프레임 슬롯 수
+        slot_bytes (int): 슬롯 하나의 크기 (이보다 큰 프레임은 쓸 수 없습니다.)
+        max_readers (int): 동시에 붙을 수 있는 리더 수
+        name (str): 지정하면 다른 프로세스가 만든 링에 연결합니다. (attach 참고)
+        lock: 프로세스 간 공유 잠금. 만들 때 None이면 새로 만들고, 연결할 때는 만든 쪽의 잠금을 넘겨야 합니다.
+        seq (int): 첫 프레임 seq의 기준값. 링을 다시 만들 때 이전 링의 seq를 넘기면 번호가 이어집니다.
+    """
+
+    def __init__(self, slots=8, slot_bytes=1920 * 1080 * 3, max_readers=32, name=None, lock=None, seq=0):
+        self.lock = lock if lock is not None else create_lock()
+        if name is None:
+            header = self._header_bytes(slots, max_readers)
+            self._shm = shared_memory.SharedMemory(create=True, size=header + slots * slot_bytes)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        buf = self._shm.buf
+        self._meta = np.ndarray((_META,), dtype=np.int64, buffer=buf)
+        if self._owner:
+            self._meta[:] = (seq, slots, slot_bytes, max_readers)
+        self.slots, self.slot_bytes, self.max_readers = (int(v) for v in self._meta[1:])
+        offset = _META * 8
+        self._slot_table = np.ndarray((self.slots, _SLOT_FIELDS), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._slot_table.nbytes
+        self._timestamps = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self._timestamps.nbytes
+        self._readers = np.ndarray((self.max_readers, _READER_FIELDS), dtype=np.int64, buffer=buf, offset=offset)
+        self._data_offset = self._header_bytes(self.slots, self.max_readers)
+        if self._owner:
+            self._slot_table[:] = 0
+            self._readers[:] = 0
+        self._name = self._shm.name
+        self._local_pins = set() # 이 프로세스의 리더가 고정한 리더 칸 (뷰를 아직 쓰고 있을 수 있음)
+        self._next_slot = 0
+        self.dropped = 0 # 모든 슬롯이 고정되어 있거나 너무 커서 쓰지 못한 프레임 수
+
+    @staticmethod
+    def _header_bytes(slots, max_readers):
+        return _align(8 * (_META + slots * _SLOT_FIELDS + slots + max_readers * _READER_FIELDS))
+
+    @classmethod
+    def attach(cls, name, lock):
+        """다른 프로세스가 만든 링에 연결합니다. lock은 만든 쪽의 SharedFrameRing.lock입니다."""
+        return cls(name=name, lock=lock)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def seq(self):
+        return int(self._meta[0])
+
+    def _drop(self, reason):
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % DROP_LOG_EVERY == 0:
+            print(f"Frame ring {self.name} dropped a frame ({reason}); {self.dropped} dropped so far")
+
+    def _view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf,
+                          offset=self._data_offset + slot * self.slot_bytes)
+
+    # --- 쓰기 (프로세스당 쓰는 쪽은 하나) ---
+    def claim(self, shape):
+        """
+        다음 프레임을 쓸 슬롯을 잡고 (slot, 쓰기용 뷰)를 반환합니다. 리더가 고정한 슬롯은 건너뜁니다.
+        쓸 수 있는 슬롯이 없거나 프레임이 슬롯보다 크면 (None, None)을 반환합니다.
+        """
+        if int(np.prod(shape)) > self.slot_bytes:
+            self._drop(f"{shape} does not fit {self.slot_bytes} bytes per slot")
+            return None, None
+        with self.lock:
+            pinned = self._readers[(self._readers[:, 0] == 1) & (self._readers[:, 2] != 0), 2]
+            for i in range(self.slots):
+                slot = (self._next_slot + i) % self.slots
+                seq = self._slot_table[slot, 0]
+                if seq and seq in pinned:
+                    continue
+                self._slot_table[slot, 0] = 0 # 쓰는 동안 리더가 고르지 않도록 무효화합니다.
+                self._next_slot = (slot + 1) % self.slots
+                return slot, self._view(slot, shape)
+        self._drop("all slots pinned by readers")
+        return None, None
+
+    def commit(self, slot, shape, epoch, timestamp=None):
+        """claim()한 슬롯에 쓴 프레임을 공개하고 seq를 반환합니다."""
+        seq = int(self._meta[0]) + 1
+        h, w, c = shape if len(shape) == 3 else (shape[0], shape[1], 1)
+        with self.lock:
+            self._slot_table[slot, 1:] = (epoch, h, w, c)
+            self._timestamps[slot] = time.time() if timestamp is None else timestamp
+            self._slot_table[slot, 0] = seq
+            self._meta[0] = seq
+        return seq
+
+    def write(self, image, epoch, timestamp=None):
+        """이미 디코딩된 프레임을 복사해 넣습니다. 쓰지 못했으면 None을 반환합니다."""
+        slot, view = self.claim(image.shape)
+        if slot is None:
+            return None
+        view[...] = image
+        return self.commit(slot, image.shape, epoch, timestamp)
+
+    def reader(self, index=None):
+        """리더를 등록하고 RingReader를 반환합니다. index를 주면 (다른 프로세스에서) 그 리더 칸을 사용합니다."""
+        if index is None:
+            with self.lock:
+                free = np.flatnonzero(self._readers[:, 0] == 0)
+                if not len(free):
+                    raise RuntimeError(f"frame ring {self.name} has no free reader slots")
+                index = int(free[0])
+                self._readers[index] = (1, 0, 0)
+        return RingReader(self, index)
+
+    def close(self):
+        """
+        링을 닫습니다. 만든 쪽이면 공유 메모리 이름도 해제합니다. 이 프로세스의 리더가 고정한 뷰가
+        남아 있으면 매핑은 마지막 release()/close()에서 해제합니다.
+        """
+        with self.lock: # 다른 스레드의 리더가 읽는 도중에 표를 치우지 않습니다.
+            if self._readers is None:
+                return
+            self._meta = self._slot_table = self._timestamps = self._readers = None
+            if self._owner:
+                self._shm.unlink()
+            shm = self._detach_if_unused()
+        if shm is not None:
+            shm.close()
+
+    def _detach_if_unused(self):
+        """닫혔고 고정된 뷰가 없으면 매핑을 떼어 반환합니다. (잠금 안에서 호출)"""
+        if self._readers is None and not self._local_pins and self._shm is not None:
+            shm, self._shm = self._shm, None
+            return shm
+        return None
+
+    def _unpin(self, index, free=False):
+        """리더 칸의 고정을 풉니다. free=True이면 리더 칸도 반환합니다."""
+        with self.lock:
+            if self._readers is not None:
+                if free:
+                    self._readers[index] = 0
+                else:
+                    self._readers[index, 2] = 0
+            self._local_pins.discard(index)
+            shm = self._detach_if_unused()
+        if shm is not None:
+            shm.close()
+
+    def stats(self):
+        with self.lock:
+            readers = int(np.sum(self._readers[:, 0] == 1)) if self._readers is not None else 0
+        return {
+            'slots': self.slots,
+            'slot_bytes': self.slot_bytes,
+            'readers': readers,
+            'dropped': self.dropped,
+        }
+
+
+class RingReader:
+    """
+    SharedFrameRing의 리더 핸들. 리더별 커서를 가지며 FrameSubscription과 같은 read()/read_latest()를 제공합니다.
+
+    반환된 image는 공유 메모리 뷰이므로 수정하면 안 되고, 다음 read()/read_latest()/release()
+    전까지만 유효합니다. 그 이후에도 필요하면 호출자가 copy() 해야 합니다.
+    """
+
+    def __init__(self, ring, index):
+        self.ring = ring
+        self.index = index
+
+    @property
+    def cursor(self):
+        return int(self.ring._readers[self.index, 1])
+
+    def _pick(self, latest):
+        table = self.ring._slot_table
+        seqs = table[:, 0]
+        cursor = self.ring._readers[self.index, 1]
+        candidates = np.flatnonzero(seqs > cursor)
+        if not len(candidates):
+            return None
+        pick = candidates[np.argmax(seqs[candidates])] if latest else candidates[np.argmin(seqs[candidates])]
+        return int(pick)
+
+    def _read(self, latest):
+        ring = self.ring
+        with ring.lock:
+            if ring._readers is None: # 링이 닫힘
+                return None
+            slot = self._pick(latest)
+            if slot is None:
+                return None
+            seq = int(ring._slot_table[slot, 0])
+            ring._readers[self.index, 1:] = (seq, seq) # 커서를 옮기고 슬롯을 고정합니다.
+            ring._local_pins.add(self.index)
+            epoch, h, w, c = (int(v) for v in ring._slot_table[slot, 1:])
+            # 다른 스레드가 링을 닫기 전에 뷰를 만듭니다. (고정이 풀릴 때까지 매핑이 유지됩니다.)
+            image = ring._view(slot, (h, w, c) if c > 1 else (h, w))
+            return CapturedFrame(seq, image, float(ring._timestamps[slot]), epoch)
+
+    def read(self):
+        """커서 이후의 다음 프레임을 반환합니다. (밀려난 경우 남아 있는 가장 오래된 프레임)"""
+        return self._read(latest=False)
+
+    def read_latest(self):
+        """가장 최근 프레임만 반환합니다. (중간 프레임은 건너뜀)"""
+        return self._read(latest=True)
+
+    def release(self):
+        """마지막으로 읽은 프레임의 고정을 풉니다."""
+        self.ring._unpin(self.index)
+
+    def close(self):
+        """고정을 풀고 리더 칸을 반환합니다."""
+        self.ring._unpin(self.index, free=True)
@@ -0,0 +1,121 @@
+"""
+감지기별 추론 주기 정책
+
+감지기마다 "N프레임마다 한 번" 또는 "초당 최대 X회" 추론하도록 제한합니다. 추론하지 않는
+프레임에서 DetectorPipeline은 직전 결과를 재사용하고, 오버레이의 상자는 마지막 두 번의 추론에서
+같은 물체로 보이는 상자(같은 라벨, 가장 가까운 중심)의 이동 속도로 현재 프레임 위치까지 이어 그립니다.
+(ClipAnomalyDetector는 자체 stride가 있으므로 이 정책을 쓰지 않습니다.)
+"""
+
+import numpy as np
+
+from ai.overlay import Overlay
+
+# 두 추론 사이에서 같은 물체로 볼 최대 중심 이동 거리 (상자 대각선 길이 대비 비율)
+TRACK_MAX_SHIFT = 1.0
+
+
+def _center_distance(a, b):
+    return np.hypot((a[0] + a[2] - b[0] - b[2]) / 2, (a[1] + a[3] - b[1] - b[3]) / 2)
+
+
+def carry_forward(last, previous, gap, ahead):
+    """
+    last 오버레이의 상자를 previous -> last 사이의 속도로 ahead 프레임만큼 이동한 새 Overlay를 반환합니다.
+    짝이 없는 상자와 상자 이외의 명령은 그대로 둡니다.
+
+    Args:
+        last (Overlay): 마지막 추론의 오버레이
+        previous (Overlay): 그 이전 추론의 오버레이 (없으면 last를 그대로 반환)
+        gap (int): 두 추론 사이의 프레임 수
+        ahead (int): 마지막 추론 이후 지난 프레임 수
+    """
+    if previous is None or gap <= 0 or ahead <= 0:
+        return last
+    previous_boxes = [item for item in previous.items if item['t'] == 'box']
+    if not previous_boxes:
+        return last
+    moved = Overlay(last.width, last.height)
+    for item in last.items:
+        if item['t'] == 'box':
+            x1, y1, x2, y2 = item['xyxy']
+            candidates = [p for p in previous_boxes if p.get('label') == item.get('label')]
+            best = min(candidates, key=lambda p: _center_distance(p['xyxy'], item['xyxy']), default=None)
+            max_shift = TRACK_MAX_SHIFT * np.hypot(x2 - x1, y2 - y1)
+            if best is not None and _center_distance(best['xyxy'], item['xyxy']) <= max_shift:
+                current = np.array(item['xyxy'], dtype=np.float32)
+                velocity = (current - np.array(best['xyxy'], dtype=np.float32)) / gap
+                x1, y1, x2, y2 = current + velocity * ahead
+                item = dict(item, xyxy=[int(np.clip(x1, 0, last.width)), int(np.clip(y1, 0, last.height)),
+                                        int(np.clip(x2, 0, last.width)), int(np.clip(y2, 0, last.height))])
+        moved.items.append(item)
+    return moved
+
+
+class InferencePolicy:
+    """
+    Args:
+        every (int): N프레임마다 한 번 추론합니다. (1이면 매 프레임)
+        max_hz (float): 초당 최대 추론 횟수. None이면 제한하지 않습니다.
+    """
+
+    def __init__(self, every=1, max_hz=None):
+        self.every = max(1, int(every))
+        self.max_hz = max_hz
+        self._since = None # 마지막 추론 이후 지난 프레임 수 (None이면 아직 추론 전)
+        self._last_time = None
+        self._gap = 0 # 마지막 두 추론 사이의 프레임 수
+        self._overlay = None
+        self._previous_overlay = None
+        self.inferences = 0
+        self.reused = 0
+
+    @classmethod
+    def parse(cls, spec):
+        """'3' (3프레임마다) 또는 '2hz' (초당 최대 2회) 형식의 문자열이나 dict/int로 정책을 만듭니다."""
+        if isinstance(spec, cls):
+            return spec
+        if isinstance(spec, dict):
+            return cls(**spec)
+        text = str(spec).strip().lower()
+        if text.endswith('hz'):
+            return cls(max_hz=float(text[:-2]))
+        return cls(every=int(text))
+
+    @property
+    def active(self):
+        return self.every > 1 or self.max_hz is not None
+
+    def due(self, now):
+        """이번 프레임에 추론해야 하는지 반환합니다."""
+        if self._since is None:
+            return True
+        if self._since + 1 < self.every:
+            return False
+        return self.max_hz is None or now - self._last_time >= 1.0 / self.max_hz
+
+    def ran(self, now, overlay=None):
+        """추론한 프레임에서 호출합니다."""
+        self._gap = 0 if self._since is None else self._since + 1
+        self._since = 0
+        self._last_time = now
+        self._previous_overlay, self._overlay = self._overlay, overlay
+        self.inferences += 1
+
+    def skipped(self):
+        """직전 결과를 재사용한 프레임에서 호출하고, 현재 프레임 위치로 이어 그린 오버레이를 반환합니다."""
+        self.reused += 1
+        if self._since is None:
+            return self._overlay
+        self._since += 1
+        if self._overlay is None:
+            return None
+        return carry_forward(self._overlay, self._previous_overlay, self._gap, self._since)
+
+    def reset(self):
+        self._since = None
+        self._last_time = None
+        self._overlay = self._previous_overlay = None
+
+    def stats(self):
+        return {'every': self.every, 'max_hz': self.max_hz, 'inferences': self.inferences, 'reused': self.reused}
@@ -0,0 +1,82 @@
+"""
+움직임 게이트 (정적인 프레임에서 무거운 감지 건너뛰기)
+
+편의점 영상은 오랫동안 정지해 있는 경우가 많습니다. MotionGate는 프레임을 작은 grayscale
+썸네일로 줄여 마지막으로 감지기를 실행한 프레임의 썸네일과 비교하고, 바뀐 픽셀 비율이 기준보다
+작으면 "정적"으로 판단합니다. DetectorPipeline은 정적인 프레임에서 motion_gated 감지기를
+실행하지 않고 직전 결과를 재사용합니다.
+
+기준 썸네일은 감지기를 실행할 때만 갱신되므로 천천히 누적되는 변화도 결국 감지기를 실행시킵니다.
+max_skip 프레임마다 한 번은 변화와 관계없이 실행해 프레임 수 기반 상태(타이머 등)가 멈추지 않게 합니다.
+"""
+
+import cv2
+import numpy as np
+
+
+def is_motion_detected(current_frame, reference_frame, threshold=50, min_changed_ratio=0.0):
+    """
+    두 프레임(BGR 또는 grayscale)의 밝기 차이가 threshold를 넘는 픽셀의 비율이
+    min_changed_ratio보다 크면 True를 반환합니다. (기본값은 한 픽셀이라도 바뀌면 True)
+    """
+    gray_current = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY) if current_frame.ndim == 3 else current_frame
+    gray_reference = cv2.cvtColor(reference_frame, cv2.COLOR_BGR2GRAY) if reference_frame.ndim == 3 else reference_frame
+    frame_delta = cv2.absdiff(gray_reference, gray_current)
+    return np.count_nonzero(frame_delta > threshold) > min_changed_ratio * frame_delta.size
+
+
+class MotionGate:
+    """
+    Args:
+        width (int): 비교용 썸네일 너비 (작을수록 빠르고 잡음에 둔감)
+        threshold (int): 썸네일 픽셀의 밝기 변화 임계값 (0~255, 낮을수록 민감)
+        min_changed_ratio (float): 움직임으로 볼 바뀐 픽셀 비율 (낮을수록 민감)
+        max_skip (int): 연속으로 건너뛸 수 있는 최대 프레임 수 (0이면 항상 실행)
+    """
+
+    def __init__(self, width=64, threshold=25, min_changed_ratio=0.002, max_skip=5):
+        self.width = width
+        self.threshold = threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.max_skip = max_skip
+        self._reference = None
+        self._skipped_in_row = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, int(self.width * h / w))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def check(self, frame):
+        """이 프레임에서 감지기를 실행해야 하면 True, 직전 결과를 재사용해도 되면 False를 반환합니다."""
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+        run = (
+            self._reference is None
+            or self._reference.shape != thumbnail.shape
+            or self._skipped_in_row >= self.max_skip
+            or is_motion_detected(thumbnail, self._reference, self.threshold, self.min_changed_ratio)
+        )
+        if run:
+            self._reference = thumbnail
+            self._skipped_in_row = 0
+        else:
+            self._skipped_in_row += 1
+            self.skipped += 1
+        return run
+
+    def reset(self):
+        self._reference = None
+        self._skipped_in_row = 0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            'threshold': self.threshold,
+            'min_changed_ratio': self.min_changed_ratio,
+        }
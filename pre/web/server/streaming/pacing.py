@@ -0,0 +1,76 @@
+"""
+피드 처리 루프의 적응형 프레임 페이싱
+
+고정 sleep(0.03) 대신 소스 FPS를 목표로 남은 시간만큼만 대기하고, 처리가 목표보다
+느려지면 중간 프레임을 건너뛰고 최신 프레임만 읽도록 알려 줍니다.
+"""
+
+import time
+
+
+class PacingController:
+    """
+    Args:
+        target_fps (float): 목표 FPS (보통 소스 FPS)
+        sleep: 협조적 대기 함수. (예: socketio.sleep)
+        smoothing (float): 달성 FPS/처리 시간 지수이동평균 계수입니다.
+    """
+
+    def __init__(self, target_fps, sleep=time.sleep, smoothing=0.1):
+        self.target_fps = target_fps if target_fps and target_fps > 0 else 30.0
+        self.interval = 1.0 / self.target_fps
+        self._sleep = sleep
+        self._smoothing = smoothing
+        self._frame_started = None
+        self._last_frame_time = None
+        self._last_seq = None
+        self.behind = False
+        self.achieved_fps = 0.0
+        self.processing_ms = 0.0
+        self.frames = 0
+        self.skipped = 0
+
+    def read(self, subscription):
+        """
+        다음에 처리할 프레임을 읽습니다. 처리가 밀린 상태면 중간 프레임을 버리고 최신 프레임을 읽습니다.
+        새 프레임이 없으면 None을 반환합니다.
+        """
+        if self.behind:
+            captured = subscription.read_latest()
+            if captured is not None and self._last_seq is not None:
+                self.skipped += max(0, captured.seq - self._last_seq - 1)
+        else:
+            captured = subscription.read()
+        if captured is not None:
+            self._last_seq = captured.seq
+            self._frame_started = time.monotonic()
+        return captured
+
+    def wait(self):
+        """프레임 처리 후 호출합니다. 목표 간격의 남은 시간만큼 대기합니다."""
+        now = time.monotonic()
+        if self._frame_started is not None:
+            elapsed = now - self._frame_started
+            self.processing_ms += self._smoothing * (elapsed * 1000 - self.processing_ms)
+            self.behind = elapsed > self.interval
+        if self._last_frame_time is not None:
+            gap = now - self._last_frame_time
+            if gap > 0:
+                self.achieved_fps += self._smoothing * (1.0 / gap - self.achieved_fps)
+        self._last_frame_time = now
+        self.frames += 1
+
+        if self.behind or self._frame_started is None:
+            self._sleep(0) # 다른 피드에 양보만 합니다.
+        else:
+            self._sleep(max(0.0, self.interval - (now - self._frame_started)))
+
+    def stats(self):
+        return {
+            'target_fps': round(self.target_fps, 2),
+            'achieved_fps': round(self.achieved_fps, 2),
+            'processing_ms': round(self.processing_ms, 2),
+            'frames': self.frames,
+            'skipped_frames': self.skipped,
+            'behind': self.behind,
+        }
@@ -0,0 +1,239 @@
+"""
+범용 감지 파이프라인
+
+모든 피드가 같은 단계(decode → resize → detect → annotate → encode → emit → persist)를
+공유합니다. 프레임 건너뛰기, 배칭, 스레딩 같은 최적화는 이 파일 한 곳에만 적용하면
+모든 감지기에 반영됩니다. 하나의 디코딩 스트림에 여러 감지기를 붙일 수도 있습니다.
+(이때 accepts_analysis 감지기들은 공유 FrameAnalysis로 YOLO 패스와 광학 흐름을 함께 씁니다.)
+
+metadata_only 모드에서는 감지기가 프레임에 그리지 않고 그리기 명령(ai.overlay)만 돌려주며,
+주석 없는 프레임과 명령 목록을 함께 보내 클라이언트가 그리게 합니다. 송출할 곳이 없으면
+(publish=None) JPEG 인코딩도 건너뛰므로 녹화/알림 전용 파이프라인은 그리기 비용이 없습니다.
+
+motion_gate(streaming/motion_gate.py)를 주면 정적인 프레임에서 motion_gated 감지기를 실행하지 않고
+직전 결과와 그리기 명령을 재사용합니다.
+
+policies(streaming/inference_policy.py)로 감지기별 추론 주기를 제한할 수 있습니다. (추론하지 않은
+프레임에서는 직전 결과를 재사용하고 상자를 이어 그립니다.)
+
+결과를 재사용할 수 있는 감지기(게이트 대상이거나 주기가 제한된 감지기)는 그리기 명령만 돌려주고,
+파이프라인이 매 프레임 현재 프레임에 그립니다. 직전 주석 프레임은 보관하지 않으므로 재사용하는
+프레임에서도 영상은 멈추지 않습니다.
+"""
+
+import time
+from typing import Protocol, runtime_checkable
+
+import cv2
+
+from ai.overlay import render
+
+
+@runtime_checkable
+class Detector(Protocol):
+    """파이프라인에 붙일 수 있는 감지기 인터페이스"""
+
+    def process_frame(self, frame):
+        """프레임 하나를 처리하고 (주석이 그려진 프레임, 결과 dict)를 반환합니다."""
+        ...
+
+
+class FrameContext:
+    """한 프레임이 단계들을 지나며 채워지는 상태"""
+
+    def __init__(self, captured):
+        self.captured = captured
+        self.frame = captured.image # 원본 (공유 프레임이므로 수정 금지)
+        self.display = None # 주석이 그려진 출력 프레임
+        self.results = {} # 감지기 이름 -> 결과 dict
+        self.overlays = {} # 감지기 이름 -> 그리기 명령 Overlay (metadata_only 모드)
+        self.buffer = None # JPEG 인코딩 결과
+        self.gated = False # 움직임 게이트가 정적 프레임으로 판단해 직전 결과를 재사용했는지 여부
+
+
+class DetectorPipeline:
+    """
+    Args:
+        detectors (dict): 감지기 이름 -> Detector. 첫 번째 감지기의 주석 프레임이 출력 프레임이 됩니다.
+        publish: publish(jpeg_buffer, **fields) 형태의 송신 함수 (예: Feed.publish)
+        payload: payload(results) -> emit에 함께 보낼 필드 dict. None이면 필드 없이 이미지만 보냅니다.
+        annotators (list): annotate(display, results) -> display 형태의 추가 주석 함수 목록입니다.
+        persist: persist(display, results) 형태의 인시던트 저장 함수입니다.
+        resize_width (int): 지정하면 감지 전에 이 너비로 축소합니다.
+        sleep: 새 프레임이 없을 때 사용할 협조적 대기 함수입니다.
+        analysis (StreamAnalysis): 감지기 간 공유 분석 상태. accepts_analysis 감지기에 프레임별
+                                   FrameAnalysis를 넘깁니다.
+        metadata_only (bool): True이면 draw 속성이 있는 감지기가 프레임에 그리지 않습니다. 그리기 명령은
+                              'overlays' 필드(감지기 이름 -> Overlay.to_dict())로 프레임과 함께 보냅니다.
+        motion_gate (MotionGate): 지정하면 정적인 프레임에서 motion_gated 감지기의 직전 결과를 재사용합니다.
+        policies (dict): 감지기 이름 -> InferencePolicy. 추론하지 않는 프레임에서는 직전 결과를 재사용합니다.
+    """
+
+    STAGES = ('decode', 'resize', 'detect', 'annotate', 'encode', 'emit', 'persist')
+
+    def __init__(self, detectors, publish=None, payload=None, annotators=None, persist=None,
+                 resize_width=None, sleep=time.sleep, jpeg_quality=None, analysis=None, metadata_only=False,
+                 motion_gate=None, policies=None):
+        self.detectors = detectors
+        self.publish = publish
+        self.payload = payload
+        self.annotators = annotators or []
+        self.persist = persist
+        self.resize_width = resize_width
+        self._sleep = sleep
+        self.analysis = analysis
+        self.metadata_only = metadata_only
+        if metadata_only:
+            for detector in detectors.values():
+                if hasattr(detector, 'draw'):
+                    detector.draw = False
+        self.motion_gate = motion_gate
+        self.policies = policies or {}
+        # 결과를 재사용할 수 있는 감지기는 그리기 명령만 만들고, 출력 프레임에는 파이프라인이 그립니다.
+        self._server_render = set()
+        for name, detector in detectors.items():
+            policy = self.policies.get(name)
+            reused = ((policy is not None and policy.active)
+                      or (motion_gate is not None and getattr(detector, 'motion_gated', False)))
+            if reused and hasattr(detector, 'draw'):
+                detector.draw = False
+                if not metadata_only:
+                    self._server_render.add(name)
+        self._last = {} # 감지기 이름 -> (출력 프레임 shape, 결과, 그리기 명령)
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if jpeg_quality else []
+        self._epoch = None
+        self.timings_ms = {stage: 0.0 for stage in self.STAGES}
+        self.frames = 0
+
+    # --- 단계 ---
+    def stage_resize(self, ctx):
+        if self.resize_width and ctx.frame.shape[1] != self.resize_width:
+            h, w = ctx.frame.shape[:2]
+            ctx.frame = cv2.resize(ctx.frame, (self.resize_width, int(h * self.resize_width / w)))
+
+    def stage_detect(self, ctx):
+        ctx.gated = self.motion_gate is not None and not self.motion_gate.check(ctx.frame)
+        frame_analysis = self.analysis.frame(ctx.frame) if self.analysis is not None else None
+        now = time.monotonic()
+        for name, detector in self.detectors.items():
+            policy = self.policies.get(name)
+            gated = ctx.gated and getattr(detector, 'motion_gated', False)
+            if name in self._last and (gated or (policy is not None and not policy.due(now))):
+                display, results, overlay = self._reuse(name, ctx)
+                if policy is not None:
+                    overlay = policy.skipped()
+            else:
+                # 입력 프레임에 직접 그리는 감지기에는 복사본을 넘깁니다.
+                frame = ctx.frame.copy() if getattr(detector, 'modifies_input', False) else ctx.frame
+                if frame_analysis is not None and getattr(detector, 'accepts_analysis', False):
+                    display, results = detector.process_frame(frame, analysis=frame_analysis)
+                else:
+                    display, results = detector.process_frame(frame)
+                overlay = results.pop('overlay', None) if results else None
+                if policy is not None:
+                    policy.ran(now, overlay)
+                if self.motion_gate is not None or policy is not None:
+                    self._last[name] = (display.shape, results, overlay)
+            if name in self._server_render:
+                if ctx.display is None and overlay is not None:
+                    display = render(display.copy(), overlay)
+            elif overlay is not None:
+                ctx.overlays[name] = overlay
+            if ctx.display is None:
+                ctx.display = display
+            ctx.results[name] = results
+        if frame_analysis is not None:
+            frame_analysis.commit()
+
+    def _reuse(self, name, ctx):
+        """직전 결과와 그리기 명령을 반환합니다. 출력 프레임은 현재 프레임을 직전 출력 크기로 맞춰 만듭니다."""
+        shape, results, overlay = self._last[name]
+        display = ctx.frame
+        if display.shape[:2] != shape[:2]:
+            display = cv2.resize(display, (shape[1], shape[0]))
+        return display, dict(results) if results else results, overlay
+
+    def stage_annotate(self, ctx):
+        if self.metadata_only:
+            return
+        for annotate in self.annotators:
+            ctx.display = annotate(ctx.display, ctx.results)
+
+    def stage_encode(self, ctx):
+        if self.publish is None:
+            return
+        _, ctx.buffer = cv2.imencode('.jpg', ctx.display, self._encode_params)
+
+    def stage_emit(self, ctx):
+        if self.publish is not None:
+            fields = self.payload(ctx.results) if self.payload else {}
+            if ctx.overlays:
+                fields['overlays'] = {name: overlay.to_dict() for name, overlay in ctx.overlays.items()}
+            self.publish(ctx.buffer, **fields)
+
+    def stage_persist(self, ctx):
+        if self.persist is not None:
+            self.persist(ctx.display, ctx.results)
+
+    # --- 실행 ---
+    def _timed(self, stage, fn, ctx):
+        started = time.perf_counter()
+        fn(ctx)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.timings_ms[stage] += 0.1 * (elapsed - self.timings_ms[stage])
+
+    def _reset_on_restart(self, captured):
+        """파일 소스가 처음부터 다시 재생되면 감지기 상태를 초기화합니다."""
+        if captured.epoch != self._epoch:
+            if self._epoch is not None:
+                for detector in self.detectors.values():
+                    if hasattr(detector, 'reset'):
+                        detector.reset()
+                if self.analysis is not None:
+                    self.analysis.reset()
+                if self.motion_gate is not None:
+                    self.motion_gate.reset()
+                for policy in self.policies.values():
+                    policy.reset()
+                self._last.clear()
+            self._epoch = captured.epoch
+
+    def process(self, captured):
+        """캡처된 프레임 하나를 decode 이후의 모든 단계에 통과시킵니다."""
+        self._reset_on_restart(captured)
+        ctx = FrameContext(captured)
+        self._timed('resize', self.stage_resize, ctx)
+        self._timed('detect', self.stage_detect, ctx)
+        self._timed('annotate', self.stage_annotate, ctx)
+        self._timed('encode', self.stage_encode, ctx)
+        self._timed('emit', self.stage_emit, ctx)
+        self._timed('persist', self.stage_persist, ctx)
+        self.frames += 1
+        return ctx
+
+    def run(self, subscription, stop_event, pacer):
+        """
+        stop_event가 설정될 때까지 구독한 소스의 프레임을 처리합니다.
+
+        Raises:
+            SourceClosedError: 구독한 소스의 디코딩 루프가 끝난 경우 (subscription.read()에서 발생)
+        """
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            captured = pacer.read(subscription)
+            if captured is None:
+                self._sleep(0.005)
+                continue
+            self.timings_ms['decode'] += 0.1 * ((time.perf_counter() - started) * 1000 - self.timings_ms['decode'])
+            self.process(captured)
+            pacer.wait()
+
+    def stats(self):
+        return {
+            'detectors': list(self.detectors.keys()),
+            'frames': self.frames,
+            'metadata_only': self.metadata_only,
+            'motion_gate': self.motion_gate.stats() if self.motion_gate is not None else None,
+            'policies': {name: policy.stats() for name, policy in self.policies.items()},
+            'stage_ms': {stage: round(ms, 2) for stage, ms in self.timings_ms.items()},
+        }
@@ -0,0 +1,287 @@
+"""
+피드 파이프라인 작업 프로세스 풀
+
+eventlet 아래의 백그라운드 작업은 한 프로세스에서 협조적으로 실행되므로, YOLO/MediaPipe/
+Farneback/TF 같은 네이티브 호출 하나가 모든 스트림의 송출을 멈추게 합니다. 이 모듈은 피드마다
+DetectorPipeline을 별도 프로세스에서 실행하고 Socket.IO 프로세스에는 디코딩과 송출만 남깁니다.
+
+- 프레임: 작업자는 CaptureHub가 디코딩하는 공유 메모리 링(streaming/frame_ring.py)에 직접
+          연결해 구독의 커서를 이어받아 복사 없이 읽습니다. 프레임은 프로세스 경계를 넘지 않습니다.
+          링의 공유 잠금은 시작할 때 넘겨받고, 해상도가 바뀌어 링이 다시 만들어지면 제어 큐로
+          새 링 이름을 받아 다시 연결합니다.
+- 결과: 작업자는 JPEG 바이트와 송출 필드, 감지 결과만 돌려보냅니다.
+- 페이싱: 작업자가 자체 PacingController로 소스 FPS를 따라가며, 밀리면 최신 프레임만 읽습니다.
+
+작업자 프로세스는 'spawn'으로 시작하므로 파이프라인은 builder 문자열('모듈:함수')로 만듭니다.
+builder(namespace, publish, threads=...)는 DetectorPipeline을 반환해야 합니다.
+"""
+
+import importlib
+import multiprocessing as mp
+import os
+import queue
+import time
+from contextlib import contextmanager
+
+from streaming.frame_ring import SharedFrameRing
+from streaming.pacing import PacingController
+
+# 작업자가 파이프라인 통계를 보내는 간격(프레임)
+STATS_EVERY = 30
+
+# 작업자 프로세스의 네이티브 스레드 풀 크기를 정하는 환경 변수
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+
+
+def _resolve(builder):
+    module_name, _, attr = builder.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+@contextmanager
+def _thread_env(threads):
+    """spawn된 자식이 numpy/OpenMP를 임포트하기 전에 스레드 수를 물려받도록 환경 변수를 잠시 설정합니다."""
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _next_control(control):
+    """제어 메시지를 하나 꺼냅니다. None은 종료, ('ring', 이름, 리더 칸)은 링 교체, 없으면 ()입니다."""
+    try:
+        return control.get_nowait()
+    except queue.Empty:
+        return ()
+
+
+def _worker_main(builder, namespace, ring_name, ring_lock, reader_index, fps, control, results, threads):
+    """작업자 프로세스 진입점. 공유 링에서 프레임을 읽어 파이프라인을 실행하고 결과를 돌려보냅니다."""
+    import cv2
+    cv2.setNumThreads(threads)
+
+    encoded = {}
+
+    def publish(jpeg_buffer, **fields):
+        encoded['frame'] = (jpeg_buffer.tobytes(), fields)
+
+    try:
+        pipeline = _resolve(builder)(namespace, publish, threads=threads)
+        ring = SharedFrameRing.attach(ring_name, ring_lock)
+    except Exception as e:
+        results.put(('error', f"could not start pipeline worker: {e}"))
+        return
+    reader = ring.reader(reader_index)
+    pacer = PacingController(fps)
+    results.put(('ready', os.getpid()))
+
+    try:
+        while True:
+            message = _next_control(control)
+            if message is None:
+                break
+            if message:
+                _, ring_name, reader_index = message
+                reader.release()
+                ring.close()
+                try:
+                    ring = SharedFrameRing.attach(ring_name, ring_lock)
+                except Exception as e:
+                    results.put(('error', f"could not attach resized frame ring: {e}"))
+                    return
+                reader = ring.reader(reader_index)
+                continue
+            captured = pacer.read(reader)
+            if captured is None:
+                time.sleep(0.005)
+                continue
+            try:
+                ctx = pipeline.process(captured)
+            except Exception as e:
+                results.put(('frame_error', str(e)))
+                continue
+            finally:
+                captured = None
+                reader.release()
+            jpeg, fields = encoded.pop('frame', (None, {}))
+            results.put(('frame', jpeg, fields, ctx.results))
+            ctx = None
+            if pipeline.frames % STATS_EVERY == 0:
+                results.put(('stats', pipeline.stats(), pacer.stats()))
+            pacer.wait()
+    finally:
+        reader.release()
+        ring.close()
+
+
+class RemotePacing:
+    """작업자의 PacingController 통계를 Feed.pacer 자리에 보여 주는 핸들"""
+
+    def __init__(self):
+        self.latest = None
+
+    def stats(self):
+        return self.latest
+
+
+class WorkerPipeline:
+    """
+    작업 프로세스에서 실행되는 피드 파이프라인의 Socket.IO 프로세스 쪽 핸들.
+    DetectorPipeline과 같은 run(subscription, stop_event, pacer)/stats()를 제공합니다.
+
+    Args:
+        publish: publish(jpeg_bytes, **fields) 형태의 송신 함수 (예: Feed.publish)
+        persist: persist(jpeg_bytes, results) 형태의 인시던트 저장 함수입니다.
+        threads (int): 작업자의 네이티브 스레드 수
+    """
+
+    def __init__(self, pool, builder, namespace, publish, persist=None, threads=1, sleep=time.sleep):
+        self._pool = pool
+        self._builder = builder
+        self.namespace = namespace
+        self.publish = publish
+        self.persist = persist
+        self.threads = threads
+        self._sleep = sleep
+        self.pacer = RemotePacing()
+        self.process = None
+        self._ring = None # 작업자가 연결한 (링 이름, 리더 칸)
+        self.pid = None
+        self._stats = None
+        self.frames = 0
+        self.errors = 0
+
+    def _start(self, subscription, fps):
+        context = mp.get_context('spawn')
+        self._control = context.Queue()
+        self._results = context.Queue()
+        self.process = context.Process(
+            target=_worker_main, name=f"pipeline {self.namespace}", daemon=True,
+            args=(self._builder, self.namespace, subscription.ring_name, subscription.ring_lock,
+                  subscription.reader_index, fps, self._control, self._results, self.threads),
+        )
+        self._ring = (subscription.ring_name, subscription.reader_index)
+        with _thread_env(self.threads):
+            self.process.start()
+
+    def _drain(self):
+        """작업자가 돌려보낸 결과를 모두 송출합니다."""
+        while True:
+            try:
+                kind, *payload = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'frame':
+                jpeg, fields, results = payload
+                self.frames += 1
+                if jpeg is not None and self.publish is not None:
+                    self.publish(jpeg, **fields)
+                if self.persist is not None:
+                    self.persist(jpeg, results)
+            elif kind == 'stats':
+                self._stats, self.pacer.latest = payload
+            elif kind == 'ready':
+                self.pid = payload[0]
+            elif kind == 'frame_error':
+                self.errors += 1
+                print(f"Pipeline worker {self.namespace} failed on a frame: {payload[0]}")
+            elif kind == 'error':
+                raise RuntimeError(payload[0])
+
+    def run(self, subscription, stop_event, pacer):
+        """
+        작업자를 시작하고 stop_event가 설정될 때까지 결과를 송출합니다. (pacer는 목표 FPS만 사용)
+
+        Raises:
+            SourceClosedError: 구독한 소스의 디코딩 루프가 끝난 경우
+        """
+        self._start(subscription, pacer.target_fps)
+        try:
+            while not stop_event.is_set():
+                self._drain()
+                subscription.ensure_open() # 소스가 끝나면 작업자도 종료합니다.
+                ring = (subscription.ring_name, subscription.reader_index)
+                if ring != self._ring: # 해상도가 바뀌어 링이 다시 만들어진 경우
+                    self._ring = ring
+                    self._control.put(('ring', *ring))
+                if not self.process.is_alive():
+                    self._drain()
+                    raise RuntimeError(f"pipeline worker exited with code {self.process.exitcode}")
+                self._sleep(0.005)
+        finally:
+            self.close()
+
+    def close(self, timeout=5.0):
+        """작업자를 종료합니다. (구독은 호출자가 닫습니다.)"""
+        if self.process is not None and self.process.is_alive():
+            self._control.put(None)
+            deadline = time.monotonic() + timeout
+            while self.process.is_alive() and time.monotonic() < deadline:
+                try:
+                    self._drain() # 작업자 결과 큐가 비워져야 프로세스가 종료됩니다.
+                except RuntimeError:
+                    pass
+                self._sleep(0.05)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join(1.0)
+        self._pool._release(self)
+
+    def stats(self):
+        return {
+            'process': {
+                'pid': self.pid,
+                'alive': self.process is not None and self.process.is_alive(),
+                'threads': self.threads,
+                'frames_returned': self.frames,
+                'errors': self.errors,
+            },
+            **(self._stats or {}),
+        }
+
+
+class PipelineProcessPool:
+    """
+    피드별 작업 프로세스 수를 제한하는 풀
+
+    Args:
+        builder (str): 작업자에서 파이프라인을 만들 '모듈:함수' (예: 'feeds:build_worker_pipeline')
+        max_workers (int): 동시에 실행할 작업 프로세스 수. 기본값은 CPU 코어 수입니다.
+                           가득 차면 start()가 None을 반환하므로 호출자는 프로세스 내 파이프라인을 씁니다.
+        threads_per_worker (int): 작업자별 네이티브 스레드 수. 기본값은 코어 수 / max_workers (최소 1)입니다.
+        sleep: 협조적 대기 함수. (예: socketio.sleep)
+    """
+
+    def __init__(self, builder, max_workers=None, threads_per_worker=None, sleep=time.sleep):
+        cores = os.cpu_count() or 1
+        self.builder = builder
+        self.max_workers = max_workers or cores
+        self.threads_per_worker = threads_per_worker or max(1, cores // self.max_workers)
+        self._sleep = sleep
+        self._workers = []
+
+    def start(self, namespace, publish, persist=None):
+        """피드의 작업자 핸들을 예약합니다. (프로세스는 run()에서 시작) 풀이 가득 찼으면 None을 반환합니다."""
+        if len(self._workers) >= self.max_workers:
+            return None
+        worker = WorkerPipeline(self, self.builder, namespace, publish, persist=persist,
+                                threads=self.threads_per_worker, sleep=self._sleep)
+        self._workers.append(worker)
+        return worker
+
+    def _release(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'threads_per_worker': self.threads_per_worker,
+            'workers': {worker.namespace: worker.pid for worker in self._workers},
+        }
@@ -0,0 +1,62 @@
+"""
+웹소켓 프레임 전송 모드
+
+- string (기본값): 'data:image/jpeg;base64,...' 문자열. 기존 클라이언트 호환용입니다.
+- binary: JPEG 바이트를 Socket.IO 바이너리 첨부로 그대로 보내고, 감지 결과는 별도의
+          작은 JSON 필드(meta)로 보냅니다. base64 인코딩(+33%)과 UTF-8 디코딩이 없습니다.
+
+metadata_only 피드는 주석 없는 프레임과 함께 'overlays' 필드(감지기 이름 -> 그리기 명령,
+형식은 ai/overlay.py 참고)를 보냅니다. string 모드에서는 최상위 필드, binary 모드에서는 meta 안에 있습니다.
+
+모드는 네임스페이스별로 협상합니다. 클라이언트는 연결 시 쿼리 파라미터
+`?transport=binary`를 주거나, 연결 후 'set_transport' 이벤트로 {'mode': 'binary'}를 보냅니다.
+"""
+
+import base64
+
+TRANSPORT_STRING = 'string'
+TRANSPORT_BINARY = 'binary'
+TRANSPORT_MODES = (TRANSPORT_STRING, TRANSPORT_BINARY)
+
+
+def build_frame_payload(jpeg_buffer, mode=TRANSPORT_STRING, **fields):
+    """
+    인코딩된 JPEG 버퍼로 'response' 이벤트 페이로드를 만듭니다.
+
+    Args:
+        jpeg_buffer (numpy.ndarray | bytes): cv2.imencode('.jpg') 결과
+        mode (str): TRANSPORT_STRING 또는 TRANSPORT_BINARY
+        **fields: 함께 보낼 메타데이터 (예: detections, prediction)
+    """
+    jpeg_bytes = jpeg_buffer if isinstance(jpeg_buffer, (bytes, bytearray)) else jpeg_buffer.tobytes()
+    if mode == TRANSPORT_BINARY:
+        return {'image': jpeg_bytes, 'mime': 'image/jpeg', 'meta': fields}
+    payload = {'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg_bytes).decode('utf-8')}
+    payload.update(fields)
+    return payload
+
+
+def decode_image_field(image):
+    """클라이언트가 보낸 이미지 필드(data URL 문자열 또는 바이너리)를 JPEG 바이트로 변환합니다."""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    return base64.b64decode(image.split(',')[1])
+
+
+class FrameTransport:
+    """(네임스페이스, sid)별로 협상된 전송 모드를 관리합니다."""
+
+    def __init__(self):
+        self._modes = {}
+
+    def negotiate(self, sid, namespace, requested):
+        """요청된 모드를 등록하고 실제 적용된 모드를 반환합니다. 알 수 없는 값은 string으로 처리합니다."""
+        mode = requested if requested in TRANSPORT_MODES else TRANSPORT_STRING
+        self._modes[(namespace, sid)] = mode
+        return mode
+
+    def mode(self, sid, namespace):
+        return self._modes.get((namespace, sid), TRANSPORT_STRING)
+
+    def discard(self, sid, namespace):
+        self._modes.pop((namespace, sid), None)
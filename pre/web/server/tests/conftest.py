@@ -0,0 +1,5 @@
+import os
+import sys
+
+# server 디렉터리의 모듈(ai, streaming, feeds ...)을 최상위 패키지로 임포트합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
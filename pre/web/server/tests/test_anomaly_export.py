@@ -0,0 +1,25 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from ai.aiConAnomalyDetect import Optimized3DCNN # noqa: E402
+from ai.anomaly_export import fold_batchnorm # noqa: E402
+
+
+def test_folded_model_matches_original_outputs():
+    torch.manual_seed(0)
+    model = Optimized3DCNN(num_classes=8)
+    # 기본값(평균 0, 분산 1)이 아닌 BatchNorm 통계로 접기 결과를 확인합니다.
+    for module in model.modules():
+        if isinstance(module, (torch.nn.BatchNorm1d, torch.nn.BatchNorm3d)):
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 2.0)
+            module.weight.data.uniform_(0.5, 1.5)
+            module.bias.data.uniform_(-0.5, 0.5)
+    model.eval()
+    folded = fold_batchnorm(model)
+
+    assert not any(isinstance(m, (torch.nn.BatchNorm1d, torch.nn.BatchNorm3d)) for m in folded.modules())
+    clip = torch.randn(2, 3, 4, 32, 32)
+    with torch.no_grad():
+        assert torch.allclose(model(clip), folded(clip), atol=1e-4)
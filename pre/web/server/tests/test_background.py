@@ -0,0 +1,70 @@
+import numpy as np
+
+from ai.background import DualRateBackground, MOG2Background, RunningAverageBackground, make_background
+
+
+def frame(value=30, shape=(40, 40, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def with_object(value=30, obj=250):
+    image = frame(value)
+    image[10:30, 10:30] = obj
+    return image
+
+
+def test_running_average_rebuilds_cache_only_after_an_update():
+    engine = RunningAverageBackground(scale=1.0, learning_rate=0.01, update_every=3)
+    engine.learn(frame(), 0.5)
+    assert engine._background is None # 학습만으로는 변환하지 않습니다.
+
+    engine.apply(frame())
+    cached = engine._background
+    engine.apply(frame())
+    assert engine._background is cached
+    engine.apply(frame()) # 3번째 프레임에서 갱신
+    assert engine._background is None
+    engine.apply(frame())
+    assert engine._background is not cached
+
+
+def test_foreground_pixels_update_at_the_slower_rate():
+    engine = RunningAverageBackground(scale=1.0, learning_rate=0.1, foreground_rate=0.01, update_every=1)
+    engine.learn(frame(0), 0.5)
+    mask = engine.apply(with_object(value=20, obj=200))
+
+    assert mask[20, 20] == 255 and mask[0, 0] == 0
+    assert np.isclose(engine._average[0, 0, 0], 2.0) # 배경: 20 * 0.1
+    assert np.isclose(engine._average[20, 20, 0], 2.0) # 전경: 200 * 0.01
+
+
+def test_update_foreground_blends_objects_at_the_full_rate():
+    engine = RunningAverageBackground(scale=1.0, learning_rate=0.1, update_foreground=True)
+    engine.learn(frame(0), 0.5)
+    engine.apply(with_object(value=0, obj=200))
+    assert np.isclose(engine._average[20, 20, 0], 20.0)
+
+
+def test_mog2_mask_is_full_resolution_uint8():
+    engine = make_background('mog2', scale=0.5)
+    assert isinstance(engine, MOG2Background)
+    image = frame(shape=(60, 80, 3))
+    for _ in range(5):
+        engine.learn(image, 0.5)
+    mask = engine.apply(image)
+    assert mask.shape == (60, 80) and mask.dtype == np.uint8
+    assert not mask.any()
+
+
+def test_dual_rate_flags_a_region_once_it_is_static():
+    engine = DualRateBackground(scale=1.0, learning_rate=0.001, short_rate=0.5)
+    for _ in range(3):
+        engine.learn(frame(), 0.5)
+
+    # 막 나타난 물체는 단기 배경과도 달라 전경으로 보지 않습니다.
+    assert engine.apply(with_object())[20, 20] == 0
+
+    # 단기 배경에 흡수된 뒤에는 장기 배경과만 다르므로 전경이 됩니다.
+    for _ in range(10):
+        mask = engine.apply(with_object())
+    assert mask[20, 20] == 255 and mask[0, 0] == 0
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from ai.batch_inference import BatchedYOLO, MicroBatcher
+
+
+def test_groups_items_with_the_same_options():
+    calls = []
+
+    def batch_fn(items, **kwargs):
+        calls.append((list(items), kwargs))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch=8, max_wait_ms=50)
+    futures = [batcher.submit(1, classes=[0]), batcher.submit(2, classes=[0]), batcher.submit(3, conf=0.5)]
+
+    assert [future.result(timeout=2) for future in futures] == [10, 20, 30]
+    assert len(calls) == 2
+    assert ([1, 2], {'classes': [0]}) in calls
+    assert ([3], {'conf': 0.5}) in calls
+    assert batcher.stats()['items'] == 3
+
+
+def test_call_waits_for_result():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], max_wait_ms=1)
+    assert batcher(1) == 2
+
+
+def test_error_fails_the_batch_and_keeps_the_worker():
+    def batch_fn(items, fail=False):
+        if fail:
+            raise ValueError("boom")
+        return list(items)
+
+    batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit(1, fail=True).result(timeout=2)
+    assert batcher.submit(2).result(timeout=2) == 2
+
+
+def test_result_count_mismatch_fails_every_future():
+    batcher = MicroBatcher(lambda items: [], max_wait_ms=20)
+    futures = [batcher.submit(1), batcher.submit(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2)
+
+
+def test_cooperative_sleep_is_used_while_waiting():
+    release = threading.Event()
+    slept = []
+
+    def batch_fn(items):
+        release.wait(2)
+        return list(items)
+
+    def sleep(seconds):
+        slept.append(seconds)
+        release.set()
+
+    batcher = MicroBatcher(batch_fn, max_wait_ms=1, sleep=sleep)
+    assert batcher(5) == 5
+    assert slept
+
+
+def test_batched_yolo_submits_a_list_as_one_batch():
+    class Model:
+        names = {0: 'person'}
+        batches = []
+
+        def __call__(self, frames, **kwargs):
+            self.batches.append(list(frames))
+            return [frame * 2 for frame in frames]
+
+    model = Model()
+    proxy = BatchedYOLO(model, max_wait_ms=50)
+    assert proxy([1, 2, 3], conf=0.1) == [2, 4, 6]
+    assert proxy(4) == [8]
+    assert model.batches == [[1, 2, 3], [4]]
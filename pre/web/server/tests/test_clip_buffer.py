@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from ai.clip_buffer import ClipBuffer
+
+
+def frame(value):
+    return np.full((2, 2, 1), value, dtype=np.uint8)
+
+
+def test_clip_is_the_last_window_in_order_across_wrap_around():
+    buffer = ClipBuffer(window=4, stride=2, frame_shape=(2, 2, 1))
+    for value in range(1, 11):
+        buffer.append(frame(value))
+        if buffer.count >= 4:
+            clip = buffer.clip()
+            assert clip[:, 0, 0, 0].tolist() == list(range(value - 3, value + 1))
+
+
+def test_clip_is_a_view_into_the_buffer():
+    buffer = ClipBuffer(window=3, stride=1, frame_shape=(2, 2, 1))
+    for value in range(5):
+        buffer.append(frame(value))
+    assert np.shares_memory(buffer.clip(), buffer._frames)
+
+
+def test_append_with_fill_function():
+    buffer = ClipBuffer(window=2, stride=1, frame_shape=(2, 2, 1))
+    buffer.append(lambda out: out.fill(7))
+    buffer.append(lambda out: out.fill(8))
+    assert buffer.clip()[:, 0, 0, 0].tolist() == [7, 8]
+
+
+def test_ready_follows_window_and_stride():
+    buffer = ClipBuffer(window=4, stride=2, frame_shape=(2, 2, 1))
+    ready = []
+    for value in range(8):
+        buffer.append(frame(value))
+        ready.append(buffer.ready())
+    assert ready == [False, False, False, True, False, True, False, True]
+
+
+def test_clip_before_full_and_invalid_sizes_raise():
+    buffer = ClipBuffer(window=4, stride=2, frame_shape=(2, 2, 1))
+    buffer.append(frame(1))
+    with pytest.raises(ValueError):
+        buffer.clip()
+    buffer.clear()
+    assert len(buffer) == 0
+    with pytest.raises(ValueError):
+        ClipBuffer(window=0)
@@ -0,0 +1,113 @@
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from streaming.frame_ring import SharedFrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(slots=2, slot_bytes=4 * 4 * 3, max_readers=4)
+    yield ring
+    ring.close()
+
+
+def image(value, shape=(4, 4, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_claim_commit_and_read_in_order(ring):
+    reader = ring.reader()
+    slot, view = ring.claim((4, 4, 3))
+    view[...] = 3
+    assert ring.commit(slot, (4, 4, 3), epoch=1, timestamp=5.0) == 1
+    ring.write(image(4), epoch=1)
+
+    first = reader.read()
+    assert (first.seq, first.epoch, first.timestamp) == (1, 1, 5.0)
+    assert first.image.shape == (4, 4, 3) and first.image[0, 0, 0] == 3
+    assert reader.read().image[0, 0, 0] == 4
+    assert reader.read() is None
+
+
+def test_read_latest_skips_to_newest(ring):
+    reader = ring.reader()
+    for value in (1, 2):
+        ring.write(image(value), epoch=0)
+    assert reader.read_latest().seq == 2
+
+
+def test_pinned_slot_is_not_overwritten(ring):
+    reader = ring.reader()
+    ring.write(image(1), epoch=0)
+    pinned = reader.read()
+    for value in (2, 3, 4):
+        ring.write(image(value), epoch=0)
+    assert pinned.image[0, 0, 0] == 1
+
+    # 한 슬롯이 고정되어 있으면 나머지 슬롯만 돌려 씁니다.
+    assert reader.read_latest().image[0, 0, 0] == 4
+    reader.release()
+    assert ring.dropped == 0
+
+
+def test_drops_when_every_slot_is_pinned_or_frame_too_large(ring):
+    readers = [ring.reader(), ring.reader()]
+    for reader, value in zip(readers, (1, 2)):
+        ring.write(image(value), epoch=0)
+        reader.read_latest()
+    assert ring.write(image(3), epoch=0) is None
+    assert ring.write(image(3, (8, 8, 3)), epoch=0) is None
+    assert ring.dropped == 2
+
+
+def test_reader_slots_are_reused_after_close(ring):
+    readers = [ring.reader() for _ in range(ring.max_readers)]
+    with pytest.raises(RuntimeError):
+        ring.reader()
+    readers[0].close()
+    assert ring.reader().index == readers[0].index
+
+
+def test_seq_continues_from_previous_ring():
+    ring = SharedFrameRing(slots=2, slot_bytes=12, max_readers=1, seq=41)
+    try:
+        assert ring.write(image(1, (2, 2, 3)), epoch=0) == 42
+    finally:
+        ring.close()
+
+
+def _read_in_child(name, lock, index, results):
+    ring = SharedFrameRing.attach(name, lock)
+    reader = ring.reader(index)
+    captured = reader.read()
+    results.put((captured.seq, int(captured.image[0, 0, 0])))
+    reader.release()
+    ring.close()
+
+
+def test_reader_in_another_process(ring):
+    index = ring.reader().index
+    ring.write(image(9), epoch=0)
+    context = mp.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_read_in_child, args=(ring.name, ring.lock, index, results))
+    process.start()
+    try:
+        assert results.get(timeout=30) == (1, 9)
+    finally:
+        process.join(10)
+
+
+def test_read_and_stats_after_close():
+    ring = SharedFrameRing(slots=2, slot_bytes=12, max_readers=1)
+    reader = ring.reader()
+    ring.write(image(5, (2, 2, 3)), epoch=0)
+    captured = reader.read()
+    ring.close()
+    assert captured.image[0, 0, 0] == 5 # 고정이 풀릴 때까지 매핑이 유지됩니다.
+    assert reader.read() is None
+    assert ring.stats()['readers'] == 0
+    reader.release()
+    assert ring._shm is None
@@ -0,0 +1,67 @@
+from ai.overlay import Overlay
+from streaming.inference_policy import InferencePolicy, carry_forward
+
+
+def overlay_with_box(x1, y1, x2, y2, label='person'):
+    overlay = Overlay(200, 100)
+    overlay.box(x1, y1, x2, y2, (0, 255, 0), label=label)
+    return overlay
+
+
+def boxes(overlay):
+    return [item['xyxy'] for item in overlay.items if item['t'] == 'box']
+
+
+def test_every_n_frames():
+    policy = InferencePolicy(every=3)
+    due = []
+    for frame in range(7):
+        if policy.due(now=frame):
+            due.append(frame)
+            policy.ran(now=frame)
+        else:
+            policy.skipped()
+    assert due == [0, 3, 6]
+    assert policy.stats()['reused'] == 4
+
+
+def test_max_hz_limits_by_time():
+    policy = InferencePolicy(max_hz=2)
+    assert policy.due(0.0)
+    policy.ran(0.0)
+    policy.skipped()
+    assert not policy.due(0.3)
+    assert policy.due(0.5)
+
+
+def test_parse_and_active():
+    assert InferencePolicy.parse('3').every == 3
+    assert InferencePolicy.parse('2hz').max_hz == 2.0
+    assert InferencePolicy.parse({'every': 2}).active
+    assert not InferencePolicy.parse(1).active
+
+
+def test_carry_forward_moves_matched_boxes_by_velocity():
+    previous = overlay_with_box(10, 10, 30, 30)
+    last = overlay_with_box(20, 10, 40, 30)
+    moved = carry_forward(last, previous, gap=2, ahead=2)
+    assert boxes(moved) == [[30, 10, 50, 30]]
+    assert boxes(last) == [[20, 10, 40, 30]]
+
+
+def test_carry_forward_keeps_unmatched_boxes():
+    previous = overlay_with_box(10, 10, 30, 30, label='bag')
+    last = overlay_with_box(20, 10, 40, 30)
+    assert boxes(carry_forward(last, previous, gap=2, ahead=2)) == [[20, 10, 40, 30]]
+    assert carry_forward(last, None, gap=2, ahead=2) is last
+
+
+def test_skipped_returns_carried_overlay_and_reset_clears_it():
+    policy = InferencePolicy(every=2)
+    policy.ran(0, overlay_with_box(10, 10, 30, 30))
+    policy.skipped()
+    policy.ran(2, overlay_with_box(20, 10, 40, 30))
+    assert boxes(policy.skipped()) == [[25, 10, 45, 30]]
+    policy.reset()
+    assert policy.due(3)
+    assert policy.skipped() is None
@@ -0,0 +1,31 @@
+import numpy as np
+
+from streaming.motion_gate import MotionGate
+
+
+def frame(value=100, shape=(120, 160, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_static_frames_are_skipped_until_something_moves():
+    gate = MotionGate(max_skip=100)
+    assert gate.check(frame()) # 첫 프레임은 기준이 없으므로 실행
+    assert not any(gate.check(frame()) for _ in range(5))
+
+    moved = frame()
+    moved[30:90, 40:120] = 255
+    assert gate.check(moved)
+    assert gate.stats()['skipped'] == 5
+
+
+def test_max_skip_forces_a_run_on_static_frames():
+    gate = MotionGate(max_skip=3)
+    runs = [gate.check(frame()) for _ in range(9)]
+    # 연속 3프레임을 건너뛴 다음 프레임은 변화가 없어도 실행합니다.
+    assert runs == [True, False, False, False, True, False, False, False, True]
+
+
+def test_max_skip_zero_always_runs():
+    gate = MotionGate(max_skip=0)
+    assert all(gate.check(frame()) for _ in range(4))
+    assert gate.skipped == 0
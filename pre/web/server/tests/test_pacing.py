@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+from streaming import pacing
+from streaming.pacing import PacingController
+
+Frame = namedtuple('Frame', ['seq'])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeSubscription:
+    def __init__(self):
+        self.latest = 0
+        self.calls = []
+
+    def read(self):
+        self.calls.append('read')
+        self.latest += 1
+        return Frame(self.latest)
+
+    def read_latest(self):
+        self.calls.append('read_latest')
+        self.latest += 5
+        return Frame(self.latest)
+
+
+def make_pacer(monkeypatch, fps=10):
+    clock = FakeClock()
+    monkeypatch.setattr(pacing.time, 'monotonic', clock.monotonic)
+    slept = []
+    return PacingController(fps, sleep=slept.append), clock, slept
+
+
+def test_sleeps_only_the_rest_of_the_frame_interval(monkeypatch):
+    pacer, clock, slept = make_pacer(monkeypatch)
+    pacer.read(FakeSubscription())
+    clock.now += 0.03
+    pacer.wait()
+    assert not pacer.behind
+    assert abs(slept[-1] - 0.07) < 1e-9
+
+
+def test_reads_latest_and_counts_skipped_frames_when_behind(monkeypatch):
+    pacer, clock, slept = make_pacer(monkeypatch)
+    subscription = FakeSubscription()
+    pacer.read(subscription)
+    clock.now += 0.2 # 목표 간격(0.1초)보다 오래 처리
+    pacer.wait()
+    assert pacer.behind
+    assert slept[-1] == 0
+
+    pacer.read(subscription)
+    assert subscription.calls == ['read', 'read_latest']
+    assert pacer.skipped == 4
+
+
+def test_invalid_fps_defaults_to_30(monkeypatch):
+    pacer, _, _ = make_pacer(monkeypatch, fps=0)
+    assert pacer.target_fps == 30.0
+    assert pacer.stats()['frames'] == 0
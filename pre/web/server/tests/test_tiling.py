@@ -0,0 +1,71 @@
+import numpy as np
+
+from ai.tiling import nms, tile_regions, tiled_detections
+
+
+def test_tile_regions_centres_small_blobs_and_clips_to_frame():
+    mask = np.zeros((200, 300), dtype=np.uint8)
+    mask[10:40, 10:40] = 255 # 좌상단 구석의 작은 영역
+    mask[100:180, 150:290] = 255 # 타일보다 큰 영역
+    tiles = tile_regions(mask, tile_size=64, max_tiles=4, min_area=100)
+    assert tiles[0] == (150, 100, 290, 180)
+    assert tiles[1] == (0, 0, 64, 64)
+
+
+def test_tile_regions_skips_blobs_inside_chosen_tiles_and_limits_count():
+    mask = np.zeros((200, 200), dtype=np.uint8)
+    mask[50:80, 50:80] = 255
+    mask[85:95, 85:95] = 255 # 첫 타일 안에 중심이 들어가는 영역
+    mask[150:190, 150:190] = 255
+    assert len(tile_regions(mask, tile_size=64, min_area=50)) == 2
+    assert len(tile_regions(mask, tile_size=64, max_tiles=1, min_area=50)) == 1
+
+
+def test_nms_suppresses_overlaps_per_class():
+    detections = np.array([
+        [0, 0, 10, 10, 0.9, 0],
+        [1, 1, 11, 11, 0.8, 0], # 같은 클래스와 겹침
+        [1, 1, 11, 11, 0.7, 1], # 다른 클래스
+        [50, 50, 60, 60, 0.6, 0],
+    ], dtype=np.float32)
+    kept = nms(detections, iou_threshold=0.5)
+    assert kept[:, 4].tolist() == np.float32([0.9, 0.7, 0.6]).tolist()
+    assert len(nms(np.zeros((0, 6), dtype=np.float32))) == 0
+
+
+class _Result:
+    def __init__(self, detections):
+        self.boxes = self
+        self.data = self
+        self._detections = detections
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._detections
+
+
+class _Model:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, crops, **options):
+        self.calls.append([crop.shape for crop in crops])
+        return [_Result(np.array([[0, 0, 5, 5, 0.9, 0]], dtype=np.float32)) for _ in crops]
+
+
+def test_tiled_detections_batches_tiles_and_offsets_boxes():
+    model = _Model()
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    merged = tiled_detections(model, frame, [(0, 0, 50, 50), (60, 40, 100, 100)],
+                              np.zeros((0, 6), dtype=np.float32))
+    assert model.calls == [[(50, 50, 3), (60, 40, 3)]]
+    assert sorted(merged[:, :4].tolist()) == [[0, 0, 5, 5], [60, 40, 65, 45]]
+
+
+def test_tiled_detections_without_tiles_skips_the_model():
+    model = _Model()
+    global_detections = np.array([[0, 0, 5, 5, 0.9, 0]], dtype=np.float32)
+    assert tiled_detections(model, np.zeros((10, 10, 3), np.uint8), [], global_detections) is global_detections
+    assert model.calls == []
@@ -0,0 +1,35 @@
+import base64
+
+import numpy as np
+
+from streaming.transport import (
+    TRANSPORT_BINARY, TRANSPORT_STRING, FrameTransport, build_frame_payload, decode_image_field
+)
+
+JPEG = b'\xff\xd8jpeg\xff\xd9'
+
+
+def test_string_payload_is_a_data_url_with_top_level_fields():
+    payload = build_frame_payload(np.frombuffer(JPEG, dtype=np.uint8), TRANSPORT_STRING, detections=[1])
+    assert payload['image'] == 'data:image/jpeg;base64,' + base64.b64encode(JPEG).decode()
+    assert payload['detections'] == [1]
+
+
+def test_binary_payload_keeps_bytes_and_nests_fields():
+    payload = build_frame_payload(JPEG, TRANSPORT_BINARY, detections=[1])
+    assert payload == {'image': JPEG, 'mime': 'image/jpeg', 'meta': {'detections': [1]}}
+
+
+def test_decode_image_field_round_trips_both_modes():
+    for mode in (TRANSPORT_STRING, TRANSPORT_BINARY):
+        assert decode_image_field(build_frame_payload(JPEG, mode)['image']) == JPEG
+    assert decode_image_field(bytearray(JPEG)) == JPEG
+
+
+def test_unknown_mode_falls_back_to_string():
+    transport = FrameTransport()
+    assert transport.negotiate('sid', '/ws/feed', 'carrier-pigeon') == TRANSPORT_STRING
+    assert transport.negotiate('sid', '/ws/feed', TRANSPORT_BINARY) == TRANSPORT_BINARY
+    assert transport.mode('sid', '/ws/feed') == TRANSPORT_BINARY
+    transport.discard('sid', '/ws/feed')
+    assert transport.mode('sid', '/ws/feed') == TRANSPORT_STRING